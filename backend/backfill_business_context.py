@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Script to backfill chat_sessions.business_context for sessions created before it was
+maintained turn by turn. Sessions that already have a maintained context are skipped.
+
+Usage: python backfill_business_context.py [session_id ...]   (no ids = every session)
+"""
+
+import sys
+import asyncio
+from db.supabase import get_async_db, close_async_db
+from services.chat_service import fetch_chat_history
+from services.session_service import patch_session
+from services.business_context_service import backfill_business_context, is_maintained
+
+async def backfill_sessions(session_ids=None):
+    """Backfill business_context for the given sessions (or all sessions)"""
+
+    query = get_async_db().from_("chat_sessions").select("id, business_context")
+    if session_ids:
+        query = query.in_("id", session_ids)
+    sessions = (await query.execute()).data
+
+    updated = 0
+    for session in sessions:
+        if is_maintained(session.get("business_context")):
+            continue
+        try:
+            history = await fetch_chat_history(session["id"])
+            context = backfill_business_context(history)
+            await patch_session(session["id"], {"business_context": context})
+            updated += 1
+            print(f"✅ {session['id']}: industry='{context['industry']}', location='{context['location']}'")
+        except Exception as e:
+            print(f"❌ {session['id']}: {e}")
+
+    print(f"\n🎯 Backfilled {updated} of {len(sessions)} sessions")
+    await close_async_db()
+
+if __name__ == "__main__":
+    asyncio.run(backfill_sessions(sys.argv[1:] or None))
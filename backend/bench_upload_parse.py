@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Benchmark business plan parsing: wall time and peak RSS per document.
+
+Each parse runs in a fresh child process so peak RSS is measured per document.
+"legacy" concatenates page text with += the way the old parser did; "segments"
+is the iter_plan_segments pipeline used by /upload-plan.
+
+Usage: python bench_upload_parse.py plan1.pdf [plan2.docx ...]
+"""
+
+import io
+import os
+import sys
+import time
+import resource
+import multiprocessing
+import PyPDF2
+from services.upload_plan_service import parse_plan_text
+
+def legacy_pdf_text(content: bytes) -> str:
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(content))
+    text = ""
+    for page_num in range(len(pdf_reader.pages)):
+        text += pdf_reader.pages[page_num].extract_text() + "\n"
+    return text.strip()
+
+def measure(mode: str, path: str, results):
+    with open(path, "rb") as f:
+        content = f.read()
+    extension = os.path.splitext(path)[1].lower()
+    start = time.perf_counter()
+    if mode == "legacy" and extension == ".pdf":
+        text = legacy_pdf_text(content)
+    else:
+        text = parse_plan_text(content, extension)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is KB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    results.put((elapsed, peak_mb, len(text)))
+
+def run(mode: str, path: str):
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=measure, args=(mode, path, results))
+    process.start()
+    outcome = results.get()
+    process.join()
+    return outcome
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    print(f"{'file':40} {'mode':9} {'size MB':>8} {'seconds':>8} {'peak RSS MB':>12} {'chars':>10}")
+    for path in sys.argv[1:]:
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        for mode in ("legacy", "segments"):
+            elapsed, peak_mb, chars = run(mode, path)
+            print(f"{os.path.basename(path)[:40]:40} {mode:9} {size_mb:8.2f} {elapsed:8.2f} {peak_mb:12.1f} {chars:10}")
@@ -1,10 +1,71 @@
 import os
+import httpx
+from typing import TYPE_CHECKING
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from postgrest import AsyncPostgrestClient
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
\ No newline at end of file
+# Connection pool for the async data layer (one pool per worker process)
+SUPABASE_DB_POOL_SIZE = int(os.getenv("SUPABASE_DB_POOL_SIZE", "20"))
+SUPABASE_DB_KEEPALIVE = int(os.getenv("SUPABASE_DB_KEEPALIVE", "10"))
+SUPABASE_DB_TIMEOUT = float(os.getenv("SUPABASE_DB_TIMEOUT", "10"))
+SUPABASE_DB_CONNECT_TIMEOUT = float(os.getenv("SUPABASE_DB_CONNECT_TIMEOUT", "5"))
+
+_supabase: "Client" = None
+_async_db: AsyncPostgrestClient = None
+
+def get_supabase() -> "Client":
+    """Return the process-wide sync client (auth and one-off scripts), created on first use"""
+    global _supabase
+    if _supabase is None:
+        # The SDK is only imported here, so it stays off the cold-start path
+        from supabase import create_client
+        _supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+    return _supabase
+
+def __getattr__(name: str):
+    # `from db.supabase import supabase` (scripts) still works, without constructing the client at import
+    if name == "supabase":
+        return get_supabase()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def get_async_db() -> AsyncPostgrestClient:
+    """Return the process-wide async PostgREST client, creating its pooled httpx client on first use"""
+    global _async_db
+    if _async_db is None:
+        headers = {
+            "apikey": SUPABASE_KEY,
+            "Authorization": f"Bearer {SUPABASE_KEY}",
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+        }
+        http_client = httpx.AsyncClient(
+            base_url=f"{SUPABASE_URL}/rest/v1",
+            headers=headers,
+            timeout=httpx.Timeout(SUPABASE_DB_TIMEOUT, connect=SUPABASE_DB_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=SUPABASE_DB_POOL_SIZE,
+                max_keepalive_connections=SUPABASE_DB_KEEPALIVE,
+            ),
+            follow_redirects=True,
+        )
+        _async_db = AsyncPostgrestClient(
+            f"{SUPABASE_URL}/rest/v1",
+            headers=headers,
+            http_client=http_client,
+        )
+    return _async_db
+
+async def close_async_db():
+    """Close the pooled connections (called on app shutdown)"""
+    global _async_db
+    if _async_db is not None:
+        await _async_db.aclose()
+        _async_db = None
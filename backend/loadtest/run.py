@@ -0,0 +1,389 @@
+"""
+Offline end-to-end load test.
+
+Boots the local stand-ins (OpenAI, PostgREST, GoTrue - see loadtest/stand_ins.py) and the
+backend (main.app, via loadtest/serve_app.py) as subprocesses, then drives N concurrent
+simulated founders through the whole journey:
+
+    session -> KYC.01..KYC.19 -> BUSINESS_PLAN.01..46 -> plan approval + roadmap
+            -> roadmap-to-implementation transition -> first implementation task
+
+and reports throughput, latency percentiles per endpoint and the app's event-loop lag.
+Nothing leaves the machine; tokens are minted locally with the stand-in JWT secret.
+
+Usage (from backend/):
+    python -m loadtest.run --founders 20
+    python -m loadtest.run --founders 50 --stream --openai-latency 1.5 --json-report report.json
+    python -m loadtest.run --founders 5 --phases kyc            # KYC only, quick iteration
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import signal
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from collections import defaultdict
+import httpx
+import jwt
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+JWT_SECRET = "loadtest-jwt-secret-loadtest-jwt-secret"
+PHASES = ("kyc", "plan", "roadmap", "implementation")
+KYC_LAST = 19
+PLAN_LAST = 46
+# Streamed chats also report time to first token under "<endpoint> (first token)"
+FIRST_TOKEN_SUFFIX = " (first token)"
+
+# Answers a founder gives to the tagged questions that feed the business context
+FOUNDER_ANSWERS = {
+    "KYC.05": "Yes - a small-batch coffee roastery with office subscriptions",
+    "KYC.08": "Product business",
+    "KYC.10": "Austin, Texas, USA",
+    "KYC.11": "Food and beverage",
+    "BUSINESS_PLAN.01": "Bean There Roasters",
+}
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class Recorder:
+    """Latency samples and errors per endpoint template"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.error_samples = {}
+
+    def record(self, endpoint: str, seconds: float, ok: bool, detail: str = ""):
+        self.latencies[endpoint].append(seconds)
+        if not ok:
+            self.errors[endpoint] += 1
+            self.error_samples.setdefault(endpoint, detail[:300])
+
+    def total_requests(self) -> int:
+        return sum(len(samples) for endpoint, samples in self.latencies.items() if not endpoint.endswith(FIRST_TOKEN_SUFFIX))
+
+    def summary(self):
+        rows = {}
+        for endpoint, samples in sorted(self.latencies.items()):
+            rows[endpoint] = {
+                "count": len(samples),
+                "errors": self.errors.get(endpoint, 0),
+                "p50": percentile(samples, 0.5),
+                "p95": percentile(samples, 0.95),
+                "p99": percentile(samples, 0.99),
+                "max": max(samples),
+            }
+        return rows
+
+class FlowError(Exception):
+    pass
+
+class Founder:
+    """One simulated founder walking through the product"""
+
+    def __init__(self, number: int, client: httpx.AsyncClient, recorder: Recorder, args):
+        self.number = number
+        self.client = client
+        self.recorder = recorder
+        self.args = args
+        self.user_id = str(uuid.uuid4())
+        self.session_id = None
+        self.reached = []
+        claims = {
+            "sub": self.user_id,
+            "email": f"founder{number}@loadtest.local",
+            "aud": "authenticated",
+            "iss": f"{args.supabase_url}/auth/v1",
+            "role": "authenticated",
+            "exp": int(time.time()) + 24 * 3600,
+        }
+        self.headers = {"Authorization": f"Bearer {jwt.encode(claims, JWT_SECRET, algorithm='HS256')}"}
+
+    async def call(self, method: str, endpoint: str, path: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, path, headers=self.headers, **kwargs)
+        except httpx.HTTPError as e:
+            self.recorder.record(endpoint, time.perf_counter() - start, False, repr(e))
+            raise FlowError(f"{endpoint}: {e!r}")
+        elapsed = time.perf_counter() - start
+        ok = response.status_code < 400
+        self.recorder.record(endpoint, elapsed, ok, f"{response.status_code} {response.text}")
+        if not ok:
+            raise FlowError(f"{endpoint}: HTTP {response.status_code}")
+        return response.json()
+
+    async def chat(self, content: str):
+        if not self.args.stream:
+            body = await self.call("POST", "POST /angel/sessions/{id}/chat", f"/angel/sessions/{self.session_id}/chat", json={"content": content})
+            return body.get("result", {})
+
+        endpoint = "POST /angel/sessions/{id}/chat/stream"
+        start = time.perf_counter()
+        first_token = None
+        result = None
+        event = None
+        async with self.client.stream("POST", f"/angel/sessions/{self.session_id}/chat/stream", headers=self.headers, json={"content": content}) as response:
+            if response.status_code >= 400:
+                self.recorder.record(endpoint, time.perf_counter() - start, False, f"{response.status_code}")
+                raise FlowError(f"{endpoint}: HTTP {response.status_code}")
+            async for line in response.aiter_lines():
+                if line.startswith("event: "):
+                    event = line[7:]
+                elif line.startswith("data: "):
+                    if event == "token" and first_token is None:
+                        first_token = time.perf_counter() - start
+                    elif event == "done":
+                        result = json.loads(line[6:]).get("result", {})
+                    elif event == "error":
+                        self.recorder.record(endpoint, time.perf_counter() - start, False, line[6:])
+                        raise FlowError(f"{endpoint}: {line[6:200]}")
+        self.recorder.record(endpoint, time.perf_counter() - start, result is not None, "stream ended without done event")
+        if first_token is not None:
+            self.recorder.record(endpoint + FIRST_TOKEN_SUFFIX, first_token, True)
+        if result is None:
+            raise FlowError(f"{endpoint}: stream ended without a done event")
+        return result
+
+    async def answer_until(self, phase: str, last_question: int, transition: str, max_turns: int):
+        """Answer questions until the reply carries `transition`; returns the number of turns"""
+        question = 1
+        pending_accept = False
+        for turn in range(1, max_turns + 1):
+            if pending_accept:
+                content = "Accept"
+            else:
+                tag = f"{phase}.{question:02d}"
+                content = FOUNDER_ANSWERS.get(tag, f"Here is my answer for {tag}: we keep it simple and focus on our first customers.")
+                if phase == "BUSINESS_PLAN" and self.args.research_every and question % self.args.research_every == 0:
+                    content += " What are the current market trends?"
+            result = await self.chat(content)
+            if result.get("transition_phase") == transition:
+                return turn
+            next_question = result.get("question_number")
+            # Section summaries and acknowledgements carry no new question - accept to move on
+            pending_accept = next_question is None or next_question <= question
+            if next_question and next_question > question:
+                question = next_question
+            if question > last_question + 1:
+                break
+        raise FlowError(f"{phase}: no {transition} transition after {max_turns} turns (at question {question})")
+
+    async def run(self):
+        body = await self.call("POST", "POST /angel/sessions", "/angel/sessions", json={"title": f"Load test founder {self.number}"})
+        self.session_id = body["result"]["id"]
+
+        if "kyc" in self.args.phases:
+            await self.answer_until("KYC", KYC_LAST, "KYC_TO_BUSINESS_PLAN", KYC_LAST * 2 + 5)
+            self.reached.append("kyc")
+
+        if "plan" in self.args.phases:
+            await self.answer_until("BUSINESS_PLAN", PLAN_LAST, "PLAN_TO_ROADMAP", PLAN_LAST * 2 + 10)
+            self.reached.append("plan")
+
+        roadmap_content = "Roadmap content not available"
+        if "roadmap" in self.args.phases:
+            body = await self.call("POST", "POST /angel/sessions/{id}/transition-decision",
+                                   f"/angel/sessions/{self.session_id}/transition-decision", json={"decision": "approve"})
+            roadmap_content = body.get("result", {}).get("roadmap") or roadmap_content
+            self.reached.append("roadmap")
+
+        if "implementation" in self.args.phases:
+            await self.call("POST", "POST /roadmap-to-implementation/sessions/{id}/roadmap-to-implementation-transition",
+                            f"/roadmap-to-implementation/sessions/{self.session_id}/roadmap-to-implementation-transition",
+                            json={"business_name": FOUNDER_ANSWERS["BUSINESS_PLAN.01"], "industry": FOUNDER_ANSWERS["KYC.11"],
+                                  "location": FOUNDER_ANSWERS["KYC.10"], "business_type": FOUNDER_ANSWERS["KYC.08"],
+                                  "roadmap_content": roadmap_content})
+            await self.call("GET", "GET /implementation/sessions/{id}/implementation/tasks",
+                            f"/implementation/sessions/{self.session_id}/implementation/tasks")
+            self.reached.append("implementation")
+
+async def poll_loop_lag(client: httpx.AsyncClient, samples: list, stop: asyncio.Event):
+    while not stop.is_set():
+        try:
+            response = await client.get("/__loadtest/loop-lag")
+            samples.extend(response.json()["samples"])
+        except httpx.HTTPError:
+            pass
+        try:
+            await asyncio.wait_for(stop.wait(), 2)
+        except asyncio.TimeoutError:
+            pass
+    response = await client.get("/__loadtest/loop-lag")
+    samples.extend(response.json()["samples"])
+
+async def wait_until_ready(url: str, process: subprocess.Popen, timeout: float = 60):
+    deadline = time.time() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.time() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"{url} exited with code {process.returncode} before becoming ready")
+            try:
+                await client.get(url)
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} not ready after {timeout}s")
+
+async def drive(args, app_url: str):
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.founders * 2, max_keepalive_connections=args.founders * 2)
+    timeout = httpx.Timeout(args.request_timeout)
+    async with httpx.AsyncClient(base_url=app_url, limits=limits, timeout=timeout) as client:
+        lag_samples = []
+        stop = asyncio.Event()
+        lag_task = asyncio.ensure_future(poll_loop_lag(client, lag_samples, stop))
+
+        founders = [Founder(number, client, recorder, args) for number in range(args.founders)]
+
+        async def run_founder(founder: Founder, delay: float):
+            await asyncio.sleep(delay)
+            try:
+                await founder.run()
+                return None
+            except FlowError as e:
+                return str(e)
+
+        start = time.perf_counter()
+        failures = await asyncio.gather(*(
+            run_founder(founder, index * args.ramp_up / max(1, args.founders))
+            for index, founder in enumerate(founders)
+        ))
+        elapsed = time.perf_counter() - start
+
+        stop.set()
+        await lag_task
+        stand_in_stats = (await client.get(f"{args.supabase_url}/__stand_ins/stats")).json()
+        metrics = (await client.get("/metrics")).text
+
+    return {
+        "founders": args.founders,
+        "phases": list(args.phases),
+        "stream": args.stream,
+        "wall_seconds": elapsed,
+        "completed_flows": sum(1 for failure in failures if failure is None),
+        "failures": [failure for failure in failures if failure],
+        "requests": recorder.total_requests(),
+        "throughput_rps": recorder.total_requests() / elapsed if elapsed else 0.0,
+        "endpoints": recorder.summary(),
+        "error_samples": recorder.error_samples,
+        "loop_lag": {
+            "samples": len(lag_samples),
+            "p50": percentile(lag_samples, 0.5),
+            "p95": percentile(lag_samples, 0.95),
+            "p99": percentile(lag_samples, 0.99),
+            "max": max(lag_samples) if lag_samples else 0.0,
+        },
+        "openai": stand_in_stats["openai"],
+        "metrics": metrics,
+    }
+
+def print_report(report: dict):
+    print(f"\n📊 Load test: {report['founders']} founders, phases {','.join(report['phases'])}"
+          f"{' (streaming)' if report['stream'] else ''}")
+    print(f"   Completed flows: {report['completed_flows']}/{report['founders']} in {report['wall_seconds']:.1f}s")
+    print(f"   Requests: {report['requests']} ({report['throughput_rps']:.2f} req/s)")
+    print(f"   OpenAI stand-in: {report['openai']['requests']} completions, {report['openai']['completion_tokens']} tokens\n")
+
+    width = max([len(endpoint) for endpoint in report["endpoints"]] + [8])
+    print(f"   {'endpoint':{width}} {'count':>6} {'errors':>6} {'p50 s':>8} {'p95 s':>8} {'p99 s':>8} {'max s':>8}")
+    for endpoint, row in report["endpoints"].items():
+        print(f"   {endpoint:{width}} {row['count']:>6} {row['errors']:>6} {row['p50']:>8.3f} {row['p95']:>8.3f} {row['p99']:>8.3f} {row['max']:>8.3f}")
+
+    lag = report["loop_lag"]
+    print(f"\n   Event-loop lag ({lag['samples']} samples): p50 {lag['p50'] * 1000:.1f}ms, p95 {lag['p95'] * 1000:.1f}ms, "
+          f"p99 {lag['p99'] * 1000:.1f}ms, max {lag['max'] * 1000:.1f}ms")
+
+    for endpoint, sample in report["error_samples"].items():
+        print(f"\n❌ {endpoint}: {sample}")
+    for failure in report["failures"][:5]:
+        print(f"❌ Flow failed: {failure}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end load test for the Angel backend")
+    parser.add_argument("--founders", type=int, default=10, help="concurrent simulated founders")
+    parser.add_argument("--phases", default=",".join(PHASES), help=f"comma-separated subset of {','.join(PHASES)}")
+    parser.add_argument("--stream", action="store_true", help="use the SSE chat endpoint")
+    parser.add_argument("--ramp-up", type=float, default=2.0, help="seconds over which founders start")
+    parser.add_argument("--research-every", type=int, default=10, help="every Nth plan answer asks for market research (0 = never)")
+    parser.add_argument("--openai-latency", type=float, default=0.5, help="stand-in seconds before the first token")
+    parser.add_argument("--openai-token-rate", type=float, default=200, help="stand-in tokens per second")
+    parser.add_argument("--openai-tokens", type=int, default=120, help="stand-in completion length in tokens")
+    parser.add_argument("--db-latency", type=float, default=0.005, help="stand-in seconds per PostgREST request")
+    parser.add_argument("--request-timeout", type=float, default=300)
+    parser.add_argument("--json-report", help="also write the report (including /metrics) to this file")
+    parser.add_argument("--app-log", help="file for the app's output (default: a temp file)")
+    args = parser.parse_args()
+    args.phases = [phase.strip() for phase in args.phases.split(",") if phase.strip()]
+    unknown = set(args.phases) - set(PHASES)
+    if unknown:
+        parser.error(f"unknown phases: {', '.join(sorted(unknown))}")
+
+    stand_in_port, app_port = free_port(), free_port()
+    args.supabase_url = f"http://127.0.0.1:{stand_in_port}"
+    workdir = tempfile.mkdtemp(prefix="angel-loadtest-")
+    app_log_path = args.app_log or os.path.join(workdir, "app.log")
+
+    env = {
+        **os.environ,
+        "SUPABASE_URL": args.supabase_url,
+        "SUPABASE_SERVICE_ROLE_KEY": "loadtest-service-role-key",
+        "SUPABASE_JWT_SECRET": JWT_SECRET,
+        "OPENAI_API_KEY": "loadtest-openai-key",
+        "OPENAI_BASE_URL": f"{args.supabase_url}/v1",
+        "JOB_STORE_PATH": os.path.join(workdir, "jobs.sqlite3"),
+        "RESEARCH_CACHE_PATH": os.path.join(workdir, "research_cache.sqlite3"),
+        "FAKE_OPENAI_LATENCY": str(args.openai_latency),
+        "FAKE_OPENAI_TOKEN_RATE": str(args.openai_token_rate),
+        "FAKE_OPENAI_TOKENS": str(args.openai_tokens),
+        "FAKE_DB_LATENCY": str(args.db_latency),
+        "PYTHONUNBUFFERED": "1",
+    }
+
+    with open(os.path.join(workdir, "stand_ins.log"), "w") as stand_in_log, open(app_log_path, "w") as app_log:
+        stand_ins = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "loadtest.stand_ins:app", "--port", str(stand_in_port), "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=env, stdout=stand_in_log, stderr=subprocess.STDOUT
+        )
+        app = subprocess.Popen(
+            [sys.executable, "-m", "loadtest.serve_app", "--port", str(app_port)],
+            cwd=BACKEND_DIR, env=env, stdout=app_log, stderr=subprocess.STDOUT
+        )
+        try:
+            asyncio.run(wait_until_ready(f"{args.supabase_url}/__stand_ins/stats", stand_ins))
+            asyncio.run(wait_until_ready(f"http://127.0.0.1:{app_port}/", app))
+            print(f"🚀 Stand-ins on :{stand_in_port}, app on :{app_port} (app output: {app_log_path})")
+            report = asyncio.run(drive(args, f"http://127.0.0.1:{app_port}"))
+        finally:
+            for process in (app, stand_ins):
+                process.send_signal(signal.SIGINT)
+            for process in (app, stand_ins):
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+    print_report(report)
+    if args.json_report:
+        with open(args.json_report, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📝 Report written to {args.json_report}")
+    return 0 if report["completed_flows"] == report["founders"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
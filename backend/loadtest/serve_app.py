@@ -0,0 +1,42 @@
+"""
+Serve the backend's FastAPI app (main.app) for the load test, plus an event-loop lag probe.
+
+The probe sleeps LOOP_LAG_INTERVAL seconds in a loop and records how late each wake-up is;
+GET /__loadtest/loop-lag returns the samples collected since the last call.
+
+Run: python -m loadtest.serve_app --port 8766   (environment prepared by loadtest.run)
+"""
+
+import os
+import time
+import asyncio
+import argparse
+import uvicorn
+from main import app
+
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.05"))
+
+loop_lag_samples = []
+
+async def monitor_loop_lag():
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        loop_lag_samples.append(max(0.0, time.perf_counter() - start - LOOP_LAG_INTERVAL))
+
+@app.on_event("startup")
+async def start_loop_lag_monitor():
+    asyncio.ensure_future(monitor_loop_lag())
+
+@app.get("/__loadtest/loop-lag")
+async def loop_lag():
+    samples = list(loop_lag_samples)
+    loop_lag_samples.clear()
+    return {"interval": LOOP_LAG_INTERVAL, "samples": samples}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
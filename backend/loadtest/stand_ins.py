@@ -0,0 +1,279 @@
+"""
+Local stand-ins for the services the backend talks to, served from one FastAPI app:
+
+- OpenAI chat completions    POST /v1/chat/completions (plain and streamed)
+- Supabase PostgREST         /rest/v1/{table} - an in-memory store covering the query
+                             features the backend uses (eq/neq/gt/gte/lt/lte/in/is/like,
+                             order, limit/offset, single, insert, upsert, update, delete)
+- Supabase GoTrue            GET /auth/v1/user for the remote token check
+
+Latency and output size are set with FAKE_OPENAI_LATENCY (seconds before the first token),
+FAKE_OPENAI_TOKEN_RATE (tokens per second after that), FAKE_OPENAI_TOKENS (completion length,
+capped by the request's max_tokens) and FAKE_DB_LATENCY (seconds per PostgREST request).
+
+Run: uvicorn loadtest.stand_ins:app --port 8765
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import asyncio
+import itertools
+from datetime import datetime, timedelta, timezone
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+FAKE_OPENAI_LATENCY = float(os.getenv("FAKE_OPENAI_LATENCY", "0.5"))
+FAKE_OPENAI_TOKEN_RATE = float(os.getenv("FAKE_OPENAI_TOKEN_RATE", "200"))
+FAKE_OPENAI_TOKENS = int(os.getenv("FAKE_OPENAI_TOKENS", "120"))
+FAKE_DB_LATENCY = float(os.getenv("FAKE_DB_LATENCY", "0.005"))
+
+app = FastAPI(title="Angel load-test stand-ins")
+
+# ---------------------------------------------------------------------------
+# OpenAI
+# ---------------------------------------------------------------------------
+
+# The chat prompt tells the model which tag to ask next (see prepare_angel_turn)
+NEXT_TAG_PATTERN = re.compile(r"Use the proper tag format: \[\[Q:([A-Z_]+\.\d{2})\]\]")
+FILLER_WORDS = ("Thanks", "for", "sharing", "that", "-", "it", "gives", "a", "clear", "picture", "of",
+                "where", "your", "business", "is", "heading", "and", "what", "comes", "next.")
+
+openai_stats = {"requests": 0, "streamed": 0, "completion_tokens": 0}
+
+def _prompt_text(messages) -> str:
+    parts = []
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, list):
+            content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+        parts.append(content or "")
+    return "\n".join(parts)
+
+def _completion_words(body: dict):
+    """Completion as a list of whitespace-separated tokens"""
+    if (body.get("response_format") or {}).get("type") == "json_object":
+        return ["{}"]
+    count = max(1, min(FAKE_OPENAI_TOKENS, body.get("max_tokens") or FAKE_OPENAI_TOKENS))
+    words = list(itertools.islice(itertools.cycle(FILLER_WORDS), count))
+    tags = NEXT_TAG_PATTERN.findall(_prompt_text(body.get("messages", [])))
+    if tags:
+        words += ["\n\n", f"[[Q:{tags[-1]}]]", "What", "would", "you", "like", "to", "share", "next?"]
+    return words
+
+def _usage(body: dict, completion_tokens: int) -> dict:
+    prompt_tokens = len(_prompt_text(body.get("messages", []))) // 4
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    words = _completion_words(body)
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+    created = int(time.time())
+    model = body.get("model", "gpt-4o")
+    openai_stats["requests"] += 1
+    openai_stats["completion_tokens"] += len(words)
+
+    await asyncio.sleep(FAKE_OPENAI_LATENCY)
+
+    if not body.get("stream"):
+        await asyncio.sleep(len(words) / FAKE_OPENAI_TOKEN_RATE)
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": " ".join(words)}, "finish_reason": "stop"}],
+            "usage": _usage(body, len(words)),
+        }
+
+    openai_stats["streamed"] += 1
+    include_usage = (body.get("stream_options") or {}).get("include_usage")
+
+    def chunk(delta, finish_reason=None, usage=None, choices=True):
+        payload = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                   "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if choices else []}
+        if usage:
+            payload["usage"] = usage
+        return f"data: {json.dumps(payload)}\n\n"
+
+    async def stream():
+        yield chunk({"role": "assistant", "content": ""})
+        for index, word in enumerate(words):
+            await asyncio.sleep(1 / FAKE_OPENAI_TOKEN_RATE)
+            yield chunk({"content": word if index == 0 else f" {word}"})
+        yield chunk({}, finish_reason="stop")
+        if include_usage:
+            yield chunk(None, usage=_usage(body, len(words)), choices=False)
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+# ---------------------------------------------------------------------------
+# GoTrue
+# ---------------------------------------------------------------------------
+
+@app.get("/auth/v1/user")
+async def auth_user(request: Request):
+    """Accept any bearer token of the form <user id> (the harness normally mints local JWTs instead)"""
+    token = request.headers.get("authorization", "").removeprefix("Bearer ").strip()
+    if not token:
+        return JSONResponse(status_code=401, content={"msg": "missing token"})
+    return {"id": token, "aud": "authenticated", "email": f"{token}@loadtest.local", "app_metadata": {}, "user_metadata": {},
+            "created_at": datetime.now(timezone.utc).isoformat()}
+
+# ---------------------------------------------------------------------------
+# PostgREST
+# ---------------------------------------------------------------------------
+
+# table -> list of rows
+tables = {}
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+_clock = datetime.now(timezone.utc)
+
+def _timestamp() -> str:
+    """Strictly increasing timestamps so created_at ordering is stable"""
+    global _clock
+    _clock = max(_clock + timedelta(microseconds=1), datetime.now(timezone.utc))
+    return _clock.isoformat()
+
+def _coerce(value, sample):
+    if isinstance(sample, bool):
+        return value.lower() == "true"
+    if isinstance(sample, (int, float)):
+        try:
+            return type(sample)(value)
+        except ValueError:
+            return value
+    return value
+
+def _split_list(value: str):
+    items = re.findall(r'"((?:[^"\\]|\\.)*)"|([^,]+)', value.strip("()"))
+    return [quoted or plain for quoted, plain in items]
+
+def _matches(row: dict, column: str, expression: str) -> bool:
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[4:]
+    operator, _, argument = expression.partition(".")
+    value = row.get(column)
+    if operator == "is":
+        result = value is None if argument == "null" else value is (argument == "true")
+    elif operator == "in":
+        result = str(value) in _split_list(argument)
+    elif value is None:
+        result = False
+    elif operator in ("like", "ilike"):
+        pattern = "^" + re.escape(argument).replace("\\*", ".*").replace("%", ".*") + "$"
+        result = re.match(pattern, str(value), re.IGNORECASE if operator == "ilike" else 0) is not None
+    else:
+        argument = _coerce(argument, value)
+        if not isinstance(argument, type(value)):
+            value, argument = str(value), str(argument)
+        result = {
+            "eq": value == argument, "neq": value != argument,
+            "gt": value > argument, "gte": value >= argument,
+            "lt": value < argument, "lte": value <= argument,
+        }.get(operator, False)
+    return not result if negate else result
+
+def _filtered(table: str, params) -> list:
+    rows = tables.setdefault(table, [])
+    filters = [(key, value) for key, value in params.multi_items() if key not in RESERVED_PARAMS]
+    return [row for row in rows if all(_matches(row, key, value) for key, value in filters)]
+
+def _project(rows: list, params) -> list:
+    select = params.get("select", "*")
+    if select.strip() == "*":
+        return [dict(row) for row in rows]
+    columns = [column.strip() for column in select.split(",") if column.strip()]
+    return [{column: row.get(column) for column in columns} for row in rows]
+
+def _ordered(rows: list, params) -> list:
+    order = params.get("order")
+    if order:
+        for clause in reversed(order.split(",")):
+            column, _, direction = clause.partition(".")
+            present = [row for row in rows if row.get(column) is not None]
+            missing = [row for row in rows if row.get(column) is None]
+            present.sort(key=lambda row: row[column], reverse=direction.startswith("desc"))
+            rows = present + missing
+    offset = int(params.get("offset", 0))
+    limit = params.get("limit")
+    return rows[offset:offset + int(limit)] if limit is not None else rows[offset:]
+
+def _respond(request: Request, rows: list, status: int = 200):
+    prefer = request.headers.get("prefer", "")
+    if "return=minimal" in prefer:
+        return Response(status_code=204 if status == 200 else status)
+    if "vnd.pgrst.object+json" in request.headers.get("accept", ""):
+        if len(rows) != 1:
+            return JSONResponse(status_code=406, content={
+                "code": "PGRST116", "details": f"The result contains {len(rows)} rows",
+                "hint": None, "message": "JSON object requested, multiple (or no) rows returned"})
+        return JSONResponse(status_code=status, content=rows[0])
+    return JSONResponse(status_code=status, content=rows)
+
+def _new_row(data: dict) -> dict:
+    now = _timestamp()
+    row = {"id": str(uuid.uuid4()), "created_at": now, "updated_at": now}
+    row.update(data)
+    return row
+
+@app.get("/rest/v1/{table}")
+async def select_rows(table: str, request: Request):
+    await asyncio.sleep(FAKE_DB_LATENCY)
+    rows = _ordered(_filtered(table, request.query_params), request.query_params)
+    return _respond(request, _project(rows, request.query_params))
+
+@app.post("/rest/v1/{table}")
+async def insert_rows(table: str, request: Request):
+    await asyncio.sleep(FAKE_DB_LATENCY)
+    payload = await request.json()
+    records = payload if isinstance(payload, list) else [payload]
+    prefer = request.headers.get("prefer", "")
+    conflict_columns = [c for c in request.query_params.get("on_conflict", "").split(",") if c]
+    rows = tables.setdefault(table, [])
+
+    written = []
+    for record in records:
+        existing = None
+        if "resolution=" in prefer:
+            keys = conflict_columns or ["id"]
+            existing = next((row for row in rows if all(row.get(k) == record.get(k) for k in keys)), None)
+        if existing is not None:
+            if "resolution=merge-duplicates" in prefer:
+                existing.update(record, updated_at=_timestamp())
+                written.append(existing)
+            continue
+        row = _new_row(record)
+        rows.append(row)
+        written.append(row)
+    return _respond(request, _project(written, request.query_params), status=201)
+
+@app.post("/rest/v1/rpc/{function}")
+async def call_rpc(function: str):
+    return JSONResponse(status_code=404, content={"message": f"RPC {function} not available in the load-test stand-in"})
+
+@app.patch("/rest/v1/{table}")
+async def update_rows(table: str, request: Request):
+    await asyncio.sleep(FAKE_DB_LATENCY)
+    updates = await request.json()
+    rows = _filtered(table, request.query_params)
+    for row in rows:
+        row.update(updates, updated_at=_timestamp())
+    return _respond(request, _project(rows, request.query_params))
+
+@app.delete("/rest/v1/{table}")
+async def delete_rows(table: str, request: Request):
+    await asyncio.sleep(FAKE_DB_LATENCY)
+    doomed = _filtered(table, request.query_params)
+    tables[table] = [row for row in tables.get(table, []) if row not in doomed]
+    return _respond(request, _project(doomed, request.query_params))
+
+@app.get("/__stand_ins/stats")
+async def stand_in_stats():
+    return {"openai": openai_stats, "tables": {name: len(rows) for name, rows in tables.items()}}
@@ -1,7 +1,8 @@
 # import logging
 # logging.basicConfig(level=logging.DEBUG)
 import os
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
@@ -17,10 +18,18 @@ from routers.provider_router import router as provider_router
 from routers.specialized_agents_router import router as specialized_agents_router
 from routers.implementation_router import router as implementation_router
 from routers.appendices_router import router as appendices_router
-from routers.upload_plan_router import router as upload_plan_router
+from routers.upload_plan_router import router as upload_plan_router, MAX_UPLOAD_BODY_SIZE
 
 # Middlewares
 from middlewares.auth import verify_auth_token
+from middlewares.request_timing import RequestTimingMiddleware
+from middlewares.body_size_limit import BodySizeLimitMiddleware
+
+from db.supabase import close_async_db
+from utils.job_runner import start_job_workers, stop_job_workers
+from services.upload_plan_service import shutdown_parse_pool
+from utils.llm_gateway import close_llm_client
+from utils.request_timing import render_metrics
 
 # Exceptions
 from exceptions import (
@@ -32,6 +41,19 @@ from exceptions import (
 
 app = FastAPI(title="Founderport Angel Assistant")
 
+# ✅ Background job workers (also resume jobs left behind by a restarted worker)
+@app.on_event("startup")
+async def startup_job_workers():
+    start_job_workers()
+
+# ✅ Release pooled Supabase connections on worker shutdown
+@app.on_event("shutdown")
+async def shutdown_db_pool():
+    await stop_job_workers()
+    shutdown_parse_pool()
+    await close_llm_client()
+    await close_async_db()
+
 # ✅ Root route for health check
 @app.get("/")
 async def root():
@@ -41,6 +63,15 @@ async def root():
         "version": "1.0.0"
     }
 
+# ✅ Prometheus-style metrics for this worker (set METRICS_TOKEN to require a bearer token)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics(request: Request):
+    if METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 # ✅ CORS Support
 origins = [
     "https://angle-ai-zsdt.vercel.app",
@@ -51,14 +82,21 @@ origins = [
     "https://founder-ai-hkh6fgd8abangza5.canadacentral-01.azurewebsites.net",
 ]
 
+# ✅ Reject oversized uploads before Starlette spools them (inside CORS so the 413 is readable)
+app.add_middleware(BodySizeLimitMiddleware, max_body_size=MAX_UPLOAD_BODY_SIZE, path_prefixes=("/upload-plan",))
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# ✅ Per-request stage timing (Server-Timing header + /metrics); added last so it wraps everything
+app.add_middleware(RequestTimingMiddleware)
+
 # ✅ Routers
 app.include_router(auth_router, prefix="/auth")
 app.include_router(angel_router, prefix="/angel")
@@ -1,35 +1,138 @@
+import os
+import time
+import asyncio
+import jwt
+from collections import OrderedDict
 from fastapi import Request, HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from db.supabase import supabase
+from db.supabase import get_supabase, SUPABASE_URL
+from utils.request_timing import timed_span
+from utils.rate_limiter import set_rate_limit_identity
 import logging
 
 logger = logging.getLogger(__name__)
 oauth_scheme = HTTPBearer()
 
+# Local verification: HS256 tokens use the project JWT secret, asymmetric ones the project's JWKS
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET", "")
+SUPABASE_JWT_AUDIENCE = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+SUPABASE_JWT_ISSUER = os.getenv("SUPABASE_JWT_ISSUER", f"{SUPABASE_URL}/auth/v1")
+JWKS_URL = os.getenv("SUPABASE_JWKS_URL", f"{SUPABASE_URL}/auth/v1/.well-known/jwks.json")
+JWKS_CACHE_TTL = int(os.getenv("SUPABASE_JWKS_CACHE_TTL", "600"))
+# Verified tokens are remembered briefly (never past their own expiry)
+AUTH_TOKEN_CACHE_TTL = float(os.getenv("AUTH_TOKEN_CACHE_TTL", "60"))
+AUTH_TOKEN_CACHE_MAX = int(os.getenv("AUTH_TOKEN_CACHE_MAX", "2048"))
+
+ASYMMETRIC_ALGORITHMS = ["RS256", "ES256"]
+
+# token -> (user, cached_until)
+token_cache = OrderedDict()
+_jwks_client = None
+
+def _get_jwks_client() -> jwt.PyJWKClient:
+    global _jwks_client
+    if _jwks_client is None:
+        # Refetches the key set on an unknown kid, so rotated keys are picked up
+        _jwks_client = jwt.PyJWKClient(JWKS_URL, cache_keys=True, lifespan=JWKS_CACHE_TTL)
+    return _jwks_client
+
+def _cached_user(token: str):
+    entry = token_cache.get(token)
+    if entry is None:
+        return None
+    user, cached_until = entry
+    if cached_until <= time.time():
+        token_cache.pop(token, None)
+        return None
+    token_cache.move_to_end(token)
+    return user
+
+def _cache_user(token: str, user: dict, expires_at: float = None):
+    cached_until = time.time() + AUTH_TOKEN_CACHE_TTL
+    if expires_at:
+        cached_until = min(cached_until, expires_at)
+    token_cache[token] = (user, cached_until)
+    token_cache.move_to_end(token)
+    while len(token_cache) > AUTH_TOKEN_CACHE_MAX:
+        token_cache.popitem(last=False)
+
+async def _verify_locally(token: str):
+    """
+    Verify signature, expiry, audience and issuer without calling GoTrue.
+    Returns the claims, or None when no local key can verify this token (including an HS256
+    signature that doesn't match the local secret, e.g. mid-rotation).
+    Invalid tokens raise jwt.InvalidTokenError.
+    """
+    algorithm = jwt.get_unverified_header(token).get("alg")
+    options = {"require": ["exp", "sub"]}
+
+    if algorithm == "HS256":
+        if not SUPABASE_JWT_SECRET:
+            return None
+        key = SUPABASE_JWT_SECRET
+    elif algorithm in ASYMMETRIC_ALGORITHMS:
+        try:
+            # Only a JWKS cache miss touches the network
+            signing_key = await asyncio.to_thread(_get_jwks_client().get_signing_key_from_jwt, token)
+        except (jwt.PyJWKClientError, jwt.PyJWKError) as e:
+            print(f"⚠️ JWKS lookup failed ({e}) - falling back to remote verification")
+            return None
+        key = signing_key.key
+    else:
+        return None
+
+    try:
+        return jwt.decode(
+            token,
+            key,
+            algorithms=[algorithm],
+            audience=SUPABASE_JWT_AUDIENCE,
+            issuer=SUPABASE_JWT_ISSUER,
+            options=options
+        )
+    except jwt.InvalidSignatureError:
+        # During a JWT secret rotation new tokens don't match SUPABASE_JWT_SECRET until it is updated;
+        # GoTrue knows the current secret. (The JWKS client already refetches rotated asymmetric keys.)
+        if algorithm != "HS256":
+            raise
+        print("⚠️ HS256 signature did not match the local secret - falling back to remote verification")
+        return None
+
+async def _verify_remotely(token: str):
+    user_response = await asyncio.to_thread(get_supabase().auth.get_user, token)
+    if not user_response or not user_response.user:
+        return None
+    return {"id": user_response.user.id, "email": user_response.user.email}
+
 async def verify_auth_token(
     request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(oauth_scheme)
 ):
-    token = credentials.credentials
-    print(f"🔐 Verifying token for path: {request.url.path}")
-    
+    with timed_span("auth"):
+        request.state.user = await _authenticate(request, credentials.credentials)
+    # OpenAI/web search calls made while serving this request draw from this user's and session's budgets
+    set_rate_limit_identity(request.state.user["id"], request.path_params.get("session_id"))
+
+async def _authenticate(request: Request, token: str) -> dict:
+    user = _cached_user(token)
+    if user:
+        return user
+
     try:
-        # Use Supabase's built-in token verification
-        user_response = supabase.auth.get_user(token)
-        
-        if not user_response or not user_response.user:
-            print("❌ Invalid user from token")
-            raise HTTPException(status_code=401, detail="Invalid token")
-        
-        user = user_response.user
-        print(f"✅ Token validated successfully for user: {user.email}")
-        
-        request.state.user = {
-            "id": user.id, 
-            "email": user.email
-        }
-        
+        claims = await _verify_locally(token)
+        if claims is not None:
+            user = {"id": claims["sub"], "email": claims.get("email")}
+            _cache_user(token, user, claims["exp"])
+        else:
+            user = await _verify_remotely(token)
+            if not user:
+                print("❌ Invalid user from token")
+                raise HTTPException(status_code=401, detail="Invalid token")
+            _cache_user(token, user)
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"❌ Token verification failed: {str(e)}")
+        print(f"❌ Token verification failed for path {request.url.path}: {str(e)}")
         raise HTTPException(status_code=401, detail="Invalid token")
 
+    return user
@@ -0,0 +1,45 @@
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+class BodySizeLimitMiddleware:
+    """
+    Caps request bodies on the given path prefixes before the app reads (and spools) them.
+
+    A declared Content-Length over the limit is answered with 413 without reading the body;
+    bodies without one are counted as they arrive and cut off once they pass the limit.
+    """
+
+    def __init__(self, app, max_body_size: int, path_prefixes: tuple):
+        self.app = app
+        self.max_body_size = max_body_size
+        self.path_prefixes = path_prefixes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        detail = f"Request body too large. Maximum size is {self.max_body_size // (1024 * 1024)}MB."
+        headers = dict(scope.get("headers", []))
+        try:
+            declared = int(headers.get(b"content-length", b"0"))
+        except ValueError:
+            declared = 0
+        if declared > self.max_body_size:
+            response = JSONResponse(status_code=413, content={"success": False, "error": "HTTP Exception", "message": detail})
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def receive_capped():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    # FastAPI re-raises HTTPExceptions from body parsing, so this becomes a 413 response
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, receive_capped, send)
@@ -0,0 +1,47 @@
+from utils.request_timing import start_request_timing, end_request_timing, record_request
+
+class RequestTimingMiddleware:
+    """
+    Starts a timing context for every HTTP request, adds its spans as a Server-Timing
+    header and feeds the per-route latency metrics.
+
+    Pure ASGI rather than BaseHTTPMiddleware so streamed (SSE) responses are measured
+    until their last chunk; their header only carries the spans finished before streaming began.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing, token = start_request_timing()
+        status = 500
+        recorded = False
+
+        def finish():
+            nonlocal recorded
+            if recorded:
+                return
+            recorded = True
+            route = scope.get("route")
+            record_request(scope["method"], getattr(route, "path", "unmatched"), status, timing)
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timing.server_timing_header().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                finish()
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            finish()
+            end_request_timing(token)
@@ -1,16 +1,30 @@
 from fastapi import APIRouter, Request, Depends, UploadFile, File
+from fastapi.responses import StreamingResponse, JSONResponse
 from schemas.angel_schemas import ChatRequestSchema, CreateSessionSchema
 from services.session_service import create_session, list_sessions, get_session, patch_session
-from services.chat_service import fetch_chat_history, save_chat_message, fetch_phase_chat_history
+from services.chat_service import fetch_chat_history, fetch_recent_chat_history, save_chat_message, fetch_phase_chat_history, ChatTurn
 from services.generate_plan_service import generate_full_business_plan, generate_full_roadmap_plan, generate_comprehensive_business_plan_summary, generate_implementation_insights, generate_service_provider_preview, generate_motivational_quote
-from services.angel_service import get_angel_reply, handle_roadmap_generation, handle_roadmap_to_implementation_transition
+from services.business_context_service import get_business_context, record_answer
+from services.artifact_service import fetch_artifact, list_artifact_versions, get_or_generate_artifact, ARTIFACT_TYPES
+from services.question_catalog import capture_question, capture_questions_from_history, render_question, find_previous_answer
+from services.speculative_drafts import invalidate_speculations
+from services.angel_service import get_angel_reply, stream_angel_reply, speculate_command_replies, handle_roadmap_generation, handle_roadmap_to_implementation_transition
 from utils.progress import parse_tag, TOTALS_BY_PHASE, calculate_phase_progress, calculate_combined_progress, smart_trim_history
+from utils.job_runner import enqueue_job, get_job, public_job_view, register_job_handler, report_job_progress
 from middlewares.auth import verify_auth_token
 from fastapi.middleware.cors import CORSMiddleware
 import re
 import os
+import json
+import asyncio
 import uuid
 from datetime import datetime
+from utils.llm_gateway import chat_completion
+
+# Seconds between job state checks while streaming job events
+JOB_EVENTS_POLL_INTERVAL = float(os.getenv("JOB_EVENTS_POLL_INTERVAL", "1"))
+# Recent messages go-back reads: the previous question, its answer and the current question, with room for follow-ups
+GO_BACK_HISTORY_LIMIT = int(os.getenv("GO_BACK_HISTORY_LIMIT", "6"))
 
 router = APIRouter(
     tags=["Angel"],
@@ -39,15 +53,111 @@ async def chat_history(request: Request, session_id: str):
 @router.post("/sessions/{session_id}/chat")
 async def post_chat(session_id: str, request: Request, payload: ChatRequestSchema):
     user_id = request.state.user["id"]
-    session = await get_session(session_id, user_id)
-    history = await fetch_chat_history(session_id)
+    session, history = await asyncio.gather(
+        get_session(session_id, user_id),
+        fetch_chat_history(session_id)
+    )
 
-    # Save user message
-    await save_chat_message(session_id, user_id, "user", payload.content)
+    # User message is written together with the reply when the turn is flushed
+    turn = ChatTurn(session_id, user_id)
+    turn.add_message("user", payload.content)
+    # The reply moves session["asked_q"] on to the next question; this message answers the current one
+    answered_tag = session.get("asked_q")
 
     # Get AI reply
-    angel_response = await get_angel_reply({"role": "user", "content": payload.content}, history, session)
-    
+    try:
+        angel_response = await get_angel_reply({"role": "user", "content": payload.content}, history, session)
+    except Exception:
+        # Keep the user's message even if generation fails
+        await turn.flush()
+        raise
+
+    return await finalize_chat_turn(turn, session, history, angel_response, answered_tag)
+
+@router.post("/sessions/{session_id}/chat/stream")
+async def post_chat_stream(session_id: str, request: Request, payload: ChatRequestSchema):
+    """Server-Sent Events variant of post_chat.
+
+    Emits `token` events while the reply is generated, then a single `done` event whose
+    data is the same body post_chat returns (the cleaned reply, progress, tag metadata).
+    """
+    user_id = request.state.user["id"]
+    session, history = await asyncio.gather(
+        get_session(session_id, user_id),
+        fetch_chat_history(session_id)
+    )
+
+    # User message is written together with the reply when the turn is flushed
+    turn = ChatTurn(session_id, user_id)
+    turn.add_message("user", payload.content)
+    # The reply moves session["asked_q"] on to the next question; this message answers the current one
+    answered_tag = session.get("asked_q")
+
+    async def event_stream():
+        tag_filter = StreamTagFilter()
+        try:
+            async for event in stream_angel_reply({"role": "user", "content": payload.content}, history, session):
+                if event["type"] == "token":
+                    visible = tag_filter.feed(event["content"])
+                    if visible:
+                        yield format_sse("token", {"content": visible})
+                else:
+                    visible = tag_filter.flush()
+                    if visible:
+                        yield format_sse("token", {"content": visible})
+                    result = await finalize_chat_turn(turn, session, history, event["response"], answered_tag)
+                    yield format_sse("done", result)
+        except Exception as e:
+            print(f"❌ Streaming chat error: {e}")
+            yield format_sse("error", {"success": False, "error": "Internal Server Error", "message": str(e)})
+        finally:
+            # Keep the user's message if generation fails or the client disconnects mid-stream
+            # (a no-op once finalize_chat_turn has flushed); shielded so cancellation can't cut the write short
+            await asyncio.shield(turn.flush())
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def format_sse(event, data):
+    """Serialize one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+class StreamTagFilter:
+    """Hide [[...]] control tags from streamed tokens.
+
+    Tags can arrive split across several deltas, so any text from an unclosed "[["
+    onwards is held back until the closing "]]" (or the end of the stream) arrives.
+    """
+
+    def __init__(self):
+        self.pending = ""
+
+    def feed(self, text):
+        self.pending += text
+        visible = re.sub(r'\[\[[^\]]*\]\]', '', self.pending)
+        hold_from = visible.rfind("[[")
+        if hold_from == -1 and visible.endswith("["):
+            hold_from = len(visible) - 1
+        if hold_from == -1:
+            self.pending = ""
+            return visible
+        self.pending = visible[hold_from:]
+        return visible[:hold_from]
+
+    def flush(self):
+        visible = re.sub(r'\[\[[^\]]*\]\]', '', self.pending)
+        self.pending = ""
+        return visible
+
+async def finalize_chat_turn(turn, session, history, angel_response, answered_tag=None):
+    """Advance the session tag/progress, flush the turn's writes and build the chat response.
+
+    answered_tag is the question the user's message answers (session["asked_q"] before the reply).
+    """
+    session_id = turn.session_id
     # Handle new return format
     if isinstance(angel_response, dict):
         assistant_reply = angel_response["reply"]
@@ -67,23 +177,34 @@ async def post_chat(session_id: str, request: Request, payload: ChatRequestSchem
         session_update = None
         show_accept_modify = False
 
+    # Record the user's answer to the question they were asked in the session's business context
+    user_content = next((m["content"] for m in reversed(turn.messages) if m["role"] == "user"), "")
+    # Speculative Draft/Support replies were generated for the history before this turn
+    invalidate_speculations(session_id)
+    stored_context = session.get("business_context")
+    business_context = record_answer(get_business_context(session, history), answered_tag, user_content)
+    if business_context != stored_context:
+        session["business_context"] = business_context
+        turn.patch({"business_context": business_context})
+
     # Save assistant reply
-    await save_chat_message(session_id, user_id, "assistant", assistant_reply)
+    turn.add_message("assistant", assistant_reply)
 
     # Handle session updates (e.g., from Accept responses)
     if session_update:
         session.update(session_update)
-        await patch_session(session_id, session_update)
+        turn.patch(session_update)
 
     # Handle transition phases
     if transition_phase == "KYC_TO_BUSINESS_PLAN":
         # Update session to transition phase
         session["current_phase"] = "BUSINESS_PLAN"
-        await patch_session(session_id, {
+        turn.patch({
             "current_phase": "BUSINESS_PLAN",
             "asked_q": "BUSINESS_PLAN.01",
             "answered_count": 0
         })
+        await turn.flush()
         
         # Return transition response
         return {
@@ -111,9 +232,10 @@ async def post_chat(session_id: str, request: Request, payload: ChatRequestSchem
             "business_plan_summary": business_plan_summary,
             "transition_type": "PLAN_TO_ROADMAP"
         }
-        await patch_session(session_id, {
+        turn.patch({
             "current_phase": session["current_phase"]
         })
+        await turn.flush()
         
         # Return transition response without normal tag processing
         return {
@@ -160,6 +282,8 @@ async def post_chat(session_id: str, request: Request, payload: ChatRequestSchem
         # Tag handling - Only increment when moving to a genuinely new question
         last_tag = session.get("asked_q")
         tag = parse_tag(assistant_reply)
+        # Kept so go-back/navigate/refresh can re-display the question without the model
+        capture_question(session_id, tag, assistant_reply)
 
     print(f"🏷️ Tag Analysis:")
     print(f"  - Last tag: {session.get('asked_q')}")
@@ -308,11 +432,17 @@ async def post_chat(session_id: str, request: Request, payload: ChatRequestSchem
     print(f"📊 Final Progress Data Sent to Frontend: {phase_progress}")
     
     # Update session in DB (without phase_progress since it's calculated on the fly)
-    await patch_session(session_id, {
+    turn.patch({
         "asked_q": session["asked_q"],
         "answered_count": session["answered_count"],
         "current_phase": session["current_phase"]
     })
+    turn_messages = [{"role": m["role"], "content": m["content"]} for m in turn.messages]
+    await turn.flush()
+
+    # A new business plan question: start its Draft in the background so the command is instant
+    if tag and not is_command_response and session["asked_q"] != answered_tag and session["asked_q"].startswith("BUSINESS_PLAN."):
+        speculate_command_replies(session_id, session, history + turn_messages)
 
     # Extract question number from tag before removing it
     question_number = None
@@ -494,7 +624,8 @@ async def go_back_to_previous_question(session_id: str, request: Request):
     
     user_id = request.state.user["id"]
     session = await get_session(session_id, user_id)
-    history = await fetch_chat_history(session_id)
+    # Enough to know there is a previous Q&A pair and to read how that question was worded
+    history = await fetch_recent_chat_history(session_id, limit=GO_BACK_HISTORY_LIMIT)
     
     if not history or len(history) < 2:
         return {
@@ -539,30 +670,31 @@ async def go_back_to_previous_question(session_id: str, request: Request):
                 # Re-fetch updated session
                 updated_session = await get_session(session_id, user_id)
                 
-                # Generate the previous question
-                from utils.constant import ANGEL_SYSTEM_PROMPT
-                from openai import AsyncOpenAI
-                import os
-                
-                client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-                
-                question_prompt = f"""
-                The user wants to go back to the previous question.
-                Please display question {previous_tag} again.
-                Use the proper format with the [[Q:{previous_tag}]] tag.
-                """
-                
-                response = await client.chat.completions.create(
-                    model="gpt-4o",
-                    messages=[
-                        {"role": "system", "content": ANGEL_SYSTEM_PROMPT},
-                        {"role": "user", "content": question_prompt}
-                    ],
-                    temperature=0.7,
-                    max_tokens=500
-                )
-                
-                reply = response.choices[0].message.content
+                # Re-display the previous question from the catalog; only unknown tags need the model.
+                # Another worker may have asked it, so refill this session's wording from history first.
+                capture_questions_from_history(session_id, history)
+                reply = render_question(session_id, previous_tag)
+                if reply is None:
+                    from utils.prompt_builder import build_angel_messages, record_prompt_usage
+                    
+                    question_prompt = f"""
+                    The user wants to go back to the previous question.
+                    Please display question {previous_tag} again.
+                    Use the proper format with the [[Q:{previous_tag}]] tag.
+                    """
+                    
+                    response = await chat_completion(
+                        "angel_router.go_back_to_previous_question",
+                        model="gpt-4o",
+                        messages=build_angel_messages(
+                            {"role": "user", "content": question_prompt}
+                        ),
+                        temperature=0.7,
+                        max_tokens=500
+                    )
+                    record_prompt_usage("go_back", response.usage)
+                    
+                    reply = response.choices[0].message.content
                 
                 # Calculate progress
                 current_phase = updated_session.get("current_phase", "KYC")
@@ -597,10 +729,11 @@ async def get_artifact(session_id: str, artifact_type: str, request: Request):
     """Retrieve generated artifacts like business plans and roadmaps"""
     
     user_id = request.state.user["id"]
-    session = await get_session(session_id, user_id)
+    if artifact_type not in ARTIFACT_TYPES:
+        return {"success": False, "message": f"Unknown artifact type: {artifact_type}"}
     
     try:
-        artifact = await fetch_artifact(session_id, artifact_type)
+        artifact = await fetch_artifact(session_id, user_id, artifact_type)
         if not artifact:
             return {"success": False, "message": "Artifact not found"}
             
@@ -608,6 +741,8 @@ async def get_artifact(session_id: str, artifact_type: str, request: Request):
             "success": True,
             "result": {
                 "content": artifact["content"],
+                "data": artifact["result"],
+                "version": artifact["version"],
                 "created_at": artifact["created_at"],
                 "type": artifact_type
             }
@@ -615,6 +750,20 @@ async def get_artifact(session_id: str, artifact_type: str, request: Request):
     except Exception as e:
         return {"success": False, "message": f"Error retrieving artifact: {str(e)}"}
 
+@router.get("/sessions/{session_id}/artifacts/{artifact_type}/versions")
+async def get_artifact_versions(session_id: str, artifact_type: str, request: Request):
+    """List stored versions of an artifact, newest first"""
+    
+    user_id = request.state.user["id"]
+    if artifact_type not in ARTIFACT_TYPES:
+        return {"success": False, "message": f"Unknown artifact type: {artifact_type}"}
+    
+    try:
+        versions = await list_artifact_versions(session_id, user_id, artifact_type)
+        return {"success": True, "result": versions}
+    except Exception as e:
+        return {"success": False, "message": f"Error retrieving artifact versions: {str(e)}"}
+
 @router.post("/sessions/{session_id}/navigate")
 async def navigate_to_question(session_id: str, request: Request, payload: dict):
     """Allow navigation back to previous questions for modifications"""
@@ -641,8 +790,24 @@ async def navigate_to_question(session_id: str, request: Request, payload: dict)
     
     # Get the question text for the target tag
     history = await fetch_chat_history(session_id)
+    capture_questions_from_history(session_id, history)
+    
+    question = render_question(session_id, target_tag)
+    if question is not None:
+        previous_answer = find_previous_answer(history, target_tag)
+        if previous_answer:
+            question += f"\n\nYour previous answer: {previous_answer}"
+        return {
+            "success": True,
+            "message": "Navigated to previous question",
+            "result": {
+                "question": clean_reply_for_display(question),
+                "current_tag": target_tag,
+                "phase": session["current_phase"]
+            }
+        }
     
-    # Generate response for the target question
+    # ROADMAP/IMPLEMENTATION tags have no catalog entry - generate the response
     navigation_prompt = f"The user wants to revisit and potentially modify their answer to question {target_tag}. Please re-present this question and their previous answer if available."
     
     session_context = {
@@ -670,48 +835,40 @@ async def navigate_to_question(session_id: str, request: Request, payload: dict)
         }
     }
 
-# Database helper functions for artifacts and enhanced session management
-
-async def save_artifact(session_id: str, artifact_type: str, content: str):
-    """Save generated artifacts to database"""
-    # Implementation depends on your database structure
-    # This is a placeholder for the database operation
-    pass
-
-async def fetch_artifact(session_id: str, artifact_type: str):
-    """Fetch artifact from database"""
-    # Implementation depends on your database structure
-    # This is a placeholder for the database operation
-    pass
+def artifact_metadata(artifact, cached):
+    """Version info returned next to a generated or stored artifact"""
+    if not artifact:
+        return {"cached": cached}
+    return {"cached": cached, "version": artifact["version"], "input_hash": artifact["input_hash"], "created_at": artifact["created_at"]}
 
 # TOTALS_BY_PHASE is now defined in utils/progress.py
 
-@router.post("/sessions/{session_id}/generate-plan")
-async def generate_business_plan(request: Request, session_id: str):
+async def load_generation_inputs(session_id: str, user_id: str):
+    # Raises unless the session belongs to the caller, before any history is read
+    await get_session(session_id, user_id)
+    await report_job_progress("loading_history", 0.05)
     history = await fetch_chat_history(session_id)
-    history_trimmed = smart_trim_history(history)  
-    result = await generate_full_business_plan(history_trimmed) 
+    return smart_trim_history(history)
+
+async def build_business_plan_response(session_id: str, user_id: str):
+    history_trimmed = await load_generation_inputs(session_id, user_id)
+    result, artifact, cached = await get_or_generate_artifact(session_id, user_id, "business_plan", history_trimmed, generate_full_business_plan)
     return {
         "success": True,
         "message": "Business plan generated successfully",
         "result": result,
+        "artifact": artifact_metadata(artifact, cached),
     }
 
-@router.get("/sessions/{session_id}/business-plan-summary")
-async def get_business_plan_summary(request: Request, session_id: str):
-    """Generate comprehensive business plan summary for Plan to Roadmap Transition"""
-    user_id = request.state.user["id"]
-    session = await get_session(session_id, user_id)
-    
-    history = await fetch_chat_history(session_id)
-    history_trimmed = smart_trim_history(history)
-    
+async def build_business_plan_summary_response(session_id: str, user_id: str):
+    history_trimmed = await load_generation_inputs(session_id, user_id)
     try:
-        result = await generate_comprehensive_business_plan_summary(history_trimmed)
+        result, artifact, cached = await get_or_generate_artifact(session_id, user_id, "business_plan_summary", history_trimmed, generate_comprehensive_business_plan_summary)
         return {
             "success": True,
             "message": "Business plan summary generated successfully",
-            "result": result
+            "result": result,
+            "artifact": artifact_metadata(artifact, cached)
         }
     except Exception as e:
         return {
@@ -719,28 +876,21 @@ async def get_business_plan_summary(request: Request, session_id: str):
             "message": f"Error generating business plan summary: {str(e)}"
     }
 
-@router.get("/sessions/{session_id}/roadmap-plan")
-async def generate_roadmap_plan(session_id: str, request: Request):
-    history = await fetch_chat_history(session_id)
-    history_trimmed = smart_trim_history(history)
-    roadmap = await generate_full_roadmap_plan(history_trimmed)
+async def build_roadmap_response(session_id: str, user_id: str):
+    history_trimmed = await load_generation_inputs(session_id, user_id)
+    roadmap, artifact, cached = await get_or_generate_artifact(session_id, user_id, "roadmap", history_trimmed, generate_full_roadmap_plan)
     return {
         "success": True,
-        "result": roadmap
+        "result": roadmap,
+        "artifact": artifact_metadata(artifact, cached)
     }
 
-@router.get("/sessions/{session_id}/enhanced-roadmap")
-async def generate_enhanced_roadmap(session_id: str, request: Request):
-    """Generate enhanced roadmap with comprehensive summary, execution advice, and motivational elements"""
-    user_id = request.state.user["id"]
-    session = await get_session(session_id, user_id)
-    
-    history = await fetch_chat_history(session_id)
-    history_trimmed = smart_trim_history(history)
+async def build_enhanced_roadmap_response(session_id: str, user_id: str):
+    history_trimmed = await load_generation_inputs(session_id, user_id)
     
     try:
         # Generate the enhanced roadmap with all new features
-        roadmap_result = await generate_full_roadmap_plan(history_trimmed)
+        roadmap_result, artifact, cached = await get_or_generate_artifact(session_id, user_id, "roadmap", history_trimmed, generate_full_roadmap_plan)
         
         # Add additional metadata for the enhanced UI
         enhanced_result = {
@@ -765,7 +915,8 @@ async def generate_enhanced_roadmap(session_id: str, request: Request):
         return {
             "success": True,
             "message": "Enhanced roadmap generated successfully with comprehensive features",
-            "result": enhanced_result
+            "result": enhanced_result,
+            "artifact": artifact_metadata(artifact, cached)
         }
     except Exception as e:
         return {
@@ -773,6 +924,103 @@ async def generate_enhanced_roadmap(session_id: str, request: Request):
             "message": f"Error generating enhanced roadmap: {str(e)}"
         }
 
+# Generation endpoints that can run as background jobs (?background=true), by job payload "response"
+GENERATION_RESPONSE_BUILDERS = {
+    "business_plan": build_business_plan_response,
+    "business_plan_summary": build_business_plan_summary_response,
+    "roadmap": build_roadmap_response,
+    "enhanced_roadmap": build_enhanced_roadmap_response,
+}
+
+async def run_generation_job(payload: dict):
+    builder = GENERATION_RESPONSE_BUILDERS[payload["response"]]
+    return await builder(payload["session_id"], payload["user_id"])
+
+register_job_handler("generation", run_generation_job)
+
+async def enqueue_generation(session_id: str, user_id: str, response: str):
+    """Queue a generation endpoint's work and answer 202 with the job to poll"""
+    # Refuse other users' sessions now rather than in a failed job
+    await get_session(session_id, user_id)
+    job_id = await enqueue_job("generation", {"session_id": session_id, "user_id": user_id, "response": response}, user_id=user_id, session_id=session_id)
+    return JSONResponse(status_code=202, content={
+        "success": True,
+        "message": "Generation queued",
+        "job_id": job_id,
+        "status_url": f"/angel/jobs/{job_id}",
+        "events_url": f"/angel/jobs/{job_id}/events"
+    })
+
+@router.post("/sessions/{session_id}/generate-plan")
+async def generate_business_plan(request: Request, session_id: str, background: bool = False):
+    user_id = request.state.user["id"]
+    if background:
+        return await enqueue_generation(session_id, user_id, "business_plan")
+    return await build_business_plan_response(session_id, user_id)
+
+@router.get("/sessions/{session_id}/business-plan-summary")
+async def get_business_plan_summary(request: Request, session_id: str, background: bool = False):
+    """Generate comprehensive business plan summary for Plan to Roadmap Transition"""
+    user_id = request.state.user["id"]
+    if background:
+        return await enqueue_generation(session_id, user_id, "business_plan_summary")
+    return await build_business_plan_summary_response(session_id, user_id)
+
+@router.get("/sessions/{session_id}/roadmap-plan")
+async def generate_roadmap_plan(session_id: str, request: Request, background: bool = False):
+    user_id = request.state.user["id"]
+    if background:
+        return await enqueue_generation(session_id, user_id, "roadmap")
+    return await build_roadmap_response(session_id, user_id)
+
+@router.get("/sessions/{session_id}/enhanced-roadmap")
+async def generate_enhanced_roadmap(session_id: str, request: Request, background: bool = False):
+    """Generate enhanced roadmap with comprehensive summary, execution advice, and motivational elements"""
+    user_id = request.state.user["id"]
+    if background:
+        return await enqueue_generation(session_id, user_id, "enhanced_roadmap")
+    return await build_enhanced_roadmap_response(session_id, user_id)
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(job_id: str, request: Request):
+    """Status, stage and (once finished) result of a background job"""
+    job = await get_job(job_id)
+    if not job or job["user_id"] != request.state.user["id"]:
+        return JSONResponse(status_code=404, content={"success": False, "message": "Job not found"})
+    return {"success": True, "result": public_job_view(job)}
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request):
+    """Server-Sent Events for a background job: a `progress` event on every stage change, then `done` or `failed`"""
+    job = await get_job(job_id)
+    if not job or job["user_id"] != request.state.user["id"]:
+        return JSONResponse(status_code=404, content={"success": False, "message": "Job not found"})
+
+    async def event_stream():
+        last_seen = None
+        while True:
+            current = await get_job(job_id)
+            view = public_job_view(current)
+            if current["status"] == "succeeded":
+                yield format_sse("done", view)
+                return
+            if current["status"] == "failed":
+                yield format_sse("failed", view)
+                return
+            state = (view["status"], view["stage"], view["progress"])
+            if state != last_seen:
+                last_seen = state
+                yield format_sse("progress", view)
+            if await request.is_disconnected():
+                return
+            await asyncio.sleep(JOB_EVENTS_POLL_INTERVAL)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/sessions/{session_id}/modify-roadmap")
 async def modify_roadmap(session_id: str, request: Request):
     """Modify the roadmap content with user edits"""
@@ -16,6 +16,7 @@ from services.deep_research_training_service import deep_research_training_manag
 from middlewares.auth import verify_auth_token
 from datetime import datetime
 import json
+from utils.llm_gateway import chat_completion
 
 router = APIRouter(
     tags=["Appendices Integration"],
@@ -409,10 +410,9 @@ async def execute_interactive_command(session_id: str, request: Request, command
             
         elif command == "draft":
             # Generate documents
-            from openai import AsyncOpenAI
-            client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
             
-            response = await client.chat.completions.create(
+            response = await chat_completion(
+                "appendices_router.execute_interactive_command",
                 model="gpt-4o",
                 messages=[{"role": "user", "content": f"Draft: {context.get('document_type', 'business document')}"}],
                 temperature=0.3,
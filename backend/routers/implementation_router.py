@@ -4,7 +4,8 @@ from services.implementation_task_manager import ImplementationTaskManager
 from services.specialized_agents_service import agents_manager
 from services.rag_service import conduct_rag_research, validate_with_rag
 from services.service_provider_tables_service import generate_provider_table, get_task_providers
-from services.session_service import get_session
+from services.session_service import get_session, patch_session
+from services.business_context_service import get_business_context, is_maintained
 from services.chat_service import fetch_chat_history
 from middlewares.auth import verify_auth_token
 import json
@@ -12,6 +13,7 @@ import os
 import uuid
 from datetime import datetime
 import random
+from utils.llm_gateway import chat_completion
 
 router = APIRouter(
     tags=["Implementation"],
@@ -139,53 +141,20 @@ async def get_current_implementation_task(session_id: str, request: Request):
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
         
-        # Extract business context from session data (if available)
+        # Business context is maintained on the session as answers arrive; older sessions are backfilled from history
+        business_context = session.get("business_context")
+        if not is_maintained(business_context):
+            print(f"📊 Session has no maintained business context - backfilling from chat history")
+            business_context = get_business_context(session, await fetch_chat_history(session_id))
+            await patch_session(session_id, {"business_context": business_context})
+        
         session_data = {
-            "business_name": session.get("business_name"),
-            "industry": session.get("industry"),
-            "location": session.get("location"),
-            "business_type": session.get("business_type")
+            "business_name": business_context.get("business_name"),
+            "industry": business_context.get("industry"),
+            "location": business_context.get("location"),
+            "business_type": business_context.get("business_type")
         }
         
-        # If session data doesn't have business context, extract from chat history
-        if not session_data.get("business_name") or not session_data.get("industry"):
-            print(f"📊 Session data missing business context - extracting from chat history")
-            history = await fetch_chat_history(session_id)
-            
-            # Simple extraction from chat history
-            for msg in history:
-                if msg.get('role') == 'user':
-                    content = msg.get('content', '')
-                    content_lower = content.lower()
-                    
-                    # Extract domain business name
-                    if ('.com' in content or '.net' in content or '.org' in content) and len(content) < 100:
-                        session_data["business_name"] = content.strip()
-                    
-                    # Extract location (common city names)
-                    cities = ['karachi', 'lahore', 'islamabad', 'san francisco', 'new york', 'london', 'dubai']
-                    for city in cities:
-                        if city in content_lower:
-                            session_data["location"] = city.title()
-                            break
-                    
-                    # Extract business structure
-                    structures = ['llc', 'corporation', 'partnership', 'private limited']
-                    for structure in structures:
-                        if structure in content_lower:
-                            session_data["business_type"] = structure.upper()
-                            break
-                    
-                    # Extract industry
-                    industries = {'beverage': ['beverage', 'drink', 'coke', 'soda'], 
-                                'food': ['food', 'restaurant', 'cafe'],
-                                'technology': ['tech', 'software', 'app', 'platform'],
-                                'retail': ['retail', 'store', 'shop', 'marketplace']}
-                    for industry, keywords in industries.items():
-                        if any(keyword in content_lower for keyword in keywords):
-                            session_data["industry"] = industry.title()
-                            break
-        
         # Apply defaults if still missing
         session_data["business_name"] = session_data.get("business_name") or "Your Business"
         session_data["industry"] = session_data.get("industry") or "General Business"
@@ -292,10 +261,8 @@ async def complete_implementation_task(
         Format as constructive feedback to help the user succeed.
         """
         
-        from openai import AsyncOpenAI
-        client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        
-        response = await client.chat.completions.create(
+        response = await chat_completion(
+            "implementation_router.complete_implementation_task",
             model="gpt-4o",
             messages=[{"role": "user", "content": feedback_prompt}],
             temperature=0.3,
@@ -377,10 +344,8 @@ async def get_implementation_help(
         Format as clear, actionable guidance that helps the user succeed.
         """
         
-        from openai import AsyncOpenAI
-        client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        
-        response = await client.chat.completions.create(
+        response = await chat_completion(
+            "implementation_router.get_implementation_help",
             model="gpt-4o",
             messages=[{"role": "user", "content": help_prompt}],
             temperature=0.3,
@@ -450,10 +415,8 @@ async def get_implementation_kickstart(session_id: str, task_id: str, request: R
         Format as structured plan with clear action items.
         """
         
-        from openai import AsyncOpenAI
-        client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        
-        response = await client.chat.completions.create(
+        response = await chat_completion(
+            "implementation_router.get_implementation_kickstart",
             model="gpt-4o",
             messages=[{"role": "user", "content": kickstart_prompt}],
             temperature=0.3,
@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Request, HTTPException, Depends
 from typing import Dict
 from datetime import datetime
-from services.angel_service import client, ANGEL_SYSTEM_PROMPT
+from utils.prompt_builder import build_angel_messages, record_prompt_usage
 from services.session_service import get_session
 from services.chat_service import save_chat_message
 from middlewares.auth import verify_auth_token
+from utils.llm_gateway import chat_completion
 
 router = APIRouter(
     tags=["Roadmap Edit"],
@@ -50,15 +51,16 @@ async def regenerate_roadmap_section(session_id: str, request: Request, payload:
         Make it comprehensive, actionable, and tailored to their specific business context.
         """
         
-        response = await client.chat.completions.create(
+        response = await chat_completion(
+            "roadmap_edit_router.regenerate_roadmap_section",
             model="gpt-4o",
-            messages=[
-                {"role": "system", "content": ANGEL_SYSTEM_PROMPT},
+            messages=build_angel_messages(
                 {"role": "user", "content": regeneration_prompt}
-            ],
+            ),
             temperature=0.7,
             max_tokens=2000
         )
+        record_prompt_usage("roadmap_section", response.usage)
         
         regenerated_content = response.choices[0].message.content
         
@@ -7,14 +7,41 @@ from services.roadmap_to_implementation_service import (
     generate_implementation_insights
 )
 from middlewares.auth import verify_auth_token
+from utils.job_runner import enqueue_job, register_job_handler
 import json
 
 router = APIRouter()
 
+async def build_transition_response(session_data: dict, roadmap_content: str):
+    """Prepare the transition and build the endpoint's response body"""
+    transition_data = await prepare_implementation_transition(session_data, roadmap_content)
+    
+    if not transition_data["success"]:
+        raise RuntimeError(transition_data.get("error", "Failed to prepare transition"))
+    
+    return {
+        "success": True,
+        "message": "Implementation transition prepared successfully",
+        "result": {
+            "transition_phase": "ROADMAP_TO_IMPLEMENTATION_TRANSITION",
+            "motivational_quote": transition_data["motivational_quote"],
+            "service_providers": transition_data["service_providers"],
+            "implementation_insights": transition_data["implementation_insights"],
+            "business_context": transition_data["business_context"],
+            "reply": f"🚀 **Roadmap to Implementation Transition** 🚀\n\nCongratulations! You've successfully completed your comprehensive business plan and detailed launch roadmap for \"{session_data['business_name']}\". Now it's time to transition from planning into execution mode.\n\n**\"{transition_data['motivational_quote']['quote']}\"** – {transition_data['motivational_quote']['author']}\n\n---\n\n## 🎯 **Time to Transition from Planning to Action**\n\nYou've built a solid foundation with your business plan and roadmap. The time has come to transition from planning into execution mode. This is where your entrepreneurial journey truly begins to take shape.\n\n*This implementation process is tailored specifically to your \"{session_data['business_name']}\" business in the {session_data['industry']} industry, located in {session_data['location']}. Every recommendation is designed to help you build the business of your dreams.*"
+        }
+    }
+
+async def run_transition_job(payload: dict):
+    return await build_transition_response(payload["session_data"], payload["roadmap_content"])
+
+register_job_handler("implementation_transition", run_transition_job)
+
 @router.post("/sessions/{session_id}/roadmap-to-implementation-transition")
 async def create_roadmap_to_implementation_transition(
     session_id: str,
     request: Request,
+    background: bool = False,
     current_user: dict = Depends(verify_auth_token)
 ):
     """Create comprehensive roadmap to implementation transition"""
@@ -33,24 +60,24 @@ async def create_roadmap_to_implementation_transition(
         # Get roadmap content (this would typically come from your roadmap storage)
         roadmap_content = body.get("roadmap_content", "Roadmap content not available")
         
-        # Prepare the transition
-        transition_data = await prepare_implementation_transition(session_data, roadmap_content)
-        
-        if not transition_data["success"]:
-            raise HTTPException(status_code=500, detail=transition_data.get("error", "Failed to prepare transition"))
+        if background:
+            user_id = request.state.user["id"]
+            job_id = await enqueue_job(
+                "implementation_transition",
+                {"session_data": session_data, "roadmap_content": roadmap_content},
+                user_id=user_id,
+                session_id=session_id
+            )
+            return JSONResponse(status_code=202, content={
+                "success": True,
+                "message": "Implementation transition queued",
+                "job_id": job_id,
+                "status_url": f"/angel/jobs/{job_id}",
+                "events_url": f"/angel/jobs/{job_id}/events"
+            })
         
-        return JSONResponse(content={
-            "success": True,
-            "message": "Implementation transition prepared successfully",
-            "result": {
-                "transition_phase": "ROADMAP_TO_IMPLEMENTATION_TRANSITION",
-                "motivational_quote": transition_data["motivational_quote"],
-                "service_providers": transition_data["service_providers"],
-                "implementation_insights": transition_data["implementation_insights"],
-                "business_context": transition_data["business_context"],
-                "reply": f"🚀 **Roadmap to Implementation Transition** 🚀\n\nCongratulations! You've successfully completed your comprehensive business plan and detailed launch roadmap for \"{session_data['business_name']}\". Now it's time to transition from planning into execution mode.\n\n**\"{transition_data['motivational_quote']['quote']}\"** – {transition_data['motivational_quote']['author']}\n\n---\n\n## 🎯 **Time to Transition from Planning to Action**\n\nYou've built a solid foundation with your business plan and roadmap. The time has come to transition from planning into execution mode. This is where your entrepreneurial journey truly begins to take shape.\n\n*This implementation process is tailored specifically to your \"{session_data['business_name']}\" business in the {session_data['industry']} industry, located in {session_data['location']}. Every recommendation is designed to help you build the business of your dreams.*"
-            }
-        })
+        # Prepare the transition
+        return JSONResponse(content=await build_transition_response(session_data, roadmap_content))
         
     except Exception as e:
         print(f"Error in roadmap to implementation transition: {e}")
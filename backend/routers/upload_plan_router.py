@@ -1,13 +1,17 @@
 from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Request
 from fastapi.responses import JSONResponse
 from middlewares.auth import verify_auth_token
-from services.upload_plan_service import process_uploaded_plan, extract_business_info_from_plan
+from services.upload_plan_service import process_uploaded_plan, extract_business_info_with_confidence, SUPPORTED_PLAN_EXTENSIONS
+import io
 import os
-import uuid
-import tempfile
 
 router = APIRouter()
 
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(10 * 1024 * 1024)))  # 10MB
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Whole request body cap (file plus multipart framing), enforced by BodySizeLimitMiddleware before spooling
+MAX_UPLOAD_BODY_SIZE = MAX_UPLOAD_SIZE + 64 * 1024
+
 @router.post("/")
 async def upload_business_plan(
     request: Request,
@@ -21,38 +25,24 @@ async def upload_business_plan(
     
     Endpoint: POST /upload-plan (router prefix + "/" = /upload-plan)
     """
-    temp_file_path = None
-    
     try:
         # Validate file type
-        allowed_extensions = ['.pdf', '.docx', '.txt']
         file_extension = os.path.splitext(file.filename)[1].lower()
         
-        if file_extension not in allowed_extensions:
+        if file_extension not in SUPPORTED_PLAN_EXTENSIONS:
             raise HTTPException(
                 status_code=400, 
-                detail=f"Unsupported file type. Please upload: {', '.join(allowed_extensions)}"
+                detail=f"Unsupported file type. Please upload: {', '.join(SUPPORTED_PLAN_EXTENSIONS)}"
             )
         
-        # Validate file size (max 10MB)
-        max_size = 10 * 1024 * 1024  # 10MB
-        file_content = await file.read()
-        if len(file_content) > max_size:
-            raise HTTPException(
-                status_code=400,
-                detail="File too large. Maximum size is 10MB."
-            )
-        
-        # Create a temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as temp_file:
-            temp_file.write(file_content)
-            temp_file_path = temp_file.name
+        # The request body was capped before spooling; this enforces the exact file size
+        file_content = await read_upload_capped(file, MAX_UPLOAD_SIZE)
         
         # Process the uploaded plan
-        processed_content = await process_uploaded_plan(temp_file_path, file_extension)
+        processed_content = await process_uploaded_plan(file_content, file_extension)
         
         # Extract business information
-        business_info = await extract_business_info_from_plan(processed_content)
+        business_info, field_confidence = await extract_business_info_with_confidence(processed_content)
         
         # Return the extracted business info to frontend
         # Frontend will update the session with this data
@@ -60,6 +50,7 @@ async def upload_business_plan(
             "success": True,
             "message": "Business plan processed successfully!",
             "business_info": business_info,
+            "field_confidence": field_confidence,
             "content_preview": processed_content[:500] + "..." if len(processed_content) > 500 else processed_content
         })
                 
@@ -68,13 +59,21 @@ async def upload_business_plan(
     except Exception as e:
         print(f"Error uploading business plan: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to process business plan: {str(e)}")
-    finally:
-        # Clean up temporary file
-        if temp_file_path and os.path.exists(temp_file_path):
-            try:
-                os.remove(temp_file_path)
-            except:
-                pass  # Ignore cleanup errors
+
+async def read_upload_capped(file: UploadFile, max_size: int) -> bytes:
+    """Copy the spooled upload into memory in chunks, rejecting it once it exceeds max_size"""
+    if file.size is not None and file.size > max_size:
+        raise HTTPException(status_code=400, detail=f"File too large. Maximum size is {max_size // (1024 * 1024)}MB.")
+    
+    buffer = io.BytesIO()
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        if buffer.tell() + len(chunk) > max_size:
+            raise HTTPException(status_code=400, detail=f"File too large. Maximum size is {max_size // (1024 * 1024)}MB.")
+        buffer.write(chunk)
+    return buffer.getvalue()
 
 # No additional endpoints needed - upload plan is a simple one-time extraction
 # Frontend handles applying the extracted business_info to the session
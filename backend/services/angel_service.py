@@ -1,52 +1,18 @@
-from openai import AsyncOpenAI
 import os
 import json
 import re
 from datetime import datetime
-from utils.constant import ANGEL_SYSTEM_PROMPT
-
-client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-# pkpalstan
-# Web search throttling
-web_search_count = 0
-web_search_reset_time = datetime.now()
-
-def should_conduct_web_search():
-    """Throttle web searches to prevent excessive API calls"""
-    global web_search_count, web_search_reset_time
-    
-    # Reset counter every 10 seconds for faster reset during implementation
-    if (datetime.now() - web_search_reset_time).seconds > 10:
-        web_search_count = 0
-        web_search_reset_time = datetime.now()
-    
-    # Allow maximum 2 web searches per 10 seconds for better performance
-    if web_search_count >= 2:
-        return False
-    
-    web_search_count += 1
-    return True
-
-TAG_PROMPT = """CRITICAL: You MUST include a machine-readable tag in EVERY response that contains a question. Use this exact format:
-[[Q:<PHASE>.<NN>]] 
-
-Examples:
-- [[Q:KYC.01]] What's your name?
-- [[Q:KYC.02]] What is your preferred communication style?
-- [[Q:BUSINESS_PLAN.01]] What is your business idea?
-- [[Q:BUSINESS_PLAN.19]] What is your revenue model?
-- [[Q:BUSINESS_PLAN.20]] How will you market your business?
-
-IMPORTANT RULES:
-1. The tag must be at the beginning of your question, before any other text
-2. Question numbers must be sequential and correct for the current phase
-3. For BUSINESS_PLAN phase, questions should be numbered 01 through 46
-4. NEVER jump backwards in question numbers (e.g., from 19 to 10)
-5. If you're continuing a conversation, increment the question number appropriately
-
-FAILURE TO INCLUDE CORRECT TAGS WILL BREAK THE SYSTEM. ALWAYS include the correct sequential tag before asking any question.
-
-FORMATTING REQUIREMENT: Always use structured format for questions - NEVER paragraph format!"""
+from utils.context_window import build_context_window
+from utils.prompt_builder import build_angel_messages, prefix_sections, record_prompt_usage
+from utils.research_executor import run_research
+from utils.research_cache import ResearchCache, make_cache_key
+from utils.single_flight import SingleFlight
+from utils.rate_limiter import get_rate_limiter, RateLimitExceeded
+from services.question_catalog import render_question
+from services.speculative_drafts import run_command, schedule_speculations
+from services.business_context_service import get_business_context
+from utils.llm_gateway import chat_completion, stream_chat_completion
+from utils.request_timing import timed
 
 WEB_SEARCH_PROMPT = """You have access to web search capabilities, but use them VERY SPARINGLY during Implementation phase.
 
@@ -237,6 +203,25 @@ async def should_show_accept_modify_buttons(ai_response: str, user_last_input: s
         "content_length": len(ai_response)
     }
 
+# Web search model parameters; part of the coalescing/cache key
+WEB_SEARCH_MODEL = "gpt-4o"  # Use full model for better research
+WEB_SEARCH_TEMPERATURE = 0.2  # Lower temperature for factual accuracy
+WEB_SEARCH_MAX_TOKENS = 800  # Increased for comprehensive research
+# Seconds a search result is reused for the same normalized prompt
+WEB_SEARCH_CACHE_TTL = float(os.getenv("WEB_SEARCH_CACHE_TTL", "3600"))
+
+# Longest a search waits in the web_search rate limiter queue before it is skipped
+WEB_SEARCH_MAX_WAIT = float(os.getenv("WEB_SEARCH_MAX_WAIT", "5"))
+
+web_search_cache = ResearchCache("web_search", WEB_SEARCH_CACHE_TTL)
+# Identical searches already in flight (e.g. several founders in one industry) share one call
+web_search_flights = SingleFlight("web_search")
+
+def normalize_search_prompt(prompt: str) -> str:
+    """Case and whitespace differences should not produce separate searches"""
+    return " ".join(prompt.lower().split())
+
+@timed("web_search")
 async def conduct_web_search(query):
     """Conduct aggressive web search with citations from authoritative sources"""
     try:
@@ -258,34 +243,43 @@ Provide a comprehensive answer with:
 
 Format your response with clear sections and citations."""
         
-        response = await client.chat.completions.create(
-            model="gpt-4o",  # Use full model for better research
-            messages=[{
-                "role": "user", 
-                "content": search_prompt
-            }],
-            temperature=0.2,  # Lower temperature for factual accuracy
-            max_tokens=800,  # Increased for comprehensive research
-            timeout=10.0  # Longer timeout for thorough research
-        )
+        cache_key = make_cache_key(normalize_search_prompt(search_prompt), WEB_SEARCH_MODEL, WEB_SEARCH_TEMPERATURE, WEB_SEARCH_MAX_TOKENS)
+        cached_results = await web_search_cache.get(cache_key)
+        if cached_results is not None:
+            print(f"📋 Using cached web search for: {query[:50]}...")
+            return cached_results
+        
+        async def search():
+            # Per-user/session/global search budget (coalesced duplicates do not spend it)
+            await get_rate_limiter("web_search").acquire(WEB_SEARCH_MAX_WAIT)
+            response = await chat_completion(
+                "angel_service.conduct_web_search",
+                model=WEB_SEARCH_MODEL,
+                messages=[{
+                    "role": "user", 
+                    "content": search_prompt
+                }],
+                temperature=WEB_SEARCH_TEMPERATURE,
+                max_tokens=WEB_SEARCH_MAX_TOKENS,
+                timeout=10.0  # Longer timeout for thorough research
+            )
+            results = response.choices[0].message.content
+            if results:
+                await web_search_cache.set(cache_key, results)
+            return results
         
         # Extract search results from response
-        search_results = response.choices[0].message.content
-        print(f"✅ Web search completed for: {query[:50]}... (length: {len(search_results)} chars)")
+        search_results = await web_search_flights.do(cache_key, search)
+        print(f"✅ Web search completed for: {query[:50]}... (length: {len(search_results or '')} chars)")
         return search_results
     
+    except RateLimitExceeded as e:
+        print(f"⏳ Web search skipped: {e}")
+        return None
     except Exception as e:
         print(f"❌ Web search error: {e}")
         return None
 
-def trim_conversation_history(history, max_messages=10):
-    """Trim conversation history to prevent context from growing too large"""
-    if len(history) <= max_messages:
-        return history
-    
-    # Keep the most recent messages
-    return history[-max_messages:]
-
 def format_response_structure(reply):
     """Format AI responses to use proper structured format instead of paragraph form"""
     
@@ -612,6 +606,40 @@ def check_for_section_summary(current_tag, session_data, history):
     
     return None
 
+def build_section_summary_instruction(section_summary_info):
+    """System instruction that makes the model answer with the section summary instead of the next question"""
+    return f"""
+IMPORTANT: You have just completed {section_summary_info['section_name']} section. 
+You MUST provide a comprehensive section summary that includes:
+
+1. **Summary**: Recap the key information provided in this section
+2. **Educational Insights**: Provide valuable insights about this business area
+3. **Critical Considerations**: Highlight important watchouts and considerations for this business type
+4. **Verification Request**: Ask user to verify the information before proceeding
+
+Use this EXACT format:
+"🎯 **{section_summary_info['section_name']} Section Complete**
+
+**Summary of Your Information:**
+[Recap key points from this section]
+
+**Educational Insights:**
+[Provide valuable business insights related to this section]
+
+**Critical Considerations:**
+[Highlight important watchouts and things to consider]
+
+**Ready to Continue?**
+Please confirm that this information is accurate before we move to the next section. You can either accept this summary and continue, or let me know what you'd like to modify.
+
+[[ACCEPT_MODIFY_BUTTONS]]"
+
+CRITICAL: 
+- End your response with [[ACCEPT_MODIFY_BUTTONS]] to trigger the Accept/Modify buttons
+- Do NOT ask the next question immediately
+- Do NOT include any question tags like [[Q:BUSINESS_PLAN.XX]] in this response
+"""
+
 def get_section_name(question_num):
     """Get the section name based on question number"""
     section_names = {
@@ -1080,7 +1108,8 @@ async def generate_business_plan_summary(session_data, history):
     """
     
     try:
-        response = await client.chat.completions.create(
+        response = await chat_completion(
+            "angel_service.generate_business_plan_summary",
             model="gpt-4o",
             messages=[{"role": "user", "content": summary_prompt}],
             temperature=0.6,
@@ -1372,7 +1401,12 @@ Let's continue with the current business planning question.""",
     
     return None
 
-async def get_angel_reply(user_msg, history, session_data=None):
+async def prepare_angel_turn(user_msg, history, session_data=None):
+    """Run validations, commands and research for a chat turn and build the completion messages.
+
+    Returns (early_response, None) when the turn is answered without the main completion,
+    otherwise (None, turn) where turn carries everything finalize_angel_reply needs.
+    """
     import time
     start_time = time.time()
     
@@ -1384,7 +1418,7 @@ async def get_angel_reply(user_msg, history, session_data=None):
     # Validate that user is not trying to skip questions
     validation_result = validate_question_answer(user_msg, session_data, history)
     if validation_result:
-        return validation_result
+        return validation_result, None
     
     # Debug logging for session state
     if session_data:
@@ -1394,7 +1428,7 @@ async def get_angel_reply(user_msg, history, session_data=None):
     session_validation = validate_session_state(session_data, history)
     if session_validation:
         print(f"🔍 DEBUG - Session validation triggered: {session_validation.get('reply', '')[:100]}...")
-        return session_validation
+        return session_validation, None
     
     # DISABLED: Critiquing feedback was too aggressive and causing false positives
     # Words like "faster" in "scale faster" were triggering unrealistic assumptions check
@@ -1483,12 +1517,17 @@ Do NOT include question numbers, progress percentages, or step counts in your re
                 "web_search_status": {"is_searching": False, "query": None},
                 "immediate_response": None,
                 "patch_session": None
-            }
+            }, None
         
         # If we're in BUSINESS_PLAN phase, continue with current question
         elif current_phase == "BUSINESS_PLAN":
             current_tag = session_data.get("asked_q", "BUSINESS_PLAN.01")
             if current_tag and current_tag.startswith("BUSINESS_PLAN."):
+                # Page refresh re-displays the current question from the catalog
+                question = render_question(session_data.get("id"), current_tag)
+                if question is not None:
+                    return question, None
+                
                 # Generate the current question
                 question_prompt = f"""
                 Generate the business plan question for tag: {current_tag}
@@ -1500,19 +1539,20 @@ Do NOT include question numbers, progress percentages, or step counts in your re
                 4. Provide context if this is a verification or continuation
                 """
                 
-                response = await client.chat.completions.create(
+                response = await chat_completion(
+                    "angel_service.prepare_angel_turn",
                     model="gpt-4o",
-                    messages=[
-                        {"role": "system", "content": ANGEL_SYSTEM_PROMPT},
-                        {"role": "system", "content": TAG_PROMPT},
+                    messages=build_angel_messages(
                         {"role": "system", "content": FORMATTING_INSTRUCTION},
-                        {"role": "user", "content": question_prompt}
-                    ],
+                        {"role": "user", "content": question_prompt},
+                        chat=True
+                    ),
                     temperature=0.7,
                     max_tokens=1000
                 )
+                record_prompt_usage("question_refresh", response.usage)
                 
-                return response.choices[0].message.content
+                return response.choices[0].message.content, None
         
         # Default to "hi" for KYC or initial phases
         user_msg["content"] = "hi"
@@ -1533,7 +1573,7 @@ Do NOT include question numbers, progress percentages, or step counts in your re
                     
                     print(f"🎯 User answered final KYC question ({question_num}) - triggering completion immediately BEFORE AI response")
                     # Trigger completion immediately after acknowledgment
-                    return await handle_kyc_completion(session_data, history)
+                    return await handle_kyc_completion(session_data, history), None
             except (ValueError, IndexError):
                 pass
     
@@ -1550,7 +1590,7 @@ Do NOT include question numbers, progress percentages, or step counts in your re
                     
                     print(f"🎯 User answered final Business Plan question ({question_num}) - triggering roadmap transition immediately")
                     # Trigger roadmap transition immediately
-                    return await handle_business_plan_completion(session_data, history)
+                    return await handle_business_plan_completion(session_data, history), None
             except (ValueError, IndexError):
                 pass
     
@@ -1607,13 +1647,13 @@ Do NOT include question numbers, progress percentages, or step counts in your re
         # ENHANCED COMPETITOR RESEARCH HANDLING
         if competitor_research_requested:
             # Extract business context for comprehensive competitor research
-            business_context = extract_business_context_from_history(history)
+            business_context = dict(get_business_context(session_data, history))
             if session_data:
+                # Explicit session fields (e.g. from navigate) take precedence over recorded answers
                 business_context.update({
-                    "industry": session_data.get("industry", ""),
-                    "location": session_data.get("location", ""),
-                    "business_name": session_data.get("business_name", ""),
-                    "business_type": session_data.get("business_type", "")
+                    field: session_data[field]
+                    for field in ("industry", "location", "business_name", "business_type")
+                    if session_data.get(field)
                 })
             
             # Conduct comprehensive competitor research
@@ -1665,24 +1705,24 @@ Do NOT include question numbers, progress percentages, or step counts in your re
         
         # Generate direct command response without AI
         if user_content.lower() == "draft":
-            reply_content = await handle_draft_command("", history, session_data)
+            reply_content = await run_command("draft", handle_draft_command, history, session_data)
         elif user_content.lower().startswith("scrapping:"):
             notes = user_content[10:].strip()
             scrapping_result = await handle_scrapping_command("", notes, history, session_data)
             # Add show_accept_modify for scrapping responses
             scrapping_result["show_accept_modify"] = True
             # Always return the scrapping result
-            return scrapping_result
+            return scrapping_result, None
         elif user_content.lower() in ["scrapping", "scraping"]:
             scrapping_result = await handle_scrapping_command("", "", history, session_data)
             # Add show_accept_modify for scrapping responses
             scrapping_result["show_accept_modify"] = True
             # Always return the scrapping result
-            return scrapping_result
+            return scrapping_result, None
         elif user_content.lower() == "support":
-            reply_content = await handle_support_command("", history, session_data)
+            reply_content = await run_command("support", handle_support_command, history, session_data)
         elif user_content.lower() == "draft more":
-            reply_content = await handle_draft_more_command("", history, session_data)
+            reply_content = await run_command("draft more", handle_draft_more_command, history, session_data)
         else:
             # Fallback to normal AI generation
             reply_content = "I understand you'd like to use a command. Please try again."
@@ -1694,32 +1734,39 @@ Do NOT include question numbers, progress percentages, or step counts in your re
             "web_search_status": {"is_searching": False, "query": None, "completed": False},
             "immediate_response": None,
             "show_accept_modify": True  # Always show buttons for Draft/Support/Scrapping
-        }
+        }, None
     
-    # Build messages for OpenAI - optimized for speed
-    msgs = [
-        {"role": "system", "content": ANGEL_SYSTEM_PROMPT},
-        {"role": "system", "content": TAG_PROMPT},
-        {"role": "system", "content": FORMATTING_INSTRUCTION}
+    # Decide on a section summary BEFORE generation so the turn needs a single completion
+    # (Check based on the PREVIOUS question that was just answered, not the next question)
+    # Don't show if user clicked Accept (they want to proceed from summary)
+    section_summary_info = None
+    if not is_accept_command and not is_command_response:
+        section_summary_info = check_for_section_summary(session_data.get("asked_q") if session_data else None, session_data, history)
+    
+    # Build prompt sections for OpenAI - packed into a token budget below
+    # Static prefix first so the provider's prompt cache can reuse it; per-user content follows
+    system_sections = prefix_sections(chat=True) + [
+        ("formatting_instruction", FORMATTING_INSTRUCTION)
     ]
+    optional_sections = []
     
     # Only add web search prompt if web search was conducted
     if search_results:
-        msgs.append({"role": "system", "content": WEB_SEARCH_PROMPT})
+        system_sections.append(("web_search_prompt", WEB_SEARCH_PROMPT))
     
     # Add search results and immediate response if available
     if search_results:
-        msgs.append({
-            "role": "system", 
-            "content": f"Web search results for your reference:\n{search_results}\n\nIntegrate relevant findings naturally into your response."
-        })
+        optional_sections.append((
+            "search_results",
+            f"Web search results for your reference:\n{search_results}\n\nIntegrate relevant findings naturally into your response."
+        ))
     
     # Add immediate response instruction if web search was conducted
     if immediate_response:
-        msgs.append({
-            "role": "system",
-            "content": f"IMPORTANT: The user has requested research and search results have been provided above. You MUST include the research findings in your response. Do not just acknowledge the research - provide the actual results and answer their question based on the search findings. The user expects to get the research results immediately, not just a notification that research is being conducted."
-        })
+        system_sections.append((
+            "research_instruction",
+            f"IMPORTANT: The user has requested research and search results have been provided above. You MUST include the research findings in your response. Do not just acknowledge the research - provide the actual results and answer their question based on the search findings. The user expects to get the research results immediately, not just a notification that research is being conducted."
+        ))
     
     # Add session context to help AI maintain state
     if session_data:
@@ -1765,155 +1812,174 @@ CRITICAL INSTRUCTIONS:
 14. Do NOT provide section summaries - just acknowledge answers briefly and wait for user confirmation
 
 """
-        msgs.append({"role": "system", "content": session_context})
+        system_sections.append(("session_context", session_context))
     
-    # Add conversation history (trimmed for performance) and current message
-    trimmed_history = trim_conversation_history(history, max_messages=10)
-    msgs.extend(trimmed_history)
-    msgs.append({"role": "user", "content": user_content})
+    # Section summary requirements go last so they override the per-question instructions
+    trailing_sections = []
+    if section_summary_info:
+        print(f"🎯 SECTION SUMMARY TRIGGERED for {section_summary_info['section_name']} at question {session_data.get('asked_q')}")
+        trailing_sections.append(("section_summary_instruction", build_section_summary_instruction(section_summary_info)))
+    
+    # Add conversation history and current message within the token budget
+    msgs, context_report = build_context_window(
+        system_sections,
+        history,
+        user_content,
+        optional_sections=optional_sections,
+        trailing_sections=trailing_sections,
+        max_history_messages=10
+    )
+    print(f"📊 Context window: {context_report['total']}/{context_report['budget']} tokens - {context_report}")
 
-    response = await client.chat.completions.create(
+    return None, {
+        "msgs": msgs,
+        "user_content": user_content,
+        "session_data": session_data,
+        "history": history,
+        "web_search_status": web_search_status,
+        "immediate_response": immediate_response,
+        "is_accept_command": is_accept_command,
+        "is_command_response": is_command_response,
+        "section_summary_info": section_summary_info,
+        "context_report": context_report,
+        "start_time": start_time
+    }
+
+async def get_angel_reply(user_msg, history, session_data=None):
+    early_response, turn = await prepare_angel_turn(user_msg, history, session_data)
+    if turn is None:
+        return early_response
+
+    response = await chat_completion(
+        "angel_service.get_angel_reply",
         model="gpt-4o",
-        messages=msgs,
+        messages=turn["msgs"],
         temperature=0.7,
         max_tokens=1000,  # Limit response length for faster processing
         stream=False  # Ensure non-streaming for consistent response times
     )
+    record_prompt_usage("angel_reply", response.usage)
 
-    reply_content = response.choices[0].message.content
-    
-    # Clean up extra newlines (keep "Question X of 46" format for Business Plan)
-    reply_content = re.sub(r'\n{3,}', '\n\n', reply_content)  # Clean up 3+ newlines to 2
-    
-    # Handle remaining commands (kickstart, contact) that weren't processed earlier
-    current_phase = session_data.get("current_phase", "") if session_data else ""
-    
-    if current_phase != "KYC":
-        # Only process remaining commands outside of KYC phase
-        if user_content.lower() == "kickstart":
-            reply_content = handle_kickstart_command(reply_content, history, session_data)
-        elif user_content.lower() == "who do i contact?":
-            reply_content = handle_contact_command(reply_content, history, session_data)
+    return await finalize_angel_reply(response.choices[0].message.content, turn)
+
+async def stream_angel_reply(user_msg, history, session_data=None):
+    """Stream an Angel reply as it is generated.
+
+    Yields {"type": "token", "content": ...} for each completion delta and finishes with
+    {"type": "final", "response": ...} carrying the same payload get_angel_reply returns.
+    Turns answered without the main completion (commands, completions, validations)
+    only yield the final event.
+    """
+    early_response, turn = await prepare_angel_turn(user_msg, history, session_data)
+    if turn is None:
+        yield {"type": "final", "response": early_response}
+        return
+
+    stream = stream_chat_completion(
+        "angel_service.stream_angel_reply",
+        model="gpt-4o",
+        messages=turn["msgs"],
+        temperature=0.7,
+        max_tokens=1000,
+        stream_options={"include_usage": True}
+    )
+
+    chunks = []
+    async for chunk in stream:
+        if chunk.usage:
+            record_prompt_usage("angel_reply_stream", chunk.usage)
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            chunks.append(delta)
+            yield {"type": "token", "content": delta}
+
+    # Post-processing passes need the full reply, so they run once on the completed text
+    response = await finalize_angel_reply("".join(chunks), turn)
+    yield {"type": "final", "response": response}
+
+@timed("post_processing")
+async def finalize_angel_reply(reply_content, turn):
+    """Apply tag injection, formatting passes and button detection to a generated reply"""
+    import time
+    user_content = turn["user_content"]
+    session_data = turn["session_data"]
+    history = turn["history"]
+    start_time = turn["start_time"]
     
-    # Inject missing tag if AI forgot to include one
-    reply_content = inject_missing_tag(reply_content, session_data)
+    # Section summary was decided before generation (see prepare_angel_turn), so this
+    # reply already is the summary - it must not move asked_q or get question post-processing
+    current_tag_before_update = session_data.get("asked_q") if session_data else None
+    section_summary_info = turn.get("section_summary_info")
+    patch_session = {}
     
-    # Check if AI response contains WEBSEARCH_QUERY (from scrapping command)
-    if "WEBSEARCH_QUERY:" in reply_content:
-        needs_web_search = True
-        web_search_query = reply_content.split("WEBSEARCH_QUERY:")[1].strip()
-        print(f"🔍 Web search triggered by AI response: {web_search_query}")
-        # Remove the WEBSEARCH_QUERY from the response
-        reply_content = reply_content.split("WEBSEARCH_QUERY:")[0].strip()
+    if section_summary_info:
+        # IMPORTANT: Clear any question tags from the summary response to prevent asked_q from updating
+        reply_content = re.sub(r'\[\[Q:[A-Z_]+\.\d+\]\]', '', reply_content)
+        print(f"🔒 Section summary generated - keeping asked_q at {current_tag_before_update} until user accepts")
+    else:
+        # Clean up extra newlines (keep "Question X of 46" format for Business Plan)
+        reply_content = re.sub(r'\n{3,}', '\n\n', reply_content)  # Clean up 3+ newlines to 2
     
-    # Format response structure to use proper list format instead of paragraph
-    reply_content = format_response_structure(reply_content)
+        # Handle remaining commands (kickstart, contact) that weren't processed earlier
+        current_phase = session_data.get("current_phase", "") if session_data else ""
     
-    # Ensure questions are properly separated
-    reply_content = ensure_question_separation(reply_content, session_data)
+        if current_phase != "KYC":
+            # Only process remaining commands outside of KYC phase
+            if user_content.lower() == "kickstart":
+                reply_content = handle_kickstart_command(reply_content, history, session_data)
+            elif user_content.lower() == "who do i contact?":
+                reply_content = handle_contact_command(reply_content, history, session_data)
     
-    # Check if we need to provide a section summary BEFORE updating asked_q
-    # (Check based on the PREVIOUS question that was just answered, not the next question)
-    current_tag_before_update = session_data.get("asked_q") if session_data else None
-    section_summary_info = None
+        # Inject missing tag if AI forgot to include one
+        reply_content = inject_missing_tag(reply_content, session_data)
     
-    # RE-ENABLED: Section summaries with proper timing to prevent question skipping
-    # Only show section summary if user just answered a section-ending question
-    # Don't show if user clicked Accept (they want to proceed from summary)
-    if not is_accept_command and not is_command_response:
-        # Check if we just completed a section-ending question
-        section_summary_info = check_for_section_summary(current_tag_before_update, session_data, history)
-    
-    # Extract question tag from reply and update session data BEFORE sequence validation
-    # IMPORTANT: Don't update asked_q if we're showing a section summary
-    patch_session = {}
-    tag_match = re.search(r'\[\[Q:([A-Z_]+\.\d+)\]\]', reply_content)
-    if tag_match and session_data and not section_summary_info:
-        new_question_tag = tag_match.group(1)
-        current_asked_q = session_data.get("asked_q", "")
+        # Check if AI response contains WEBSEARCH_QUERY (from scrapping command)
+        if "WEBSEARCH_QUERY:" in reply_content:
+            needs_web_search = True
+            web_search_query = reply_content.split("WEBSEARCH_QUERY:")[1].strip()
+            print(f"🔍 Web search triggered by AI response: {web_search_query}")
+            # Remove the WEBSEARCH_QUERY from the response
+            reply_content = reply_content.split("WEBSEARCH_QUERY:")[0].strip()
+    
+        # Format response structure to use proper list format instead of paragraph
+        reply_content = format_response_structure(reply_content)
+    
+        # Ensure questions are properly separated
+        reply_content = ensure_question_separation(reply_content, session_data)
+    
+        # Extract question tag from reply and update session data BEFORE sequence validation
+        # IMPORTANT: Don't update asked_q if we're showing a section summary
+        tag_match = re.search(r'\[\[Q:([A-Z_]+\.\d+)\]\]', reply_content)
+        if tag_match and session_data:
+            new_question_tag = tag_match.group(1)
+            current_asked_q = session_data.get("asked_q", "")
         
-        # Only update if this is a new question (not the same as current)
-        if new_question_tag != current_asked_q:
-            # Update session data immediately for sequence validation
-            session_data["asked_q"] = new_question_tag
-            patch_session["asked_q"] = new_question_tag
-            print(f"🔧 Updating session asked_q: {current_asked_q} → {new_question_tag}")
-    elif section_summary_info:
-        print(f"🔒 Section summary active - NOT updating asked_q (staying at {current_tag_before_update})")
+            # Only update if this is a new question (not the same as current)
+            if new_question_tag != current_asked_q:
+                # Update session data immediately for sequence validation
+                session_data["asked_q"] = new_question_tag
+                patch_session["asked_q"] = new_question_tag
+                print(f"🔧 Updating session asked_q: {current_asked_q} → {new_question_tag}")
     
-    # Validate business plan question sequence (now with updated session data)
-    reply_content = validate_business_plan_sequence(reply_content, session_data)
+        # Validate business plan question sequence (now with updated session data)
+        reply_content = validate_business_plan_sequence(reply_content, session_data)
     
-    # Fix verification flow to separate verification from next question
-    # reply_content = fix_verification_flow(reply_content, session_data)
+        # Fix verification flow to separate verification from next question
+        # reply_content = fix_verification_flow(reply_content, session_data)
     
-    # Prevent AI from molding user answers without verification
-    reply_content = prevent_ai_molding(reply_content, session_data)
+        # Prevent AI from molding user answers without verification
+        reply_content = prevent_ai_molding(reply_content, session_data)
     
-    # Add critiquing insights based on user's business field
-    reply_content = add_critiquing_insights(reply_content, session_data, user_content)
+        # Add critiquing insights based on user's business field
+        reply_content = add_critiquing_insights(reply_content, session_data, user_content)
     
-    # Suggest using Draft if user has already provided relevant information
-    reply_content = suggest_draft_if_relevant(reply_content, session_data, user_content, history)
+        # Suggest using Draft if user has already provided relevant information
+        reply_content = suggest_draft_if_relevant(reply_content, session_data, user_content, history)
     
-    # Add proactive support guidance based on identified areas needing help
-    reply_content = add_proactive_support_guidance(reply_content, session_data, history)
-    
-    if section_summary_info:
-        print(f"🎯 SECTION SUMMARY TRIGGERED for {section_summary_info['section_name']} at question {current_tag_before_update}")
-        
-        # CRITICAL: Don't let the question number increment during section summary
-        # The summary shows AFTER answering the last question of a section
-        # We stay on the same question number until user accepts the summary
-        
-        # Add section summary requirements to the system prompt
-        summary_instruction = f"""
-IMPORTANT: You have just completed {section_summary_info['section_name']} section. 
-You MUST provide a comprehensive section summary that includes:
-
-1. **Summary**: Recap the key information provided in this section
-2. **Educational Insights**: Provide valuable insights about this business area
-3. **Critical Considerations**: Highlight important watchouts and considerations for this business type
-4. **Verification Request**: Ask user to verify the information before proceeding
-
-Use this EXACT format:
-"🎯 **{section_summary_info['section_name']} Section Complete**
-
-**Summary of Your Information:**
-[Recap key points from this section]
-
-**Educational Insights:**
-[Provide valuable business insights related to this section]
-
-**Critical Considerations:**
-[Highlight important watchouts and things to consider]
-
-**Ready to Continue?**
-Please confirm that this information is accurate before we move to the next section. You can either accept this summary and continue, or let me know what you'd like to modify.
-
-[[ACCEPT_MODIFY_BUTTONS]]"
-
-CRITICAL: 
-- End your response with [[ACCEPT_MODIFY_BUTTONS]] to trigger the Accept/Modify buttons
-- Do NOT ask the next question immediately
-- Do NOT include any question tags like [[Q:BUSINESS_PLAN.XX]] in this response
-"""
-        # Add this instruction to the messages
-        msgs.append({"role": "system", "content": summary_instruction})
-        
-        # Regenerate the response with section summary
-        response = await client.chat.completions.create(
-            model="gpt-4o",
-            messages=msgs,
-            temperature=0.7,
-            max_tokens=1000,
-            stream=False
-        )
-        reply_content = response.choices[0].message.content
-        
-        # IMPORTANT: Clear any question tags from the summary response to prevent asked_q from updating
-        reply_content = re.sub(r'\[\[Q:[A-Z_]+\.\d+\]\]', '', reply_content)
-        print(f"🔒 Section summary generated - keeping asked_q at {current_tag_before_update} until user accepts")
+        # Add proactive support guidance based on identified areas needing help
+        reply_content = add_proactive_support_guidance(reply_content, session_data, history)
     
     # Ensure proper question formatting with line breaks and structure
     reply_content = ensure_proper_question_formatting(reply_content, session_data)
@@ -1931,8 +1997,8 @@ CRITICAL:
     
     return {
         "reply": reply_content,
-        "web_search_status": web_search_status,
-        "immediate_response": immediate_response,
+        "web_search_status": turn["web_search_status"],
+        "immediate_response": turn["immediate_response"],
         "patch_session": patch_session if patch_session else None,
         "show_accept_modify": button_detection.get("show_buttons", False)
     }
@@ -1941,7 +2007,7 @@ async def handle_draft_command(reply, history, session_data=None):
     """Handle the Draft command with research-backed comprehensive response generation"""
     # Extract context from conversation history
     context_summary = extract_conversation_context(history)
-    business_context = extract_business_context_from_history(history)
+    business_context = get_business_context(session_data, history)
     
     # Get current question context for more targeted responses
     current_question = get_current_question_context(history, session_data)
@@ -2152,7 +2218,8 @@ async def generate_draft_content(history, business_context, current_question="",
     """
     
     try:
-        response = await client.chat.completions.create(
+        response = await chat_completion(
+            "angel_service.generate_draft_content",
             model="gpt-4o",
             messages=[{"role": "user", "content": draft_prompt}],
             temperature=0.3,
@@ -2369,7 +2436,7 @@ async def handle_scrapping_command(reply, notes, history, session_data=None):
     print(f"🔍 DEBUG - Scrapping command called with notes: '{notes}'")
     
     # Extract business context from history for targeted research
-    business_context = extract_business_context_from_history(history)
+    business_context = get_business_context(session_data, history)
     
     # Get current question context for more targeted responses
     current_question = get_current_question_context(history, session_data)
@@ -2480,7 +2547,8 @@ async def refine_user_input(user_notes, business_context, current_question=""):
     """
     
     try:
-        response = await client.chat.completions.create(
+        response = await chat_completion(
+            "angel_service.refine_user_input",
             model="gpt-4o",
             messages=[{"role": "user", "content": refine_prompt}],
             temperature=0.3,
@@ -2605,7 +2673,8 @@ async def generate_scrapping_content(history, business_context, notes, current_q
     """
     
     try:
-        response = await client.chat.completions.create(
+        response = await chat_completion(
+            "angel_service.generate_scrapping_content",
             model="gpt-4o",
             messages=[{"role": "user", "content": scrapping_prompt}],
             temperature=0.3,
@@ -2643,7 +2712,7 @@ async def generate_scrapping_content(history, business_context, notes, current_q
 async def handle_support_command(reply, history, session_data=None):
     """Handle the Support command with aggressive web search research"""
     # Extract business context for verification
-    business_context = extract_business_context_from_history(history)
+    business_context = get_business_context(session_data, history)
     
     # Get current question context for more targeted responses
     current_question = get_current_question_context(history, session_data)
@@ -2783,7 +2852,8 @@ async def generate_support_content(history, business_context, current_question="
     """
     
     try:
-        response = await client.chat.completions.create(
+        response = await chat_completion(
+            "angel_service.generate_support_content",
             model="gpt-4o",
             messages=[{"role": "user", "content": support_prompt}],
             temperature=0.3,
@@ -2810,7 +2880,7 @@ Let me help you apply this to your specific situation in {location}. Consider ho
 async def handle_draft_more_command(reply, history, session_data=None):
     """Handle the Draft More command to create additional content"""
     # Extract business context for verification
-    business_context = extract_business_context_from_history(history)
+    business_context = get_business_context(session_data, history)
     
     # Get current question context for more targeted responses
     current_question = get_current_question_context(history, session_data)
@@ -2823,6 +2893,14 @@ async def handle_draft_more_command(reply, history, session_data=None):
     
     return draft_more_response
 
+def speculate_command_replies(session_id, session_data, history):
+    """Pre-generate Draft/Support replies for the question just asked (SPECULATIVE_DRAFTS)"""
+    schedule_speculations(session_id, session_data, history, {
+        "draft": handle_draft_command,
+        "support": handle_support_command,
+        "draft more": handle_draft_more_command,
+    })
+
 async def generate_additional_draft_content(history, business_context, current_question=""):
     """Generate additional draft content based on current question using AI"""
     business_name = business_context.get("business_name", "your business")
@@ -2890,7 +2968,8 @@ async def generate_additional_draft_content(history, business_context, current_q
     """
     
     try:
-        response = await client.chat.completions.create(
+        response = await chat_completion(
+            "angel_service.generate_additional_draft_content",
             model="gpt-4o",
             messages=[{"role": "user", "content": draft_more_prompt}],
             temperature=0.4,  # Slightly higher for more creativity
@@ -3205,19 +3284,20 @@ async def handle_competitor_research_request(user_input, business_context, histo
         research_queries.append(f"{business_type} business competitors")
         research_queries.append(f"successful {business_type} companies")
     
-    # Conduct web search for competitor research
+    # Conduct web search for competitor research - queries run concurrently
     competitor_research_results = []
     
-    for query in research_queries[:3]:  # Limit to 3 queries for efficiency
-        try:
-            search_result = await conduct_web_search(query)
-            if search_result and "unable to conduct web research" not in search_result:
-                competitor_research_results.append({
-                    "query": query,
-                    "result": search_result
-                })
-        except Exception as e:
-            print(f"Error conducting competitor research for query '{query}': {e}")
+    research = await run_research(
+        {query: conduct_web_search(query) for query in research_queries[:3]},  # Limit to 3 queries for efficiency
+        deadline=15,  # Runs inside a chat turn - return whatever finished rather than hold the reply
+        label="competitor_research"
+    )
+    for query, search_result in research.items():
+        if search_result and "unable to conduct web research" not in search_result:
+            competitor_research_results.append({
+                "query": query,
+                "result": search_result
+            })
     
     # Generate comprehensive competitor analysis
     if competitor_research_results:
@@ -3244,7 +3324,8 @@ async def handle_competitor_research_request(user_input, business_context, histo
         """
         
         try:
-            response = await client.chat.completions.create(
+            response = await chat_completion(
+                "angel_service.handle_competitor_research_request",
                 model="gpt-4o",
                 messages=[{"role": "user", "content": analysis_prompt}],
                 temperature=0.7,
@@ -3284,10 +3365,16 @@ async def generate_business_plan_artifact(session_data, conversation_history):
     print(f"🔍 Conducting deep research for {industry} business in {location}")
     
     # Multiple research queries for comprehensive analysis
-    market_research = await conduct_web_search(f"market analysis {industry} {location} {previous_year}")
-    competitor_research = await conduct_web_search(f"top competitors {industry} business model analysis {previous_year}")
-    industry_trends = await conduct_web_search(f"{industry} industry trends opportunities {previous_year}")
-    financial_benchmarks = await conduct_web_search(f"{industry} financial benchmarks startup costs {previous_year}")
+    research = await run_research({
+        "market_research": conduct_web_search(f"market analysis {industry} {location} {previous_year}"),
+        "competitor_research": conduct_web_search(f"top competitors {industry} business model analysis {previous_year}"),
+        "industry_trends": conduct_web_search(f"{industry} industry trends opportunities {previous_year}"),
+        "financial_benchmarks": conduct_web_search(f"{industry} financial benchmarks startup costs {previous_year}")
+    }, label="business_plan_research")
+    market_research = research["market_research"]
+    competitor_research = research["competitor_research"]
+    industry_trends = research["industry_trends"]
+    financial_benchmarks = research["financial_benchmarks"]
     
     business_plan_prompt = f"""
     Generate a comprehensive, detailed business plan based on the following conversation history and extensive research:
@@ -3320,7 +3407,9 @@ async def generate_business_plan_artifact(session_data, conversation_history):
     Make this a trust-building milestone that demonstrates deep understanding of both the customer and their business opportunity.
     """
     
-    response = await client.chat.completions.create(
+    response = await chat_completion(
+        "angel_service.generate_business_plan_artifact",
+        task="generation",
         model="gpt-4o",
         messages=[{"role": "user", "content": business_plan_prompt}],
         temperature=0.6
@@ -3338,8 +3427,12 @@ async def generate_roadmap_artifact(session_data, business_plan_data):
     current_year = datetime.now().year
     previous_year = current_year - 1
     
-    vendor_research = await conduct_web_search(f"best business tools vendors {industry} {business_type} {previous_year}")
-    legal_research = await conduct_web_search(f"business formation requirements {session_data.get('location', 'United States')}")
+    research = await run_research({
+        "vendor_research": conduct_web_search(f"best business tools vendors {industry} {business_type} {previous_year}"),
+        "legal_research": conduct_web_search(f"business formation requirements {session_data.get('location', 'United States')}")
+    }, label="roadmap_research")
+    vendor_research = research["vendor_research"]
+    legal_research = research["legal_research"]
     
     roadmap_prompt = f"""
     Create a detailed, chronological roadmap for launching this business:
@@ -3361,7 +3454,9 @@ async def generate_roadmap_artifact(session_data, business_plan_data):
     Make this actionable and comprehensive for immediate implementation.
     """
     
-    response = await client.chat.completions.create(
+    response = await chat_completion(
+        "angel_service.generate_roadmap_artifact",
+        task="generation",
         model="gpt-4o",
         messages=[{"role": "user", "content": roadmap_prompt}],
         temperature=0.6
@@ -3604,7 +3699,9 @@ async def generate_detailed_roadmap(session_data, history):
     """
     
     try:
-        response = await client.chat.completions.create(
+        response = await chat_completion(
+            "angel_service.generate_detailed_roadmap",
+            task="generation",
             model="gpt-4o",
             messages=[{"role": "user", "content": roadmap_prompt}],
             temperature=0.6,
@@ -3831,7 +3928,8 @@ FORMAT EXACTLY AS BELOW:
 Be specific to {industry}, not generic. Include actual industry requirements."""
 
     try:
-        response = await client.chat.completions.create(
+        response = await chat_completion(
+            "angel_service.generate_startup_costs_table_draft",
             model="gpt-4o",
             messages=[{"role": "user", "content": prompt}],
             temperature=0.3,
@@ -3884,7 +3982,8 @@ REQUIREMENTS:
 Be SPECIFIC to {industry} - use correct metrics, pricing, and volume assumptions for that industry."""
 
     try:
-        response = await client.chat.completions.create(
+        response = await chat_completion(
+            "angel_service.generate_sales_projection_draft",
             model="gpt-4o",
             messages=[{"role": "user", "content": prompt}],
             temperature=0.3,
@@ -3939,7 +4038,8 @@ For {industry} businesses, typical expense categories might include:
 Adjust ALL numbers for {location}. Be SPECIFIC to {industry}."""
 
     try:
-        response = await client.chat.completions.create(
+        response = await chat_completion(
+            "angel_service.generate_monthly_expenses_draft",
             model="gpt-4o",
             messages=[{"role": "user", "content": prompt}],
             temperature=0.3,
@@ -4000,7 +4100,8 @@ Include:
 Be SPECIFIC to {industry} - use actual channels that industry uses, not generic ones."""
 
     try:
-        response = await client.chat.completions.create(
+        response = await chat_completion(
+            "angel_service.generate_customer_acquisition_cost_draft",
             model="gpt-4o",
             messages=[{"role": "user", "content": prompt}],
             temperature=0.3,
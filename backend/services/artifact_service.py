@@ -0,0 +1,127 @@
+import os
+from postgrest.exceptions import APIError
+from db.supabase import get_async_db
+from utils.research_cache import make_cache_key
+from utils.job_runner import report_job_progress
+
+# Bump when a generator's prompt or output shape changes so stored artifacts are rebuilt
+ARTIFACT_GENERATOR_VERSION = os.getenv("ARTIFACT_GENERATOR_VERSION", "1")
+
+# Where each artifact type lives: table, the column distinguishing kinds in that table, and
+# the result field copied into the table's plain-text content column
+ARTIFACT_TYPES = {
+    "business_plan": {"table": "business_plans", "kind_column": "plan_type", "kind": "comprehensive", "content_field": "plan"},
+    "business_plan_summary": {"table": "business_plans", "kind_column": "plan_type", "kind": "summary", "content_field": "summary"},
+    "roadmap": {"table": "roadmaps", "kind_column": "roadmap_type", "kind": "comprehensive", "content_field": "content"},
+}
+ARTIFACT_COLUMNS = "id, session_id, version, input_hash, content, result, status, created_at"
+# Saves racing for the same next version number retry with a fresh one (unique (session, kind, version))
+ARTIFACT_SAVE_ATTEMPTS = 3
+UNIQUE_VIOLATION = "23505"
+
+def _artifact_spec(artifact_type: str):
+    spec = ARTIFACT_TYPES.get(artifact_type)
+    if spec is None:
+        raise ValueError(f"Unknown artifact type: {artifact_type}")
+    return spec
+
+def _artifact_query(spec: dict, session_id: str, user_id: str):
+    return (
+        get_async_db()
+        .from_(spec["table"])
+        .select(ARTIFACT_COLUMNS)
+        .eq("session_id", session_id)
+        .eq("user_id", user_id)
+        .eq(spec["kind_column"], spec["kind"])
+    )
+
+def artifact_input_hash(artifact_type: str, inputs) -> str:
+    """Content address of an artifact: the type, generator version and exactly what the generator reads"""
+    return make_cache_key(artifact_type, ARTIFACT_GENERATOR_VERSION, inputs)
+
+async def fetch_artifact(session_id: str, user_id: str, artifact_type: str, input_hash: str = None):
+    """Latest stored version of an artifact, or the version built from `input_hash` when given"""
+    spec = _artifact_spec(artifact_type)
+    query = _artifact_query(spec, session_id, user_id)
+    if input_hash:
+        query = query.eq("input_hash", input_hash)
+    response = await query.order("version", desc=True).limit(1).execute()
+    return response.data[0] if response.data else None
+
+async def list_artifact_versions(session_id: str, user_id: str, artifact_type: str):
+    """Version history of an artifact, newest first, without the stored content"""
+    spec = _artifact_spec(artifact_type)
+    response = await (
+        get_async_db()
+        .from_(spec["table"])
+        .select("id, version, input_hash, status, created_at")
+        .eq("session_id", session_id)
+        .eq("user_id", user_id)
+        .eq(spec["kind_column"], spec["kind"])
+        .order("version", desc=True)
+        .execute()
+    )
+    return response.data
+
+async def save_artifact(session_id: str, user_id: str, artifact_type: str, input_hash: str, result: dict):
+    """Store `result` as the next version of the artifact; earlier versions are kept"""
+    spec = _artifact_spec(artifact_type)
+    content = result.get(spec["content_field"]) if isinstance(result, dict) else None
+    row = {
+        "session_id": session_id,
+        "user_id": user_id,
+        spec["kind_column"]: spec["kind"],
+        "input_hash": input_hash,
+        "content": content if isinstance(content, str) else "",
+        "result": result,
+    }
+    for attempt in range(ARTIFACT_SAVE_ATTEMPTS):
+        latest = await fetch_artifact(session_id, user_id, artifact_type)
+        row["version"] = (latest["version"] + 1) if latest else 1
+        try:
+            # A concurrent request that built the same inputs first wins; its row is returned instead
+            response = await (
+                get_async_db()
+                .from_(spec["table"])
+                .upsert(row, on_conflict=f"session_id,{spec['kind_column']},input_hash", ignore_duplicates=True)
+                .execute()
+            )
+        except APIError as e:
+            # Another save (different inputs) took this version number first
+            if e.code == UNIQUE_VIOLATION and attempt < ARTIFACT_SAVE_ATTEMPTS - 1:
+                print(f"🔁 Artifact {artifact_type} v{row['version']} taken for {session_id} - retrying")
+                continue
+            raise
+        if response.data:
+            return response.data[0]
+        return await fetch_artifact(session_id, user_id, artifact_type, input_hash)
+
+async def get_or_generate_artifact(session_id: str, user_id: str, artifact_type: str, inputs, generate):
+    """Serve the artifact built from `inputs` if one is stored, otherwise run `generate(inputs)` and store it.
+
+    Returns (result, artifact_row, cached). Results that are not dicts are returned without being stored.
+    """
+    input_hash = artifact_input_hash(artifact_type, inputs)
+    await report_job_progress("checking_store", 0.1)
+    try:
+        stored = await fetch_artifact(session_id, user_id, artifact_type, input_hash)
+    except Exception as e:
+        print(f"⚠️ Artifact lookup failed for {artifact_type} ({session_id}): {e}")
+        stored = None
+    if stored and stored.get("result"):
+        print(f"📦 Artifact hit: {artifact_type} v{stored['version']} for {session_id}")
+        return stored["result"], stored, True
+
+    await report_job_progress("generating", 0.15)
+    result = await generate(inputs)
+    if not isinstance(result, dict):
+        return result, None, False
+
+    await report_job_progress("storing", 0.95)
+    try:
+        stored = await save_artifact(session_id, user_id, artifact_type, input_hash, result)
+        print(f"📦 Artifact stored: {artifact_type} v{stored['version'] if stored else '?'} for {session_id}")
+    except Exception as e:
+        print(f"⚠️ Artifact save failed for {artifact_type} ({session_id}): {e}")
+        stored = None
+    return result, stored, False
@@ -0,0 +1,73 @@
+import re
+from typing import Any, Dict, List, Optional
+
+# Tagged questions whose answers are copied into chat_sessions.business_context
+BUSINESS_CONTEXT_TAG_FIELDS = {
+    "KYC.05": "business_idea",
+    "KYC.08": "business_type",
+    "KYC.10": "location",
+    "KYC.11": "industry",
+    "BUSINESS_PLAN.01": "business_name",
+    "BUSINESS_PLAN.09": "target_market",
+}
+BUSINESS_CONTEXT_FIELDS = ("business_name", "industry", "location", "business_type", "target_market", "business_idea")
+# Marks a context maintained by record_answer; contexts without it are backfilled from history once
+BUSINESS_CONTEXT_VERSION = 1
+
+# Replies that are commands, not answers
+COMMAND_WORDS = {"accept", "modify", "draft", "draft more", "support", "scrapping", "scraping", "ok", "okay", "yes", "no"}
+# Longer replies are usually pasted Support/Draft content rather than the answer itself
+MAX_ANSWER_LENGTH = 500
+
+def _empty_context() -> Dict[str, Any]:
+    context = {field: "" for field in BUSINESS_CONTEXT_FIELDS}
+    context["context_version"] = BUSINESS_CONTEXT_VERSION
+    return context
+
+def is_maintained(context: Any) -> bool:
+    return isinstance(context, dict) and context.get("context_version") == BUSINESS_CONTEXT_VERSION
+
+def record_answer(context: Dict[str, Any], tag: Optional[str], answer: str) -> Dict[str, Any]:
+    """Return `context` with the answer to `tag` applied (a new dict only when something changed)"""
+    field = BUSINESS_CONTEXT_TAG_FIELDS.get(tag or "")
+    answer = (answer or "").strip()
+    if not field or len(answer) <= 2 or len(answer) > MAX_ANSWER_LENGTH or answer.lower() in COMMAND_WORDS:
+        return context
+    if context.get(field) == answer:
+        return context
+    return {**context, field: answer}
+
+def backfill_business_context(history: List[Dict[str, str]]) -> Dict[str, Any]:
+    """
+    Build a context from a full chat history - the one-time migration path for sessions
+    created before business_context was maintained turn by turn.
+
+    Tagged answers are replayed through record_answer; fields that never had a tagged
+    answer fall back to the legacy history scan.
+    """
+    context = _empty_context()
+    asked = None
+    for msg in history:
+        if msg.get("role") == "assistant":
+            tags = re.findall(r'\[\[Q:([A-Z_]+\.\d{2})\]\]', msg.get("content", ""))
+            asked = tags[-1] if tags else asked
+        elif msg.get("role") == "user":
+            context = record_answer(context, asked, msg.get("content", ""))
+
+    if any(not context[field] for field in BUSINESS_CONTEXT_FIELDS) and history:
+        from services.angel_service import extract_business_context_from_history
+        scanned = extract_business_context_from_history(history)
+        for field in BUSINESS_CONTEXT_FIELDS:
+            if not context[field] and scanned.get(field):
+                context[field] = scanned[field]
+    return context
+
+def get_business_context(session: Optional[Dict[str, Any]], history: List[Dict[str, str]]) -> Dict[str, Any]:
+    """
+    The session's business context in O(1). Sessions that predate the maintained context
+    are backfilled from `history`; finalize_chat_turn persists that on the next turn.
+    """
+    context = session.get("business_context") if session else None
+    if is_maintained(context):
+        return context
+    return backfill_business_context(history)
@@ -1,15 +1,116 @@
-from db.supabase import supabase
+import os
+import asyncio
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from db.supabase import get_async_db
+from services.session_service import patch_session
+from utils.request_timing import timed, timed_span
 
+# Persist each chat turn through the persist_chat_turn Postgres function (see supabase_schema_setup.sql)
+USE_CHAT_TURN_RPC = os.getenv("SUPABASE_USE_CHAT_TURN_RPC", "false").lower() == "true"
+# Session columns persist_chat_turn knows how to update
+CHAT_TURN_RPC_COLUMNS = {"current_phase", "asked_q", "answered_count", "business_context"}
+
+# Per-session history cache: only rows from around the last seen created_at onwards are fetched
+HISTORY_CACHE_TTL = int(os.getenv("CHAT_HISTORY_CACHE_TTL", "1800"))  # 30 minutes
+HISTORY_CACHE_MAX_SESSIONS = int(os.getenv("CHAT_HISTORY_CACHE_MAX_SESSIONS", "500"))
+HISTORY_COLUMNS = "id, role, content, created_at"
+# Seconds before the cursor that are re-read on each fetch: rows can commit after later ones (user messages are
+# stamped before the reply is generated, other writers use the DB clock, workers flush in either order)
+HISTORY_CURSOR_OVERLAP = float(os.getenv("CHAT_HISTORY_CURSOR_OVERLAP", "300"))
+history_cache = OrderedDict()
+
+def _history_entry(session_id: str):
+    entry = history_cache.get(session_id)
+    if entry and (datetime.now() - entry["timestamp"]).total_seconds() > HISTORY_CACHE_TTL:
+        history_cache.pop(session_id, None)
+        entry = None
+    if entry:
+        history_cache.move_to_end(session_id)
+    return entry
+
+def _merge_history_rows(session_id: str, rows: list):
+    """Add fetched or inserted rows to the session's cache entry, skipping rows already seen"""
+    entry = history_cache.get(session_id)
+    if entry is None:
+        entry = {"rows": [], "ids": set(), "timestamp": datetime.now()}
+        history_cache[session_id] = entry
+        while len(history_cache) > HISTORY_CACHE_MAX_SESSIONS:
+            history_cache.popitem(last=False)
+
+    added = False
+    for row in rows:
+        if row.get("id") in entry["ids"]:
+            continue
+        entry["ids"].add(row.get("id"))
+        entry["rows"].append(row)
+        added = True
+
+    # Concurrent turns on the same worker can merge out of order
+    if added and any(a["created_at"] > b["created_at"] for a, b in zip(entry["rows"], entry["rows"][1:])):
+        entry["rows"].sort(key=lambda row: row["created_at"])
+    entry["timestamp"] = datetime.now()
+    return entry
+
+def _as_messages(rows: list):
+    return [{"role": row["role"], "content": row["content"]} for row in rows]
+
+@timed("history_fetch")
 async def fetch_chat_history(session_id: str):
-    response = supabase.from_("chat_history").select("role, content").eq("session_id", session_id).order("created_at").execute()
-    return response.data
+    entry = _history_entry(session_id)
+    query = get_async_db().from_("chat_history").select(HISTORY_COLUMNS).eq("session_id", session_id)
+
+    if entry and entry["rows"]:
+        # Re-read an overlap window before the cursor; id de-duplication drops the rows already cached
+        cursor = datetime.fromisoformat(entry["rows"][-1]["created_at"].replace("Z", "+00:00"))
+        since = (cursor - timedelta(seconds=HISTORY_CURSOR_OVERLAP)).isoformat()
+        response = await query.gte("created_at", since).order("created_at").execute()
+        print(f"📚 History cache hit for {session_id}: {len(entry['rows'])} cached, {len(response.data)} fetched since cursor")
+    else:
+        response = await query.order("created_at").execute()
+
+    entry = _merge_history_rows(session_id, response.data)
+    return _as_messages(entry["rows"])
+
+async def fetch_recent_chat_history(session_id: str, limit: int = 10):
+    """Return only the last `limit` messages, oldest first"""
+    entry = _history_entry(session_id)
+    if entry:
+        return (await fetch_chat_history(session_id))[-limit:]
 
+    with timed_span("history_fetch"):
+        response = await (
+            get_async_db()
+            .from_("chat_history")
+            .select(HISTORY_COLUMNS)
+            .eq("session_id", session_id)
+            .order("created_at", desc=True)
+            .limit(limit)
+            .execute()
+        )
+    return _as_messages(reversed(response.data))
+
+@timed("db_write")
 async def save_chat_message(session_id: str, user_id: str, role: str, content: str):
-    supabase.from_("chat_history").insert({"session_id": session_id, "user_id": user_id, "role": role, "content": content}).execute()
+    response = await get_async_db().from_("chat_history").insert({"session_id": session_id, "user_id": user_id, "role": role, "content": content}).execute()
+    if session_id in history_cache:
+        _merge_history_rows(session_id, response.data)
+
+@timed("db_write")
+async def save_chat_messages(messages: list):
+    """Insert several chat_history rows in a single request"""
+    if not messages:
+        return
+    response = await get_async_db().from_("chat_history").insert(messages).execute()
+    for row in response.data:
+        if row.get("session_id") in history_cache:
+            _merge_history_rows(row["session_id"], [row])
 
+@timed("history_fetch")
 async def fetch_phase_chat_history(session_id: str, phase: str, offset: int = 0, limit: int = 15):
-    response = (
-        supabase
+    # The async client raises postgrest.APIError on failure
+    response = await (
+        get_async_db()
         .table("chat_history")
         .select("role, content, phase, created_at")
         .eq("session_id", session_id)
@@ -19,8 +120,51 @@ async def fetch_phase_chat_history(session_id: str, phase: str, offset: int = 0,
         .execute()
     )
 
-    if response.error:
-        raise Exception(f"Supabase error: {response.error.message}")
-
     return response.data
 
+class ChatTurn:
+    """Unit of work for one chat turn.
+
+    Messages and session updates are collected while the turn is processed and
+    written back together by flush(): one bulk insert plus one merged session
+    update, or a single persist_chat_turn RPC when SUPABASE_USE_CHAT_TURN_RPC is set.
+    """
+
+    def __init__(self, session_id: str, user_id: str):
+        self.session_id = session_id
+        self.user_id = user_id
+        self.messages = []
+        self.session_updates = {}
+
+    def add_message(self, role: str, content: str):
+        # Explicit timestamps keep user/assistant order stable when both rows land in one statement
+        self.messages.append({
+            "session_id": self.session_id,
+            "user_id": self.user_id,
+            "role": role,
+            "content": content,
+            "created_at": datetime.now(timezone.utc).isoformat()
+        })
+
+    def patch(self, updates: dict):
+        if updates:
+            self.session_updates.update(updates)
+
+    async def flush(self):
+        messages, updates = self.messages, self.session_updates
+        self.messages, self.session_updates = [], {}
+        if not messages and not updates:
+            return
+
+        if USE_CHAT_TURN_RPC and set(updates) <= CHAT_TURN_RPC_COLUMNS:
+            await get_async_db().rpc("persist_chat_turn", {
+                "p_session_id": self.session_id,
+                "p_messages": messages,
+                "p_session_updates": updates
+            }).execute()
+            return
+
+        writes = [save_chat_messages(messages)]
+        if updates:
+            writes.append(patch_session(self.session_id, updates))
+        await asyncio.gather(*writes)
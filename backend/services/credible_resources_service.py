@@ -3,7 +3,6 @@ import json
 import asyncio
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
-import aiohttp
 from dataclasses import dataclass
 from enum import Enum
 import logging
@@ -307,6 +306,7 @@ class CredibleResourcesManager:
     
     async def validate_resource_accessibility(self, resource: CredibleResource) -> bool:
         """Validate if a resource is accessible and up-to-date"""
+        import aiohttp  # only this check needs it; keeps aiohttp off the startup path
         try:
             async with aiohttp.ClientSession() as session:
                 async with session.get(resource.url, timeout=10) as response:
@@ -1,8 +1,7 @@
-from openai import AsyncOpenAI
 import os
 from datetime import datetime
+from utils.llm_gateway import chat_completion
 
-client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 async def generate_founderport_style_roadmap(session_data, history):
     """
@@ -133,7 +132,9 @@ async def generate_founderport_style_roadmap(session_data, history):
     """
     
     try:
-        response = await client.chat.completions.create(
+        response = await chat_completion(
+            "founderport_roadmap_service.generate_founderport_style_roadmap",
+            task="generation",
             model="gpt-4o",
             messages=[{"role": "user", "content": roadmap_prompt}],
             temperature=0.3,
@@ -272,7 +273,8 @@ async def generate_task_with_service_providers(task_name, business_name, locatio
     """
     
     try:
-        response = await client.chat.completions.create(
+        response = await chat_completion(
+            "founderport_roadmap_service.generate_task_with_service_providers",
             model="gpt-4o",
             messages=[{"role": "user", "content": task_prompt}],
             temperature=0.4,
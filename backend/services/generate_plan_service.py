@@ -1,76 +1,122 @@
-from openai import AsyncOpenAI
 import os
+import re
 import json
 from datetime import datetime
 from services.angel_service import generate_business_plan_artifact, conduct_web_search
-
-client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from utils.research_executor import run_research
+from utils.job_runner import report_job_progress
+from utils.research_cache import ResearchCache, make_cache_key
+from utils.llm_gateway import chat_completion
+
+
+# KYC questions whose answers fill the plan profile directly
+PROFILE_KYC_FIELDS = {"KYC.08": "business_type", "KYC.10": "location", "KYC.11": "industry"}
+PROFILE_FIELDS = ("business_name", "industry", "location", "business_type")
+# Q&A pairs sent to the extraction call when KYC answers don't cover every field
+PROFILE_EXTRACTION_MAX_PAIRS = int(os.getenv("PROFILE_EXTRACTION_MAX_PAIRS", "40"))
+
+# Stands in for a research source that failed or timed out
+ROADMAP_RESEARCH_UNAVAILABLE = "No findings available; rely on general best practices"
+
+# Profiles by transcript hash, shared by the plan, roadmap and summary generators
+profile_cache = ResearchCache("plan_profile", float(os.getenv("PLAN_PROFILE_CACHE_TTL", "3600")))
+
+def parse_transcript(history):
+    """Accept a message list or a smart_trim_history transcript ("ROLE: content" lines) and return messages"""
+    if not isinstance(history, str):
+        return [msg for msg in history if isinstance(msg, dict) and "content" in msg]
+
+    messages = []
+    for line in history.splitlines():
+        match = re.match(r'^(USER|ASSISTANT|SYSTEM): ?(.*)$', line)
+        if match:
+            messages.append({"role": match.group(1).lower(), "content": match.group(2)})
+        elif messages:
+            messages[-1]["content"] += "\n" + line
+    return messages
+
+def question_answer_pairs(messages):
+    """(question tag or None, question text, answer) for every user message"""
+    pairs = []
+    question = ""
+    for msg in messages:
+        if msg["role"] == "assistant":
+            question = msg["content"]
+        elif msg["role"] == "user":
+            # The last tag in the assistant's message is the question being answered
+            tags = re.findall(r'\[\[Q:([A-Z_]+\.\d{2})\]\]', question)
+            pairs.append((tags[-1] if tags else None, question, msg["content"].strip()))
+    return pairs
+
+async def extract_profile_fields(pairs, fields):
+    """One JSON-mode call over the Q&A pairs for the profile fields the KYC answers didn't cover; None if it failed"""
+    transcript = "\n\n".join(
+        f"Q: {question[-300:]}\nA: {answer[:500]}" for _, question, answer in pairs[-PROFILE_EXTRACTION_MAX_PAIRS:]
+    )
+    prompt = (
+        "From this business planning conversation, extract the founder's "
+        + ", ".join(fields)
+        + ". Respond with a JSON object using exactly those keys; use null for anything not stated.\n\n"
+        + transcript
+    )
+    try:
+        response = await chat_completion(
+            "generate_plan_service.extract_profile_fields",
+            task="extraction",
+            model="gpt-4o-mini",
+            messages=[{"role": "user", "content": prompt}],
+            response_format={"type": "json_object"},
+            temperature=0.1,
+            max_tokens=200
+        )
+        extracted = json.loads(response.choices[0].message.content)
+    except Exception as e:
+        print(f"Profile extraction failed: {e}")
+        return None
+    return {field: str(extracted[field]).strip() for field in fields if extracted.get(field)}
+
+async def extract_plan_profile(history, defaults):
+    """
+    Business profile shared by the plan generators.
+
+    KYC.08/10/11 answers are used as given and the remaining profile fields come from a single
+    extraction call. Fields in `defaults` that are still empty get the default.
+    Returns (profile, conversation messages).
+    """
+    messages = parse_transcript(history)
+    cache_key = make_cache_key(messages)
+    profile = await profile_cache.get(cache_key)
+
+    if profile is None:
+        pairs = question_answer_pairs(messages)
+        profile = {}
+        for tag, _, answer in pairs:
+            field = PROFILE_KYC_FIELDS.get(tag)
+            if field and len(answer) > 2:
+                profile[field] = answer
+
+        missing = [field for field in PROFILE_FIELDS if field not in profile]
+        extracted = await extract_profile_fields(pairs, missing) if missing and pairs else {}
+        profile.update(extracted or {})
+        # A failed extraction is retried on the next generation instead of being cached
+        if extracted is not None:
+            await profile_cache.set(cache_key, profile)
+
+    session_data = {field: profile.get(field) or default for field, default in defaults.items()}
+    return session_data, messages
 
 async def generate_full_business_plan(history):
     """Generate comprehensive business plan with deep research"""
 
 
     # Extract session data from conversation history
-    session_data = {}
-    conversation_history = []
-    
-    for msg in history:
-        if isinstance(msg, dict):
-            conversation_history.append(msg)
-            content = msg.get('content', '').lower()
-            
-            # Extract industry information - DYNAMIC APPROACH
-            if any(keyword in content for keyword in ['industry', 'business type', 'sector', 'field']):
-                # Use AI model to dynamically identify industry
-                industry_prompt = f"""
-                Analyze this user input and extract the business industry or sector: "{content}"
-                
-                Return ONLY the industry name in a standardized format, or "general business" if unclear.
-                
-                Examples:
-                - "Tea Stall" → "Tea Stall"
-                - "AI Development" → "AI Development"
-                - "Food Service" → "Food Service"
-                - "Technology" → "Technology"
-                - "Healthcare" → "Healthcare"
-                
-                Return only the industry name:
-                """
-                
-                try:
-                    response = await client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[{"role": "user", "content": industry_prompt}],
-                        temperature=0.1,
-                        max_tokens=30
-                    )
-                    
-                    industry_result = response.choices[0].message.content.strip()
-                    session_data['industry'] = industry_result if industry_result else 'general business'
-                except Exception as e:
-                    print(f"Industry extraction failed: {e}")
-                    session_data['industry'] = 'general business'
-            
-            # Extract location information
-            if any(keyword in content for keyword in ['location', 'city', 'country', 'state', 'region']):
-                if 'united states' in content or 'usa' in content or 'us' in content:
-                    session_data['location'] = 'United States'
-                elif 'canada' in content:
-                    session_data['location'] = 'Canada'
-                elif 'united kingdom' in content or 'uk' in content:
-                    session_data['location'] = 'United Kingdom'
-                elif 'australia' in content:
-                    session_data['location'] = 'Australia'
-                else:
-                    session_data['location'] = 'United States'  # Default
-    
-    # Set defaults if not found
-    if 'industry' not in session_data:
-        session_data['industry'] = 'general business'
-    if 'location' not in session_data:
-        session_data['location'] = 'United States'
+    await report_job_progress("extracting_profile", 0.2)
+    session_data, conversation_history = await extract_plan_profile(
+        history, {"industry": "general business", "location": "United States"}
+    )
     
     # Use the deep research business plan generation
+    await report_job_progress("writing_business_plan", 0.3)
     business_plan_content = await generate_business_plan_artifact(session_data, conversation_history)
     
     return {
@@ -85,64 +131,10 @@ async def generate_full_roadmap_plan(history):
     """Generate comprehensive roadmap with deep research"""
     
     # Extract session data from conversation history
-    session_data = {}
-    conversation_history = []
-    
-    for msg in history:
-        if isinstance(msg, dict):
-            conversation_history.append(msg)
-            content = msg.get('content', '').lower()
-            
-            # Extract industry information - DYNAMIC APPROACH
-            if any(keyword in content for keyword in ['industry', 'business type', 'sector', 'field']):
-                # Use AI model to dynamically identify industry
-                industry_prompt = f"""
-                Analyze this user input and extract the business industry or sector: "{content}"
-                
-                Return ONLY the industry name in a standardized format, or "general business" if unclear.
-                
-                Examples:
-                - "Tea Stall" → "Tea Stall"
-                - "AI Development" → "AI Development"
-                - "Food Service" → "Food Service"
-                - "Technology" → "Technology"
-                - "Healthcare" → "Healthcare"
-                
-                Return only the industry name:
-                """
-                
-                try:
-                    response = await client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[{"role": "user", "content": industry_prompt}],
-                        temperature=0.1,
-                        max_tokens=30
-                    )
-                    
-                    industry_result = response.choices[0].message.content.strip()
-                    session_data['industry'] = industry_result if industry_result else 'general business'
-                except Exception as e:
-                    print(f"Industry extraction failed: {e}")
-                    session_data['industry'] = 'general business'
-            
-            # Extract location information
-            if any(keyword in content for keyword in ['location', 'city', 'country', 'state', 'region']):
-                if 'united states' in content or 'usa' in content or 'us' in content:
-                    session_data['location'] = 'United States'
-                elif 'canada' in content:
-                    session_data['location'] = 'Canada'
-                elif 'united kingdom' in content or 'uk' in content:
-                    session_data['location'] = 'United Kingdom'
-                elif 'australia' in content:
-                    session_data['location'] = 'Australia'
-                else:
-                    session_data['location'] = 'United States'  # Default
-    
-    # Set defaults if not found
-    if 'industry' not in session_data:
-        session_data['industry'] = 'general business'
-    if 'location' not in session_data:
-        session_data['location'] = 'United States'
+    await report_job_progress("extracting_profile", 0.2)
+    session_data, conversation_history = await extract_plan_profile(
+        history, {"industry": "general business", "location": "United States"}
+    )
     
     # Conduct comprehensive research for roadmap
     industry = session_data.get('industry', 'general business')
@@ -152,46 +144,58 @@ async def generate_full_roadmap_plan(history):
     previous_year = current_year - 1
     
     print(f"[RESEARCH] Conducting deep research for {industry} roadmap in {location}")
+    await report_job_progress("roadmap_research", 0.3)
     print(f"[RESEARCH] Searching Government Sources (.gov), Academic Research (.edu, scholar), and Industry Reports (Bloomberg, WSJ, Forbes)")
     
     # EXPLICIT RESEARCH FROM AUTHORITATIVE SOURCES - Government, Academic, Industry
-    # Government Sources - SBA, IRS, state agencies, regulatory bodies
-    government_resources = await conduct_web_search(
-        f"Search ONLY government sources (.gov domains) for: {location} business formation requirements {industry} startup compliance licensing permits {current_year}. "
-        f"Include: SBA.gov, IRS.gov, state business registration sites, regulatory agencies. Cite specific government sources and URLs."
-    )
-    regulatory_requirements = await conduct_web_search(
-        f"Search government (.gov) and regulatory sources for: {industry} regulatory requirements startup compliance {location} {current_year}. "
-        f"Find specific licenses, permits, and legal requirements. Cite government sources with URLs."
-    )
-    
-    # Academic Research - Universities, research institutions, academic journals
-    academic_insights = await conduct_web_search(
-        f"Search academic sources (.edu, Google Scholar, JSTOR, research institutions) for: startup roadmap {industry} business planning success factors {current_year}. "
-        f"Find research papers, studies, and academic publications. Cite specific academic sources with URLs."
-    )
-    startup_research = await conduct_web_search(
-        f"Search academic and research sources for: {industry} startup timeline best practices implementation phases {current_year}. "
-        f"Include university research, business school publications, peer-reviewed studies. Cite academic sources."
-    )
-    
-    # Industry Reports - Bloomberg, WSJ, Forbes, Harvard Business Review, industry publications
-    market_entry_strategy = await conduct_web_search(
-        f"Search industry publications (Bloomberg, WSJ, Forbes, Harvard Business Review) for: {industry} market entry strategy startup {location} {current_year}. "
-        f"Find authoritative industry reports and business journalism. Cite specific publications with URLs."
-    )
-    funding_insights = await conduct_web_search(
-        f"Search industry sources (Bloomberg, WSJ, Forbes, Crunchbase) for: {industry} funding timeline seed stage startup investment trends {current_year}. "
-        f"Include venture capital reports and startup funding data. Cite industry sources."
-    )
-    operational_insights = await conduct_web_search(
-        f"Search industry publications for: {industry} operational requirements startup launch phases {location} {current_year}. "
-        f"Find industry-specific best practices and operational benchmarks. Cite sources."
-    )
+    # All sources are researched concurrently; a slow or failed source yields None instead of blocking the rest
+    research = await run_research({
+        # Government Sources - SBA, IRS, state agencies, regulatory bodies
+        "government_resources": conduct_web_search(
+            f"Search ONLY government sources (.gov domains) for: {location} business formation requirements {industry} startup compliance licensing permits {current_year}. "
+            f"Include: SBA.gov, IRS.gov, state business registration sites, regulatory agencies. Cite specific government sources and URLs."
+        ),
+        "regulatory_requirements": conduct_web_search(
+            f"Search government (.gov) and regulatory sources for: {industry} regulatory requirements startup compliance {location} {current_year}. "
+            f"Find specific licenses, permits, and legal requirements. Cite government sources with URLs."
+        ),
+        
+        # Academic Research - Universities, research institutions, academic journals
+        "academic_insights": conduct_web_search(
+            f"Search academic sources (.edu, Google Scholar, JSTOR, research institutions) for: startup roadmap {industry} business planning success factors {current_year}. "
+            f"Find research papers, studies, and academic publications. Cite specific academic sources with URLs."
+        ),
+        "startup_research": conduct_web_search(
+            f"Search academic and research sources for: {industry} startup timeline best practices implementation phases {current_year}. "
+            f"Include university research, business school publications, peer-reviewed studies. Cite academic sources."
+        ),
+        
+        # Industry Reports - Bloomberg, WSJ, Forbes, Harvard Business Review, industry publications
+        "market_entry_strategy": conduct_web_search(
+            f"Search industry publications (Bloomberg, WSJ, Forbes, Harvard Business Review) for: {industry} market entry strategy startup {location} {current_year}. "
+            f"Find authoritative industry reports and business journalism. Cite specific publications with URLs."
+        ),
+        "funding_insights": conduct_web_search(
+            f"Search industry sources (Bloomberg, WSJ, Forbes, Crunchbase) for: {industry} funding timeline seed stage startup investment trends {current_year}. "
+            f"Include venture capital reports and startup funding data. Cite industry sources."
+        ),
+        "operational_insights": conduct_web_search(
+            f"Search industry publications for: {industry} operational requirements startup launch phases {location} {current_year}. "
+            f"Find industry-specific best practices and operational benchmarks. Cite sources."
+        )
+    }, label="roadmap_research")
+    government_resources = research["government_resources"]
+    regulatory_requirements = research["regulatory_requirements"]
+    academic_insights = research["academic_insights"]
+    startup_research = research["startup_research"]
+    market_entry_strategy = research["market_entry_strategy"]
+    funding_insights = research["funding_insights"]
+    operational_insights = research["operational_insights"]
     
     print(f"[RESEARCH] ✓ Government sources researched: SBA, IRS, state agencies")
     print(f"[RESEARCH] ✓ Academic research reviewed: Universities, journals, research institutions")
     print(f"[RESEARCH] ✓ Industry reports analyzed: Bloomberg, WSJ, Forbes, HBR")
+    await report_job_progress("writing_roadmap", 0.7)
     
     ROADMAP_TEMPLATE = """
 # Launch Roadmap - Built on Government Sources, Academic Research & Industry Reports
@@ -218,6 +222,7 @@ Every recommendation has been validated against current best practices and cited
 | **Academic Studies** | Business schools, research institutions | Implementation timelines, phases | {startup_research} |
 | **Industry Reports** | Bloomberg, WSJ, Forbes, HBR | Market entry, funding trends | {market_entry_strategy} |
 | **Industry Analysis** | Business publications, VC reports | Operational requirements, benchmarks | {operational_insights} |
+| **Funding Reports** | Bloomberg, WSJ, Forbes, Crunchbase | Funding timelines, investment trends | {funding_insights} |
 
 ---
 
@@ -405,16 +410,73 @@ Your roadmap is complete, researched, and ready for execution. The next phase wi
 - Bold all step titles and key terms
 - Use bullet lists for clarity
 - Use a professional but friendly tone
-"""
+""".format(
+        government_resources=government_resources or ROADMAP_RESEARCH_UNAVAILABLE,
+        regulatory_requirements=regulatory_requirements or ROADMAP_RESEARCH_UNAVAILABLE,
+        academic_insights=academic_insights or ROADMAP_RESEARCH_UNAVAILABLE,
+        startup_research=startup_research or ROADMAP_RESEARCH_UNAVAILABLE,
+        market_entry_strategy=market_entry_strategy or ROADMAP_RESEARCH_UNAVAILABLE,
+        operational_insights=operational_insights or ROADMAP_RESEARCH_UNAVAILABLE,
+        funding_insights=funding_insights or ROADMAP_RESEARCH_UNAVAILABLE
+    )
+
+    messages = [
+        {
+            "role": "system",
+            "content": (
+                "You are Angel, an AI startup coach specializing in launch roadmaps. "
+                "Write the founder's launch roadmap using the provided template structure. "
+                "The Key Findings cells hold raw research notes: condense each into a one-line finding with its source, "
+                "and tailor every phase, step and provider to the founder's industry, location and conversation."
+            )
+        },
+        {
+            "role": "user",
+            "content": (
+                "Generate a launch roadmap for this business:\n\n"
+                "Session Data: " + json.dumps(session_data, indent=2) + "\n\n"
+                "Conversation History: " + json.dumps(conversation_history, indent=2) + "\n\n"
+                "Roadmap template, with this research already filled in:\n\n"
+                + ROADMAP_TEMPLATE
+            )
+        }
+    ]
+
+    response = await chat_completion(
+        "generate_plan_service.generate_full_roadmap_plan",
+        task="generation",
+        model="gpt-4o",
+        messages=messages,
+        temperature=0.6,
+        max_tokens=8000
+    )
+    roadmap_content = response.choices[0].message.content
+
+    return {
+        "roadmap": roadmap_content,
+        "content": roadmap_content,
+        "generated_at": datetime.now().isoformat(),
+        "research_conducted": True,
+        # Sources that returned findings; the others were written with ROADMAP_RESEARCH_UNAVAILABLE
+        "research_sources": {source: bool(findings) for source, findings in research.items()},
+        "industry": industry,
+        "location": location
+    }
 
 async def generate_implementation_insights(industry: str, location: str, business_type: str):
     """Generate RAG-powered implementation insights for the transition phase"""
     
     # Conduct research for implementation insights
-    implementation_research = await conduct_web_search(f"site:forbes.com OR site:hbr.org startup implementation best practices {industry} {location}")
-    compliance_research = await conduct_web_search(f"site:gov OR site:sba.gov business implementation compliance requirements {industry} {location}")
-    success_factors = await conduct_web_search(f"site:bloomberg.com OR site:wsj.com successful startup implementation factors {industry}")
-    local_resources = await conduct_web_search(f"site:gov {location} business implementation resources support programs")
+    research = await run_research({
+        "implementation_research": conduct_web_search(f"site:forbes.com OR site:hbr.org startup implementation best practices {industry} {location}"),
+        "compliance_research": conduct_web_search(f"site:gov OR site:sba.gov business implementation compliance requirements {industry} {location}"),
+        "success_factors": conduct_web_search(f"site:bloomberg.com OR site:wsj.com successful startup implementation factors {industry}"),
+        "local_resources": conduct_web_search(f"site:gov {location} business implementation resources support programs")
+    }, label="implementation_insights_research")
+    implementation_research = research["implementation_research"]
+    compliance_research = research["compliance_research"]
+    success_factors = research["success_factors"]
+    local_resources = research["local_resources"]
     
     INSIGHTS_TEMPLATE = """
 Based on extensive research from authoritative sources, here are key implementation insights for your {industry} business in {location}:
@@ -469,10 +531,16 @@ async def generate_service_provider_preview(industry: str, location: str, busine
     """Generate RAG-powered service provider preview for the transition phase"""
     
     # Conduct research for service providers
-    legal_providers = await conduct_web_search(f"site:law.com OR site:martindale.com business attorneys {location} {industry}")
-    accounting_providers = await conduct_web_search(f"site:cpa.com OR site:aicpa.org accounting services {location} small business")
-    banking_services = await conduct_web_search(f"site:bankrate.com OR site:nerdwallet.com business banking {location}")
-    industry_specialists = await conduct_web_search(f"site:linkedin.com OR site:clutch.co {industry} consultants {location}")
+    research = await run_research({
+        "legal_providers": conduct_web_search(f"site:law.com OR site:martindale.com business attorneys {location} {industry}"),
+        "accounting_providers": conduct_web_search(f"site:cpa.com OR site:aicpa.org accounting services {location} small business"),
+        "banking_services": conduct_web_search(f"site:bankrate.com OR site:nerdwallet.com business banking {location}"),
+        "industry_specialists": conduct_web_search(f"site:linkedin.com OR site:clutch.co {industry} consultants {location}")
+    }, label="provider_preview_research")
+    legal_providers = research["legal_providers"]
+    accounting_providers = research["accounting_providers"]
+    banking_services = research["banking_services"]
+    industry_specialists = research["industry_specialists"]
     
     # Generate service provider preview data
     providers = [
@@ -546,70 +614,13 @@ async def generate_comprehensive_business_plan_summary(history):
     """Generate a comprehensive business plan summary for the Plan to Roadmap Transition"""
     
     # Extract session data from conversation history
-    session_data = {}
-    conversation_history = []
-    
-    for msg in history:
-        if isinstance(msg, dict):
-            conversation_history.append(msg)
-            content = msg.get('content', '').lower()
-            
-            # Extract key business information - DYNAMIC APPROACH
-            if any(keyword in content for keyword in ['business name', 'company name', 'venture name']):
-                session_data['business_name'] = msg.get('content', '').strip()
-            elif any(keyword in content for keyword in ['industry', 'business type', 'sector']):
-                # Use AI model to dynamically identify industry
-                industry_prompt = f"""
-                Analyze this user input and extract the business industry or sector: "{content}"
-                
-                Return ONLY the industry name in a standardized format, or "General Business" if unclear.
-                
-                Examples:
-                - "Tea Stall" → "Tea Stall"
-                - "AI Development" → "AI Development"
-                - "Food Service" → "Food Service"
-                - "Technology" → "Technology"
-                - "Healthcare" → "Healthcare"
-                
-                Return only the industry name:
-                """
-                
-                try:
-                    response = await client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[{"role": "user", "content": industry_prompt}],
-                        temperature=0.1,
-                        max_tokens=30
-                    )
-                    
-                    industry_result = response.choices[0].message.content.strip()
-                    session_data['industry'] = industry_result if industry_result else 'General Business'
-                except Exception as e:
-                    print(f"Industry extraction failed: {e}")
-                    session_data['industry'] = 'General Business'
-            
-            # Extract location information
-            if any(keyword in content for keyword in ['location', 'city', 'country', 'state', 'region']):
-                if 'united states' in content or 'usa' in content or 'us' in content:
-                    session_data['location'] = 'United States'
-                elif 'canada' in content:
-                    session_data['location'] = 'Canada'
-                elif 'europe' in content:
-                    session_data['location'] = 'Europe'
-                elif 'asia' in content:
-                    session_data['location'] = 'Asia'
-                else:
-                    session_data['location'] = 'International'
-            
-            # Extract business type
-            if any(keyword in content for keyword in ['llc', 'corporation', 'partnership', 'sole proprietorship']):
-                session_data['business_type'] = msg.get('content', '').strip()
-
-    # Set defaults
-    session_data.setdefault('business_name', 'Your Business')
-    session_data.setdefault('industry', 'General Business')
-    session_data.setdefault('location', 'United States')
-    session_data.setdefault('business_type', 'Startup')
+    await report_job_progress("extracting_profile", 0.2)
+    session_data, conversation_history = await extract_plan_profile(history, {
+        "business_name": "Your Business",
+        "industry": "General Business",
+        "location": "United States",
+        "business_type": "Startup"
+    })
 
     BUSINESS_PLAN_SUMMARY_TEMPLATE = """
 # COMPREHENSIVE BUSINESS PLAN SUMMARY
@@ -793,7 +804,10 @@ This comprehensive business plan provides the foundation for creating a detailed
         }
     ]
 
-    response = await client.chat.completions.create(
+    await report_job_progress("writing_summary", 0.4)
+    response = await chat_completion(
+        "generate_plan_service.generate_comprehensive_business_plan_summary",
+        task="generation",
         model="gpt-4o",
         messages=messages,
         temperature=0.7,
@@ -1,12 +1,11 @@
-from openai import AsyncOpenAI
 import os
 import json
 import re
 from datetime import datetime
 from typing import Dict, List, Optional
-from utils.constant import ANGEL_SYSTEM_PROMPT
+from utils.prompt_builder import build_angel_messages, record_prompt_usage
+from utils.llm_gateway import chat_completion
 
-client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 # Implementation task structure
 IMPLEMENTATION_TASKS = {
@@ -224,15 +223,16 @@ async def generate_task_guidance(task: Dict, session_data: Dict) -> str:
     """
     
     try:
-        response = await client.chat.completions.create(
+        response = await chat_completion(
+            "implementation_service.generate_task_guidance",
             model="gpt-4o",
-            messages=[
-                {"role": "system", "content": ANGEL_SYSTEM_PROMPT},
+            messages=build_angel_messages(
                 {"role": "user", "content": guidance_prompt}
-            ],
+            ),
             temperature=0.7,
             max_tokens=1000
         )
+        record_prompt_usage("implementation_guidance", response.usage)
         return response.choices[0].message.content
     except Exception as e:
         print(f"Error generating task guidance: {e}")
@@ -350,15 +350,16 @@ async def generate_kickstart_plan(task: Dict, session_data: Dict) -> Dict:
     """
     
     try:
-        response = await client.chat.completions.create(
+        response = await chat_completion(
+            "implementation_service.generate_kickstart_plan",
             model="gpt-4o",
-            messages=[
-                {"role": "system", "content": ANGEL_SYSTEM_PROMPT},
+            messages=build_angel_messages(
                 {"role": "user", "content": kickstart_prompt}
-            ],
+            ),
             temperature=0.7,
             max_tokens=1500
         )
+        record_prompt_usage("implementation_kickstart", response.usage)
         
         return {
             "plan": response.choices[0].message.content,
@@ -406,15 +407,16 @@ async def handle_task_completion(task_id: str, completion_data: Dict, session_da
     """
     
     try:
-        response = await client.chat.completions.create(
+        response = await chat_completion(
+            "implementation_service.handle_task_completion",
             model="gpt-4o",
-            messages=[
-                {"role": "system", "content": ANGEL_SYSTEM_PROMPT},
+            messages=build_angel_messages(
                 {"role": "user", "content": verification_prompt}
-            ],
+            ),
             temperature=0.7,
             max_tokens=800
         )
+        record_prompt_usage("implementation_verification", response.usage)
         
         return {
             "verification": response.choices[0].message.content,
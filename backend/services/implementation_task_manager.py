@@ -1,4 +1,3 @@
-from openai import AsyncOpenAI
 import os
 import json
 from datetime import datetime
@@ -7,7 +6,6 @@ from services.specialized_agents_service import agents_manager
 from services.rag_service import conduct_rag_research, validate_with_rag, generate_rag_insights
 from services.service_provider_tables_service import generate_provider_table, get_task_providers
 
-client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 class ImplementationTaskManager:
     """Manages implementation tasks with RAG-powered guidance and service providers"""
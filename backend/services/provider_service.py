@@ -1,11 +1,11 @@
-from openai import AsyncOpenAI
 import os
 import json
 from datetime import datetime
 from typing import Dict, List, Optional
 from services.angel_service import conduct_web_search
+from utils.research_executor import run_research
+from utils.llm_gateway import chat_completion
 
-client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 # Provider categories and templates
 PROVIDER_CATEGORIES = {
@@ -40,9 +40,14 @@ async def generate_provider_table(task_type: str, industry: str, location: str,
         previous_year = current_year - 1
         
         # Search for local and national providers
-        local_providers_research = await conduct_web_search(f"site:yelp.com OR site:google.com {task_type} services {location} {industry} {previous_year}")
-        national_providers_research = await conduct_web_search(f"best {task_type} services {industry} {previous_year}")
-        industry_specific_research = await conduct_web_search(f"{industry} {task_type} providers {location} {previous_year}")
+        research = await run_research({
+            "local_providers_research": conduct_web_search(f"site:yelp.com OR site:google.com {task_type} services {location} {industry} {previous_year}"),
+            "national_providers_research": conduct_web_search(f"best {task_type} services {industry} {previous_year}"),
+            "industry_specific_research": conduct_web_search(f"{industry} {task_type} providers {location} {previous_year}")
+        }, label="provider_table_research")
+        local_providers_research = research["local_providers_research"]
+        national_providers_research = research["national_providers_research"]
+        industry_specific_research = research["industry_specific_research"]
         
         # Generate provider recommendations using AI
         provider_prompt = f"""
@@ -78,7 +83,8 @@ async def generate_provider_table(task_type: str, industry: str, location: str,
         - Mark local providers clearly with "local": true
         """
         
-        response = await client.chat.completions.create(
+        response = await chat_completion(
+            "provider_service.generate_provider_table",
             model="gpt-4o",
             messages=[{"role": "user", "content": provider_prompt}],
             temperature=0.3
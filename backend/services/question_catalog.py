@@ -0,0 +1,80 @@
+import os
+import re
+from collections import OrderedDict
+from typing import Dict, Optional
+from utils.constant import ANGEL_SYSTEM_PROMPT
+
+# Sessions whose asked-question wording is kept in memory
+QUESTION_CACHE_MAX_SESSIONS = int(os.getenv("QUESTION_CACHE_MAX_SESSIONS", "1000"))
+
+TAGGED_QUESTION_PATTERN = re.compile(r"^\[\[Q:((?:KYC|BUSINESS_PLAN)\.\d{2})\]\] (.+?)(?=\n\s*\n|\Z)", re.MULTILINE | re.DOTALL)
+# Section 1 of the business plan is written as "**Question N:** ..." instead of tags
+NUMBERED_QUESTION_PATTERN = re.compile(r"^\*\*Question (\d+):\*\* (.+?)(?=\n\s*\n|\Z)", re.MULTILINE | re.DOTALL)
+# Prompt notes such as "(Rating question - shows special UI)" are not shown to the user
+PROMPT_NOTE_PATTERN = re.compile(r"^\(.*\)$")
+QUESTION_TAG_PATTERN = re.compile(r"\[\[Q:([A-Z_]+\.\d{2})\]\]")
+
+def build_question_catalog(prompt: str = ANGEL_SYSTEM_PROMPT) -> Dict[str, str]:
+    """Canonical text of every KYC and BUSINESS_PLAN question in the system prompt, by tag"""
+    catalog = {}
+    for tag, text in TAGGED_QUESTION_PATTERN.findall(prompt):
+        catalog.setdefault(tag, text)
+    for number, text in NUMBERED_QUESTION_PATTERN.findall(prompt):
+        catalog.setdefault(f"BUSINESS_PLAN.{int(number):02d}", text)
+    return {
+        tag: "\n".join(line for line in text.strip().splitlines() if not PROMPT_NOTE_PATTERN.match(line.strip()))
+        for tag, text in catalog.items()
+    }
+
+QUESTION_CATALOG = build_question_catalog()
+
+# session_id -> {tag: question as Angel first asked it in that session}
+session_questions = OrderedDict()
+
+def capture_question(session_id: str, tag: str, reply: str) -> None:
+    """Remember how a question was worded the first time it was asked in a session"""
+    if not session_id or not tag or not reply:
+        return
+    questions = session_questions.get(session_id)
+    if questions is None:
+        questions = session_questions[session_id] = {}
+        while len(session_questions) > QUESTION_CACHE_MAX_SESSIONS:
+            session_questions.popitem(last=False)
+    session_questions.move_to_end(session_id)
+    if tag in questions:
+        return
+    # The question follows its tag; anything before it acknowledges the previous answer
+    text = reply.split(f"[[Q:{tag}]]", 1)[-1].strip()
+    if text:
+        questions[tag] = text
+
+def capture_questions_from_history(session_id: str, history: list) -> None:
+    """Backfill a session's questions from its stored chat history"""
+    for message in history:
+        if message.get("role") != "assistant":
+            continue
+        match = QUESTION_TAG_PATTERN.search(message.get("content") or "")
+        if match:
+            capture_question(session_id, match.group(1), message["content"])
+
+def get_question_text(session_id: Optional[str], tag: str) -> Optional[str]:
+    """The session's own wording of a question, else the canonical text; None for unknown tags"""
+    questions = session_questions.get(session_id) if session_id else None
+    if questions and tag in questions:
+        session_questions.move_to_end(session_id)
+        return questions[tag]
+    return QUESTION_CATALOG.get(tag)
+
+def render_question(session_id: Optional[str], tag: str) -> Optional[str]:
+    """A question ready to re-display, with its tag, or None when the tag is unknown"""
+    text = get_question_text(session_id, tag)
+    return f"[[Q:{tag}]] {text}" if text else None
+
+def find_previous_answer(history: list, tag: str) -> Optional[str]:
+    """The user's most recent reply to the question with this tag"""
+    for index in range(len(history) - 2, -1, -1):
+        message = history[index]
+        if message.get("role") == "assistant" and f"[[Q:{tag}]]" in (message.get("content") or ""):
+            following = history[index + 1]
+            return following["content"] if following.get("role") == "user" else None
+    return None
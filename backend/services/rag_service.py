@@ -1,4 +1,3 @@
-from openai import AsyncOpenAI
 import os
 import json
 import re
@@ -6,16 +5,19 @@ from datetime import datetime
 from typing import Dict, List, Any, Optional, Tuple
 import asyncio
 from services.angel_service import conduct_web_search
+from utils.research_cache import ResearchCache, make_cache_key
+from utils.single_flight import SingleFlight
+from utils.llm_gateway import chat_completion
 
-client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 class RAGResearchEngine:
     """Retrieval Augmentation Generation engine for comprehensive research"""
     
     def __init__(self):
-        # Add caching for performance optimization
-        self.cache = {}
+        # Bounded LRU/TTL cache, optionally shared across workers
         self.cache_ttl = 3600  # 1 hour cache TTL
+        self.cache = ResearchCache("rag_research", self.cache_ttl)
+        self.flights = SingleFlight("rag_research")
         self.authoritative_sources = {
             "government": [
                 "sba.gov", "sec.gov", "irs.gov", "uspto.gov", "ftc.gov",
@@ -47,12 +49,17 @@ class RAGResearchEngine:
         """Conduct comprehensive research using multiple authoritative sources with caching"""
         
         # Check cache first for performance
-        cache_key = f"{query}_{research_depth}_{hash(str(business_context))}"
-        if cache_key in self.cache:
-            cached_result = self.cache[cache_key]
-            if (datetime.now() - cached_result['timestamp']).seconds < self.cache_ttl:
-                print(f"📋 Using cached research for: {query[:50]}...")
-                return cached_result['data']
+        cache_key = make_cache_key(query, research_depth, business_context)
+        cached_result = await self.cache.get(cache_key)
+        if cached_result is not None:
+            print(f"📋 Using cached research for: {query[:50]}...")
+            return cached_result
+        
+        # Identical research already running for another request is awaited, not repeated
+        return await self.flights.do(cache_key, lambda: self._run_comprehensive_research(cache_key, query, business_context, research_depth))
+    
+    async def _run_comprehensive_research(self, cache_key: str, query: str, business_context: Dict[str, Any], research_depth: str) -> Dict[str, Any]:
+        """Research behind conduct_comprehensive_research; publishes the result to the cache"""
         
         # Enhance query with business context
         enhanced_query = self._enhance_query(query, business_context)
@@ -100,10 +107,7 @@ class RAGResearchEngine:
         }
         
         # Cache the result
-        self.cache[cache_key] = {
-            'data': result,
-            'timestamp': datetime.now()
-        }
+        await self.cache.set(cache_key, result)
         
         return result
     
@@ -292,7 +296,8 @@ class RAGResearchEngine:
         """
         
         try:
-            response = await client.chat.completions.create(
+            response = await chat_completion(
+                "rag_service.RAGResearchEngine._generate_research_analysis",
                 model="gpt-4o",
                 messages=[{"role": "user", "content": analysis_prompt}],
                 temperature=0.3,
@@ -337,7 +342,8 @@ class RAGResearchEngine:
         """
         
         try:
-            response = await client.chat.completions.create(
+            response = await chat_completion(
+                "rag_service.RAGResearchEngine.validate_user_input",
                 model="gpt-4o",
                 messages=[{"role": "user", "content": validation_prompt}],
                 temperature=0.2,
@@ -405,7 +411,8 @@ class RAGResearchEngine:
         """
         
         try:
-            response = await client.chat.completions.create(
+            response = await chat_completion(
+                "rag_service.RAGResearchEngine.generate_educational_insights",
                 model="gpt-4o",
                 messages=[{"role": "user", "content": insights_prompt}],
                 temperature=0.4,
@@ -420,9 +427,10 @@ class RAGServiceProviderEngine:
     """RAG engine specifically for service provider research and recommendations"""
     
     def __init__(self):
-        # Add caching for performance optimization
-        self.cache = {}
+        # Bounded LRU/TTL cache, optionally shared across workers
         self.cache_ttl = 1800  # 30 minutes cache TTL
+        self.cache = ResearchCache("rag_service_providers", self.cache_ttl)
+        self.flights = SingleFlight("rag_service_providers")
         
         # Reduced sources for faster response (max 2 per category)
         self.provider_sources = {
@@ -438,11 +446,15 @@ class RAGServiceProviderEngine:
         """Research service providers for a specific service type"""
         
         # Check cache first
-        cache_key = f"{service_type}_{business_context.get('industry', '')}_{location or 'default'}"
-        if cache_key in self.cache:
-            cache_entry = self.cache[cache_key]
-            if (datetime.now() - cache_entry['timestamp']).seconds < self.cache_ttl:
-                return cache_entry['data']
+        cache_key = make_cache_key(service_type, business_context.get('industry', ''), location or 'default')
+        cached_result = await self.cache.get(cache_key)
+        if cached_result is not None:
+            return cached_result
+        
+        return await self.flights.do(cache_key, lambda: self._run_provider_research(cache_key, service_type, business_context, location))
+    
+    async def _run_provider_research(self, cache_key: str, service_type: str, business_context: Dict[str, Any], location: str = None) -> Dict[str, Any]:
+        """Research behind research_service_providers; publishes the result to the cache"""
         
         # Determine relevant sources for the service type
         relevant_sources = self.provider_sources.get(service_type, self.provider_sources["general"])
@@ -478,10 +490,7 @@ class RAGServiceProviderEngine:
             "timestamp": datetime.now().isoformat()
         }
         
-        self.cache[cache_key] = {
-            "data": result,
-            "timestamp": datetime.now()
-        }
+        await self.cache.set(cache_key, result)
         
         return result
     
@@ -592,7 +601,8 @@ class RAGServiceProviderEngine:
         """
         
         try:
-            response = await client.chat.completions.create(
+            response = await chat_completion(
+                "rag_service.RAGServiceProviderEngine._generate_provider_recommendations",
                 model="gpt-4o",
                 messages=[{"role": "user", "content": recommendations_prompt}],
                 temperature=0.3,
@@ -1,12 +1,12 @@
-from openai import AsyncOpenAI
 import os
 import json
 import random
 from datetime import datetime
 from typing import Dict, List, Optional
-from utils.constant import ANGEL_SYSTEM_PROMPT
+from utils.prompt_builder import build_angel_messages, record_prompt_usage
+from utils.job_runner import report_job_progress
+from utils.llm_gateway import chat_completion
 
-client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 # Motivational quotes for business implementation
 MOTIVATIONAL_QUOTES = [
@@ -218,15 +218,16 @@ async def generate_implementation_insights(business_context: Dict, roadmap_conte
     """
     
     try:
-        response = await client.chat.completions.create(
+        response = await chat_completion(
+            "roadmap_to_implementation_service.generate_implementation_insights",
             model="gpt-4o",
-            messages=[
-                {"role": "system", "content": ANGEL_SYSTEM_PROMPT},
+            messages=build_angel_messages(
                 {"role": "user", "content": insights_prompt}
-            ],
+            ),
             temperature=0.7,
             max_tokens=1000
         )
+        record_prompt_usage("implementation_insights", response.usage)
         return response.choices[0].message.content
     except Exception as e:
         print(f"Error generating implementation insights: {e}")
@@ -244,12 +245,15 @@ async def prepare_implementation_transition(session_data: Dict, roadmap_content:
     
     try:
         # Get motivational quote
+        await report_job_progress("motivational_quote", 0.1)
         motivational_quote = await get_motivational_quote(business_context)
         
         # Get service provider preview
+        await report_job_progress("service_providers", 0.3)
         service_providers = await get_service_provider_preview(business_context)
         
         # Generate implementation insights
+        await report_job_progress("implementation_insights", 0.6)
         implementation_insights = await generate_implementation_insights(business_context, roadmap_content)
         
         return {
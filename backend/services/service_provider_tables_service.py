@@ -1,12 +1,11 @@
-from openai import AsyncOpenAI
 import os
 import json
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 from services.rag_service import research_service_providers_rag
 from services.specialized_agents_service import agents_manager
+from utils.llm_gateway import chat_completion
 
-client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 class ServiceProviderTableGenerator:
     """Generate comprehensive service provider tables with local providers"""
@@ -388,7 +387,8 @@ class ServiceProviderTableGenerator:
         """
         
         try:
-            response = await client.chat.completions.create(
+            response = await chat_completion(
+                "service_provider_tables_service.ServiceProviderTableGenerator._create_structured_providers",
                 model="gpt-4o",
                 messages=[{"role": "user", "content": provider_prompt}],
                 temperature=0.4,
@@ -572,7 +572,8 @@ class ServiceProviderTableGenerator:
         """
         
         try:
-            response = await client.chat.completions.create(
+            response = await chat_completion(
+                "service_provider_tables_service.ServiceProviderTableGenerator._generate_comprehensive_table",
                 model="gpt-4o",
                 messages=[{"role": "user", "content": table_prompt}],
                 temperature=0.3,
@@ -638,7 +639,8 @@ class ServiceProviderTableGenerator:
         """
         
         try:
-            response = await client.chat.completions.create(
+            response = await chat_completion(
+                "service_provider_tables_service.ServiceProviderTableGenerator._enhance_table_with_agent_guidance",
                 model="gpt-4o",
                 messages=[{"role": "user", "content": enhancement_prompt}],
                 temperature=0.3,
@@ -1,7 +1,9 @@
-from db.supabase import supabase
+from db.supabase import get_async_db
+from utils.request_timing import timed
 
+@timed("db_write")
 async def create_session(user_id: str, title: str):
-    response = supabase \
+    response = await get_async_db() \
         .from_("chat_sessions") \
         .insert({
             "user_id": user_id, 
@@ -18,11 +20,12 @@ async def create_session(user_id: str, title: str):
         raise Exception("Failed to create session")
 
 async def list_sessions(user_id: str):
-    response = supabase.from_("chat_sessions").select("*").eq("user_id", user_id).order("updated_at", desc=True).execute()
+    response = await get_async_db().from_("chat_sessions").select("*").eq("user_id", user_id).order("updated_at", desc=True).execute()
     return response.data
 
+@timed("session_fetch")
 async def get_session(session_id: str, user_id: str):
-    response = supabase.from_("chat_sessions").select("*").eq("id", session_id).eq("user_id", user_id).single().execute()
+    response = await get_async_db().from_("chat_sessions").select("*").eq("id", session_id).eq("user_id", user_id).single().execute()
     
     if response.data:
         session = response.data
@@ -34,6 +37,7 @@ async def get_session(session_id: str, user_id: str):
     else:
         raise Exception("Session not found")
 
+@timed("db_write")
 async def patch_session(session_id: str, updates: dict):
-    response = supabase.from_("chat_sessions").update(updates).eq("id", session_id).execute()
+    response = await get_async_db().from_("chat_sessions").update(updates).eq("id", session_id).execute()
     return response.data[0]
\ No newline at end of file
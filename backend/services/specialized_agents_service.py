@@ -1,11 +1,18 @@
-from openai import AsyncOpenAI
 import os
 import json
 from datetime import datetime
+import time
+import asyncio
 from typing import Dict, List, Any, Optional
 from services.angel_service import conduct_web_search
+from utils.research_executor import run_research
+from utils.llm_gateway import chat_completion
 
-client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+# Time budget in seconds for one agent (research + guidance completion)
+AGENT_TIME_BUDGET = float(os.getenv("AGENT_TIME_BUDGET", "45"))
+# Share of the agent budget spent on source research before the agent answers with what it has
+AGENT_RESEARCH_DEADLINE = float(os.getenv("AGENT_RESEARCH_DEADLINE", "20"))
 
 class SpecializedAgent:
     """Base class for specialized agents"""
@@ -21,11 +28,15 @@ class SpecializedAgent:
             # Combine query with business context for more targeted research
             enhanced_query = f"{query} {business_context.get('industry', '')} {business_context.get('location', '')}"
             
-            # Use multiple research sources
+            # Search all research sources concurrently (capped by the shared research executor)
+            results = await run_research(
+                {source: conduct_web_search(f"site:{source} {enhanced_query}") for source in self.research_sources},
+                deadline=AGENT_RESEARCH_DEADLINE,
+                label=f"{self.name} research"
+            )
             research_results = []
             for source in self.research_sources:
-                search_query = f"site:{source} {enhanced_query}"
-                result = await conduct_web_search(search_query)
+                result = results.get(source)
                 if result and "unable to conduct web research" not in result:
                     research_results.append(f"Source: {source}\n{result}")
             
@@ -81,7 +92,8 @@ class LegalComplianceAgent(SpecializedAgent):
         """
         
         try:
-            response = await client.chat.completions.create(
+            response = await chat_completion(
+                "specialized_agents_service.LegalComplianceAgent",
                 model="gpt-4o",
                 messages=[{"role": "user", "content": guidance_prompt}],
                 temperature=0.3,
@@ -146,7 +158,8 @@ class FinancialPlanningAgent(SpecializedAgent):
         """
         
         try:
-            response = await client.chat.completions.create(
+            response = await chat_completion(
+                "specialized_agents_service.FinancialPlanningAgent",
                 model="gpt-4o",
                 messages=[{"role": "user", "content": guidance_prompt}],
                 temperature=0.3,
@@ -211,7 +224,8 @@ class ProductOperationsAgent(SpecializedAgent):
         """
         
         try:
-            response = await client.chat.completions.create(
+            response = await chat_completion(
+                "specialized_agents_service.ProductOperationsAgent",
                 model="gpt-4o",
                 messages=[{"role": "user", "content": guidance_prompt}],
                 temperature=0.3,
@@ -276,7 +290,8 @@ class MarketingCustomerAgent(SpecializedAgent):
         """
         
         try:
-            response = await client.chat.completions.create(
+            response = await chat_completion(
+                "specialized_agents_service.MarketingCustomerAgent",
                 model="gpt-4o",
                 messages=[{"role": "user", "content": guidance_prompt}],
                 temperature=0.3,
@@ -341,7 +356,8 @@ class BusinessStrategyAgent(SpecializedAgent):
         """
         
         try:
-            response = await client.chat.completions.create(
+            response = await chat_completion(
+                "specialized_agents_service.BusinessStrategyAgent",
                 model="gpt-4o",
                 messages=[{"role": "user", "content": guidance_prompt}],
                 temperature=0.3,
@@ -406,7 +422,8 @@ class RoadmapExecutionAgent(SpecializedAgent):
         """
         
         try:
-            response = await client.chat.completions.create(
+            response = await chat_completion(
+                "specialized_agents_service.RoadmapExecutionAgent",
                 model="gpt-4o",
                 messages=[{"role": "user", "content": guidance_prompt}],
                 temperature=0.3,
@@ -453,28 +470,50 @@ class SpecializedAgentsManager:
         agent = self.agents[agent_type]
         return await agent.provide_expert_guidance(question, business_context, conversation_history)
     
-    async def get_multi_agent_guidance(self, question: str, business_context: Dict[str, Any], conversation_history: List[Dict], relevant_agents: List[str] = None) -> Dict[str, Any]:
-        """Get guidance from multiple relevant agents"""
+    async def get_multi_agent_guidance(self, question: str, business_context: Dict[str, Any], conversation_history: List[Dict], relevant_agents: List[str] = None, time_budget: float = AGENT_TIME_BUDGET) -> Dict[str, Any]:
+        """
+        Get guidance from multiple relevant agents, run concurrently.
+
+        Each agent gets time_budget seconds. Agents that fail or run out of time are
+        reported with an error and the response is marked partial, so callers still
+        get the guidance that did finish.
+        """
         
         if relevant_agents is None:
             # Determine relevant agents based on question content
             relevant_agents = self._determine_relevant_agents(question, business_context)
         
-        guidance_results = {}
-        
-        for agent_type in relevant_agents:
-            if agent_type in self.agents:
-                try:
-                    guidance = await self.get_agent_guidance(agent_type, question, business_context, conversation_history)
-                    guidance_results[agent_type] = guidance
-                except Exception as e:
-                    guidance_results[agent_type] = {
-                        "error": f"Failed to get guidance from {agent_type}: {str(e)}"
-                    }
+        start_time = time.time()
+        agent_types = [agent_type for agent_type in relevant_agents if agent_type in self.agents]
+        
+        async def run_agent(agent_type):
+            try:
+                return await asyncio.wait_for(
+                    self.get_agent_guidance(agent_type, question, business_context, conversation_history),
+                    time_budget
+                )
+            except asyncio.TimeoutError:
+                print(f"⏱️ {agent_type} agent exceeded its {time_budget}s budget")
+                return {
+                    "error": f"{agent_type} guidance timed out after {time_budget}s",
+                    "timed_out": True
+                }
+            except Exception as e:
+                return {
+                    "error": f"Failed to get guidance from {agent_type}: {str(e)}"
+                }
+        
+        results = await asyncio.gather(*(run_agent(agent_type) for agent_type in agent_types))
+        guidance_results = dict(zip(agent_types, results))
+        
+        incomplete_agents = [agent_type for agent_type, guidance in guidance_results.items() if "error" in guidance]
+        print(f"🤝 Multi-agent guidance: {len(agent_types) - len(incomplete_agents)}/{len(agent_types)} agents completed in {time.time() - start_time:.2f}s")
         
         return {
             "multi_agent_guidance": guidance_results,
             "relevant_agents": relevant_agents,
+            "partial": bool(incomplete_agents),
+            "incomplete_agents": incomplete_agents,
             "timestamp": datetime.now().isoformat()
         }
     
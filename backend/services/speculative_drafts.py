@@ -0,0 +1,100 @@
+import os
+import time
+import asyncio
+import contextvars
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+from utils.research_cache import make_cache_key
+from utils.rate_limiter import set_rate_limit_identity
+
+# Opt-in: pre-generate command replies (Draft, ...) as soon as a BUSINESS_PLAN question is asked
+SPECULATIVE_DRAFTS = os.getenv("SPECULATIVE_DRAFTS", "false").lower() == "true"
+# Commands pre-generated per question (comma-separated: draft, support, draft more)
+SPECULATIVE_COMMANDS = [c.strip() for c in os.getenv("SPECULATIVE_COMMANDS", "draft").split(",") if c.strip()]
+# Low-priority budget: speculations running at once in this worker; extra ones are skipped, not queued
+SPECULATIVE_CONCURRENCY = int(os.getenv("SPECULATIVE_CONCURRENCY", "2"))
+SPECULATIVE_TTL = float(os.getenv("SPECULATIVE_TTL", "1800"))  # 30 minutes
+SPECULATIVE_MAX_SESSIONS = int(os.getenv("SPECULATIVE_MAX_SESSIONS", "500"))
+# Messages the command generators read (history[-10:]); part of the cache key
+SPECULATIVE_HISTORY_WINDOW = 10
+
+# session_id -> {"key": (tag, history hash), "created": ts, "tasks": {command: task}}
+speculations = OrderedDict()
+speculation_stats = {"scheduled": 0, "skipped_busy": 0, "hits": 0, "joined": 0, "misses": 0, "invalidated": 0, "errors": 0}
+
+def history_hash(history: list) -> str:
+    window = history[-SPECULATIVE_HISTORY_WINDOW:]
+    return make_cache_key(len(history), [(message.get("role"), message.get("content")) for message in window])
+
+def speculation_key(session_data: Optional[dict], history: list) -> tuple:
+    return ((session_data or {}).get("asked_q"), history_hash(history))
+
+def invalidate_speculations(session_id: str) -> None:
+    """Drop a session's speculative replies - they were generated for an older answer"""
+    entry = speculations.pop(session_id, None)
+    if entry is None:
+        return
+    speculation_stats["invalidated"] += 1
+    for task in entry["tasks"].values():
+        task.cancel()
+
+def _task_finished(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        speculation_stats["errors"] += 1
+        print(f"⚠️ Speculative generation failed: {task.exception()}")
+
+def _running_tasks() -> list:
+    return [task for entry in speculations.values() for task in entry["tasks"].values() if not task.done()]
+
+def schedule_speculations(session_id: str, session_data: dict, history: list, handlers: Dict[str, Callable[..., Awaitable[str]]]) -> None:
+    """Start generating the session's command replies for its current question in the background"""
+    if not SPECULATIVE_DRAFTS:
+        return
+    invalidate_speculations(session_id)
+    session_data, history = dict(session_data), list(history)
+    entry = {"key": speculation_key(session_data, history), "created": time.time(), "tasks": {}}
+    for command in SPECULATIVE_COMMANDS:
+        handler = handlers.get(command)
+        if handler is None:
+            continue
+        # Interactive traffic comes first: only start while the low-priority budget has room
+        if len(_running_tasks()) + len(entry["tasks"]) >= SPECULATIVE_CONCURRENCY:
+            speculation_stats["skipped_busy"] += 1
+            continue
+        # Fresh context so the speculation's spans are not attributed to the request that started it;
+        # its LLM calls still count against the session's rate limits
+        context = contextvars.Context()
+        context.run(set_rate_limit_identity, session_data.get("user_id"), session_id)
+        task = asyncio.get_running_loop().create_task(handler("", history, session_data), context=context)
+        task.add_done_callback(_task_finished)
+        entry["tasks"][command] = task
+        speculation_stats["scheduled"] += 1
+    if entry["tasks"]:
+        speculations[session_id] = entry
+        while len(speculations) > SPECULATIVE_MAX_SESSIONS:
+            _, evicted = speculations.popitem(last=False)
+            for task in evicted["tasks"].values():
+                task.cancel()
+
+async def run_command(command: str, handler: Callable[..., Awaitable[str]], history: list, session_data: Optional[dict]) -> str:
+    """
+    A command reply, from a matching speculation when there is one (awaiting it if it is
+    still running), otherwise generated now. A speculation is used at most once.
+    """
+    session_id = (session_data or {}).get("id")
+    entry = speculations.get(session_id) if session_id else None
+    task = None
+    if entry is not None and entry["key"] == speculation_key(session_data, history) and time.time() - entry["created"] < SPECULATIVE_TTL:
+        task = entry["tasks"].pop(command, None)
+    if task is not None and not task.cancelled():
+        speculation_stats["hits" if task.done() else "joined"] += 1
+        try:
+            return await asyncio.shield(task)
+        except Exception as e:
+            print(f"⚠️ Speculative {command} unusable ({e}) - generating now")
+    elif SPECULATIVE_DRAFTS:
+        speculation_stats["misses"] += 1
+    return await handler("", history, session_data)
+
+def get_speculation_stats() -> Dict[str, Any]:
+    return {**speculation_stats, "sessions": len(speculations), "running": len(_running_tasks())}
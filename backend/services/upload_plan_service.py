@@ -1,161 +1,294 @@
+import io
 import os
 import re
 import json
-from typing import Dict, Any, Optional
-import PyPDF2
-import docx
-from docx import Document
-import tempfile
-from openai import AsyncOpenAI
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from utils.context_window import count_tokens, CHARS_PER_TOKEN
+from utils.research_executor import run_research
+from utils.llm_gateway import chat_completion
 
-client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-async def process_uploaded_plan(file_path: str, file_extension: str) -> str:
+# Document parsing is CPU-bound; it runs in a process pool so it never blocks the event loop
+UPLOAD_PARSE_WORKERS = int(os.getenv("UPLOAD_PARSE_WORKERS", "2"))
+UPLOAD_PARSE_TIMEOUT = float(os.getenv("UPLOAD_PARSE_TIMEOUT", "120"))
+SUPPORTED_PLAN_EXTENSIONS = ('.pdf', '.docx', '.txt')
+
+_parse_pool = None
+
+def _get_parse_pool():
+    global _parse_pool
+    if _parse_pool is None:
+        _parse_pool = ProcessPoolExecutor(max_workers=UPLOAD_PARSE_WORKERS)
+    return _parse_pool
+
+def iter_pdf_pages(content: bytes) -> Iterator[str]:
+    """Yield the text of each PDF page"""
+    # Parsers are imported in the parse pool on first use, not at app startup
+    import PyPDF2
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(content))
+    for page in pdf_reader.pages:
+        yield page.extract_text() or ""
+
+def iter_docx_blocks(content: bytes) -> Iterator[str]:
+    """Yield each DOCX paragraph, then each table row"""
+    from docx import Document
+    doc = Document(io.BytesIO(content))
+    for paragraph in doc.paragraphs:
+        yield paragraph.text
+    for table in doc.tables:
+        for row in table.rows:
+            yield " ".join(cell.text for cell in row.cells)
+
+def iter_txt_lines(content: bytes) -> Iterator[str]:
+    """Yield each line of a UTF-8 text file"""
+    for line in io.TextIOWrapper(io.BytesIO(content), encoding='utf-8'):
+        yield line.rstrip("\r\n")
+
+def iter_plan_segments(content: bytes, file_extension: str) -> Iterator[str]:
+    """Yield the document's text per page (PDF), paragraph/table row (DOCX) or line (TXT)"""
+    if file_extension == '.pdf':
+        return iter_pdf_pages(content)
+    elif file_extension == '.docx':
+        return iter_docx_blocks(content)
+    elif file_extension == '.txt':
+        return iter_txt_lines(content)
+    elif file_extension == '.doc':
+        raise ValueError("DOC files are not supported. Please convert to DOCX format.")
+    raise ValueError(f"Unsupported file type: {file_extension}")
+
+def parse_plan_text(content: bytes, file_extension: str) -> str:
+    """Parse a whole document to text (runs inside the parse pool)"""
+    return "\n".join(iter_plan_segments(content, file_extension)).strip()
+
+def shutdown_parse_pool():
+    global _parse_pool
+    if _parse_pool is not None:
+        _parse_pool.shutdown(wait=False, cancel_futures=True)
+        _parse_pool = None
+
+def _recycle_parse_pool():
+    """Kill the pool's processes (a timed-out parse keeps running otherwise); the next parse starts a fresh pool"""
+    global _parse_pool
+    pool, _parse_pool = _parse_pool, None
+    if pool is None:
+        return
+    if hasattr(pool, "terminate_workers"):  # Python 3.14+
+        pool.terminate_workers()
+        return
+    # No public way to stop a busy worker before 3.14: ProcessPoolExecutor._processes (pid -> Process) exists in
+    # CPython 3.3-3.13. If it is ever missing the stuck worker is left to finish, but shutdown still retires the pool.
+    for process in list((getattr(pool, "_processes", None) or {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+async def process_uploaded_plan(content: bytes, file_extension: str) -> str:
     """
-    Process uploaded business plan file and extract text content
-    Supports: PDF, DOC, DOCX, TXT
+    Extract the text of an uploaded business plan held in memory
+    Supports: PDF, DOCX, TXT
     """
+    loop = asyncio.get_running_loop()
     try:
-        if file_extension == '.pdf':
-            return await extract_pdf_text(file_path)
-        elif file_extension == '.docx':
-            return await extract_docx_text(file_path)
-        elif file_extension == '.doc':
-            return await extract_doc_text(file_path)
-        elif file_extension == '.txt':
-            return await extract_txt_text(file_path)
-        else:
-            raise ValueError(f"Unsupported file type: {file_extension}")
-            
+        try:
+            parse = loop.run_in_executor(_get_parse_pool(), parse_plan_text, content, file_extension)
+        except (OSError, NotImplementedError, BrokenProcessPool) as e:
+            # No multiprocessing available (e.g. restricted serverless runtime) - parse on a thread instead
+            global _parse_pool
+            _parse_pool = None
+            print(f"⚠️ Parse pool unavailable ({e}) - parsing on a worker thread")
+            parse = asyncio.to_thread(parse_plan_text, content, file_extension)
+        try:
+            return await asyncio.wait_for(parse, UPLOAD_PARSE_TIMEOUT)
+        except asyncio.TimeoutError:
+            # Parses in flight on the same pool fail too, but the stuck worker is freed
+            print(f"⏱️ Plan parse exceeded {UPLOAD_PARSE_TIMEOUT}s - recycling the parse pool")
+            _recycle_parse_pool()
+            raise
     except Exception as e:
         print(f"Error processing file: {e}")
         raise Exception(f"Failed to process file: {str(e)}")
 
-async def extract_pdf_text(file_path: str) -> str:
-    """Extract text from PDF file"""
-    try:
-        with open(file_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            text = ""
-            
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                text += page.extract_text() + "\n"
-                
-        return text.strip()
-    except Exception as e:
-        raise Exception(f"Error extracting PDF text: {str(e)}")
+# The fields extracted from an uploaded plan, with the description shown to the model
+PLAN_INFO_FIELDS = {
+    "business_name": "Company name",
+    "business_type": "Type of business (e.g., service, product, technology)",
+    "industry": "Industry sector",
+    "mission": "Mission statement",
+    "vision": "Vision statement",
+    "tagline": "Company tagline or slogan",
+    "target_market": "Primary target customers",
+    "value_proposition": "What value the business provides",
+    "revenue_model": "How the business makes money",
+    "competitive_advantage": "What makes this business unique",
+    "problem_solved": "What problem does the business solve",
+    "solution": "How the business solves the problem",
+    "market_size": "Market size or opportunity",
+    "business_structure": "Legal structure (LLC, Corp, etc.)",
+    "location": "Business location",
+    "founding_year": "Year founded or planned founding",
+    "team_size": "Current or planned team size",
+    "funding_needs": "Funding requirements",
+    "key_metrics": "Important business metrics",
+    "goals": "Business goals and objectives",
+}
 
-async def extract_docx_text(file_path: str) -> str:
-    """Extract text from DOCX file"""
-    try:
-        doc = Document(file_path)
-        text = ""
-        
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-            
-        # Also extract text from tables
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    text += cell.text + " "
-                text += "\n"
-                
-        return text.strip()
-    except Exception as e:
-        raise Exception(f"Error extracting DOCX text: {str(e)}")
+# Long plans are split into chunks of at most this many tokens and extracted chunk by chunk
+PLAN_EXTRACTION_CHUNK_TOKENS = int(os.getenv("PLAN_EXTRACTION_CHUNK_TOKENS", "6000"))
+# Chunk extractions in flight at once for a single upload
+PLAN_EXTRACTION_CONCURRENCY = int(os.getenv("PLAN_EXTRACTION_CONCURRENCY", "4"))
+# Per-chunk timeout and overall budget in seconds; chunks still running at the deadline are dropped
+PLAN_EXTRACTION_CHUNK_TIMEOUT = float(os.getenv("PLAN_EXTRACTION_CHUNK_TIMEOUT", "45"))
+PLAN_EXTRACTION_DEADLINE = float(os.getenv("PLAN_EXTRACTION_DEADLINE", "90"))
 
-async def extract_doc_text(file_path: str) -> str:
-    """Extract text from DOC file (requires additional library)"""
-    try:
-        # For .doc files, we'd need python-docx2txt or similar
-        # For now, return a message to convert to .docx
-        raise Exception("DOC files are not supported. Please convert to DOCX format.")
-    except Exception as e:
-        raise Exception(f"Error extracting DOC text: {str(e)}")
+def split_plan_into_chunks(content: str, max_tokens: int = None) -> List[str]:
+    """Split plan text into chunks of at most max_tokens, breaking between paragraphs where possible"""
+    max_tokens = max_tokens or PLAN_EXTRACTION_CHUNK_TOKENS
+    chunks = []
+    current = []
+    current_tokens = 0
 
-async def extract_txt_text(file_path: str) -> str:
-    """Extract text from TXT file"""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            return file.read().strip()
-    except Exception as e:
-        raise Exception(f"Error extracting TXT text: {str(e)}")
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            chunks.append("\n".join(current).strip())
+        current, current_tokens = [], 0
 
-async def extract_business_info_from_plan(content: str) -> Dict[str, Any]:
+    for paragraph in content.split("\n"):
+        tokens = count_tokens(paragraph) + 1
+        if tokens > max_tokens:
+            # A single paragraph larger than a chunk is cut at the character equivalent
+            flush()
+            step = max_tokens * CHARS_PER_TOKEN
+            for offset in range(0, len(paragraph), step):
+                chunks.append(paragraph[offset:offset + step])
+            continue
+        if current_tokens + tokens > max_tokens:
+            flush()
+        current.append(paragraph)
+        current_tokens += tokens
+    flush()
+    return [chunk for chunk in chunks if chunk]
+
+def _plan_extraction_prompt(chunk: str, chunk_number: int, chunk_count: int) -> str:
+    fields = ",\n".join(
+        f'    "{field}": {{"value": "{description}", "confidence": 0.0-1.0}}'
+        for field, description in PLAN_INFO_FIELDS.items()
+    )
+    return f"""
+Analyze this excerpt (part {chunk_number} of {chunk_count}) of a business plan document and extract the following information in JSON format:
+
+{{
+{fields}
+}}
+
+Business Plan Excerpt:
+{chunk}
+
+Only use what this excerpt states. If a field is not covered here, set its value to null.
+confidence is how clearly the excerpt states the value (1.0 = stated explicitly). Return only valid JSON.
+"""
+
+async def extract_chunk_business_info(chunk: str, chunk_number: int, chunk_count: int) -> Dict[str, Dict[str, Any]]:
+    """Extract {field: {"value", "confidence"}} from one chunk of a plan"""
+    response = await chat_completion(
+        "upload_plan_service.extract_chunk_business_info",
+        task="extraction",
+        model="gpt-4o",
+        messages=[
+            {"role": "system", "content": "You are an expert business analyst. Extract business information from documents and return structured JSON data."},
+            {"role": "user", "content": _plan_extraction_prompt(chunk, chunk_number, chunk_count)}
+        ],
+        temperature=0.3,
+        max_tokens=2000,
+        response_format={"type": "json_object"}
+    )
+    extracted = json.loads(response.choices[0].message.content)
+
+    candidates = {}
+    for field in PLAN_INFO_FIELDS:
+        entry = extracted.get(field)
+        if isinstance(entry, dict):
+            value, confidence = entry.get("value"), entry.get("confidence")
+        else:
+            value, confidence = entry, None
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = str(value)
+        if not isinstance(value, str) or not value.strip():
+            continue
+        try:
+            confidence = max(0.0, min(1.0, float(confidence)))
+        except (TypeError, ValueError):
+            confidence = 0.5
+        candidates[field] = {"value": value.strip(), "confidence": confidence}
+    return candidates
+
+def merge_chunk_business_info(chunk_results: List[Optional[Dict[str, Dict[str, Any]]]]) -> Tuple[Dict[str, Any], Dict[str, float]]:
     """
-    Extract structured business information from plan content using AI
+    Reduce per-chunk extractions to one value per field.
+
+    Candidates with the same normalized value are grouped and scored by their summed confidence;
+    the highest score wins, ties go to the higher single confidence, then the earliest chunk.
+    A field's confidence is the winner's best confidence scaled by its share of the total score,
+    so values the chunks disagree on come back less confident. The result does not depend on the
+    order in which chunks finished.
     """
-    try:
-        prompt = f"""
-        Analyze this business plan document and extract the following information in JSON format:
+    business_info = {}
+    field_confidence = {}
+    for field in PLAN_INFO_FIELDS:
+        groups = {}
+        for chunk_index, result in enumerate(chunk_results):
+            candidate = (result or {}).get(field)
+            if not candidate:
+                continue
+            key = " ".join(candidate["value"].lower().split())
+            group = groups.setdefault(key, {"value": candidate["value"], "score": 0.0, "best": 0.0, "first": chunk_index})
+            group["score"] += candidate["confidence"]
+            group["best"] = max(group["best"], candidate["confidence"])
 
-        {{
-            "business_name": "Company name",
-            "business_type": "Type of business (e.g., service, product, technology)",
-            "industry": "Industry sector",
-            "mission": "Mission statement",
-            "vision": "Vision statement", 
-            "tagline": "Company tagline or slogan",
-            "target_market": "Primary target customers",
-            "value_proposition": "What value the business provides",
-            "revenue_model": "How the business makes money",
-            "competitive_advantage": "What makes this business unique",
-            "problem_solved": "What problem does the business solve",
-            "solution": "How the business solves the problem",
-            "market_size": "Market size or opportunity",
-            "business_structure": "Legal structure (LLC, Corp, etc.)",
-            "location": "Business location",
-            "founding_year": "Year founded or planned founding",
-            "team_size": "Current or planned team size",
-            "funding_needs": "Funding requirements",
-            "key_metrics": "Important business metrics",
-            "goals": "Business goals and objectives"
-        }}
+        if not groups:
+            business_info[field] = None
+            field_confidence[field] = 0.0
+            continue
+        winner = min(groups.values(), key=lambda g: (-g["score"], -g["best"], g["first"]))
+        total_score = sum(g["score"] for g in groups.values())
+        business_info[field] = winner["value"]
+        field_confidence[field] = round(winner["best"] * (winner["score"] / total_score if total_score else 1.0), 2)
+    return business_info, field_confidence
 
-        Business Plan Content:
-        {content[:8000]}  # Limit content to avoid token limits
+async def extract_business_info_with_confidence(content: str) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    Extract structured business information from the whole plan: map over token-bounded chunks
+    concurrently, then merge. Returns (business_info, field_confidence).
+    """
+    chunks = split_plan_into_chunks(content)
+    if not chunks:
+        return create_fallback_business_info(content), {}
 
-        Extract the information accurately. If information is not available, use null. Return only valid JSON.
-        """
+    results = await run_research(
+        {
+            f"chunk_{index}": extract_chunk_business_info(chunk, index + 1, len(chunks))
+            for index, chunk in enumerate(chunks)
+        },
+        limit=PLAN_EXTRACTION_CONCURRENCY,
+        timeout=PLAN_EXTRACTION_CHUNK_TIMEOUT,
+        deadline=PLAN_EXTRACTION_DEADLINE,
+        label="plan extraction"
+    )
+    chunk_results = [results[f"chunk_{index}"] for index in range(len(chunks))]
+    if not any(result is not None for result in chunk_results):
+        print("❌ Plan extraction failed for every chunk - using keyword fallback")
+        return create_fallback_business_info(content), {}
 
-        response = await client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are an expert business analyst. Extract business information from documents and return structured JSON data."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3,
-            max_tokens=2000
-        )
+    return merge_chunk_business_info(chunk_results)
 
-        extracted_text = response.choices[0].message.content.strip()
-        
-        # Clean up the response to ensure it's valid JSON
-        if extracted_text.startswith('```json'):
-            extracted_text = extracted_text[7:]
-        if extracted_text.endswith('```'):
-            extracted_text = extracted_text[:-3]
-            
-        business_info = json.loads(extracted_text)
-        
-        # Validate and clean the extracted data
-        validated_info = {}
-        for key, value in business_info.items():
-            if value and isinstance(value, str) and len(value.strip()) > 0:
-                validated_info[key] = value.strip()
-            else:
-                validated_info[key] = None
-                
-        return validated_info
-        
-    except json.JSONDecodeError as e:
-        print(f"JSON decode error: {e}")
-        return create_fallback_business_info(content)
-    except Exception as e:
-        print(f"Error extracting business info: {e}")
-        return create_fallback_business_info(content)
+async def extract_business_info_from_plan(content: str) -> Dict[str, Any]:
+    """
+    Extract structured business information from plan content using AI
+    """
+    business_info, _ = await extract_business_info_with_confidence(content)
+    return business_info
 
 def create_fallback_business_info(content: str) -> Dict[str, Any]:
     """Create basic business info when AI extraction fails"""
@@ -215,7 +348,9 @@ async def validate_business_plan_content(content: str) -> Dict[str, Any]:
         Typical business plan sections include: Executive Summary, Company Description, Market Analysis, Organization, Service/Product Line, Marketing, Financial Projections, etc.
         """
 
-        response = await client.chat.completions.create(
+        response = await chat_completion(
+            "upload_plan_service.validate_business_plan_content",
+            task="extraction",
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": "You are an expert at analyzing business documents and plans."},
@@ -1,2 +1,3 @@
 #!/bin/bash
-gunicorn -w 4 -k uvicorn.workers.UvicornWorker main:app
+# --preload imports the app once in the master; workers fork from it instead of each importing it
+gunicorn -w 4 -k uvicorn.workers.UvicornWorker --preload main:app
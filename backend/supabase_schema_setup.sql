@@ -255,6 +255,56 @@ CREATE TRIGGER update_implementation_tasks_updated_at BEFORE UPDATE ON implement
 CREATE TRIGGER update_rag_documents_updated_at BEFORE UPDATE ON rag_documents FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 CREATE TRIGGER update_user_preferences_updated_at BEFORE UPDATE ON user_preferences FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+-- =============================================
+-- CHAT TURN PERSISTENCE
+-- =============================================
+
+-- Persist one chat turn atomically: insert its messages and apply the merged session update.
+-- Used by the backend when SUPABASE_USE_CHAT_TURN_RPC=true.
+CREATE OR REPLACE FUNCTION persist_chat_turn(
+    p_session_id UUID,
+    p_messages JSONB,
+    p_session_updates JSONB
+)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO chat_history (session_id, user_id, role, content, created_at)
+    SELECT p_session_id, m.user_id, m.role, m.content, COALESCE(m.created_at, NOW())
+    FROM jsonb_to_recordset(COALESCE(p_messages, '[]'::jsonb))
+        AS m(user_id UUID, role VARCHAR(20), content TEXT, created_at TIMESTAMP WITH TIME ZONE);
+
+    IF p_session_updates IS NOT NULL AND p_session_updates <> '{}'::jsonb THEN
+        UPDATE chat_sessions SET
+            current_phase = COALESCE(p_session_updates->>'current_phase', current_phase),
+            asked_q = COALESCE(p_session_updates->>'asked_q', asked_q),
+            answered_count = COALESCE((p_session_updates->>'answered_count')::INTEGER, answered_count),
+            business_context = COALESCE(p_session_updates->'business_context', business_context)
+        WHERE id = p_session_id;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- =============================================
+-- ARTIFACT STORE
+-- =============================================
+
+-- Generated plans and roadmaps are content-addressed: input_hash identifies the answered
+-- history an artifact was built from, and every new hash is stored as the next version.
+-- Versions are unique per session and kind (rows from before the artifact store have no hash).
+ALTER TABLE business_plans ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE business_plans ADD COLUMN IF NOT EXISTS input_hash VARCHAR(64) DEFAULT NULL;
+ALTER TABLE business_plans ADD COLUMN IF NOT EXISTS result JSONB DEFAULT NULL;
+ALTER TABLE roadmaps ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE roadmaps ADD COLUMN IF NOT EXISTS input_hash VARCHAR(64) DEFAULT NULL;
+ALTER TABLE roadmaps ADD COLUMN IF NOT EXISTS result JSONB DEFAULT NULL;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_business_plans_input_hash ON business_plans(session_id, plan_type, input_hash);
+DROP INDEX IF EXISTS idx_business_plans_version;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_business_plans_version_unique ON business_plans(session_id, plan_type, version DESC) WHERE input_hash IS NOT NULL;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_roadmaps_input_hash ON roadmaps(session_id, roadmap_type, input_hash);
+DROP INDEX IF EXISTS idx_roadmaps_version;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_roadmaps_version_unique ON roadmaps(session_id, roadmap_type, version DESC) WHERE input_hash IS NOT NULL;
+
 -- =============================================
 -- ROW LEVEL SECURITY (RLS) POLICIES
 -- =============================================
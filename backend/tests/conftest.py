@@ -0,0 +1,9 @@
+import os
+import sys
+
+# API clients are built on first use; give them harmless values
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-service-role-key")
+os.environ.setdefault("OPENAI_API_KEY", "test-openai-key")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
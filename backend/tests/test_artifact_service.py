@@ -0,0 +1,53 @@
+import asyncio
+from types import SimpleNamespace
+
+from postgrest.exceptions import APIError
+
+import services.artifact_service as artifact_service
+
+
+class FakeTable:
+    """business_plans with the unique (session, kind, version) index; one rival save lands first"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.upsert_row = None
+
+    def select(self, *_):
+        return self
+
+    def eq(self, *_):
+        return self
+
+    def order(self, *_, **__):
+        return self
+
+    def limit(self, *_):
+        return self
+
+    def upsert(self, row, **_):
+        self.upsert_row = dict(row)
+        return self
+
+    async def execute(self):
+        if self.upsert_row is None:
+            latest = sorted(self.rows, key=lambda row: row["version"], reverse=True)[:1]
+            return SimpleNamespace(data=latest)
+        row, self.upsert_row = self.upsert_row, None
+        if len(self.rows) == 1:
+            # A concurrent save with different inputs takes v2 between our read and write
+            self.rows.append({"version": 2, "input_hash": "rival"})
+        if any(existing["version"] == row["version"] for existing in self.rows):
+            raise APIError({"code": "23505", "message": "duplicate key value violates unique constraint"})
+        self.rows.append(row)
+        return SimpleNamespace(data=[row])
+
+
+def test_version_taken_by_a_concurrent_save_is_retried(monkeypatch):
+    table = FakeTable([{"version": 1, "input_hash": "first"}])
+    monkeypatch.setattr(artifact_service, "get_async_db", lambda: SimpleNamespace(from_=lambda _: table))
+
+    stored = asyncio.run(artifact_service.save_artifact("s1", "u1", "business_plan", "mine", {"plan": "text"}))
+
+    assert stored["version"] == 3 and stored["input_hash"] == "mine"
+    assert [row["version"] for row in table.rows] == [1, 2, 3]
@@ -0,0 +1,105 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import jwt
+import pytest
+from fastapi import HTTPException
+
+import middlewares.auth as auth
+
+SECRET = "test-jwt-secret"
+
+
+def make_token(**overrides):
+    claims = {
+        "sub": "user-1",
+        "email": "founder@example.com",
+        "aud": auth.SUPABASE_JWT_AUDIENCE,
+        "iss": auth.SUPABASE_JWT_ISSUER,
+        "exp": int(time.time()) + 300,
+        **overrides,
+    }
+    return jwt.encode(claims, SECRET, algorithm="HS256")
+
+
+def verify(token):
+    request = SimpleNamespace(state=SimpleNamespace(), url=SimpleNamespace(path="/angel/sessions"), path_params={})
+    asyncio.run(auth.verify_auth_token(request, SimpleNamespace(credentials=token)))
+    return request.state.user
+
+
+@pytest.fixture(autouse=True)
+def local_secret(monkeypatch):
+    monkeypatch.setattr(auth, "SUPABASE_JWT_SECRET", SECRET)
+    monkeypatch.setattr(auth, "token_cache", auth.OrderedDict())
+
+    def remote(token):
+        raise AssertionError("remote verification should not be needed")
+
+    monkeypatch.setattr(auth.get_supabase().auth, "get_user", remote)
+
+
+def test_valid_token_is_verified_locally_and_cached():
+    token = make_token()
+
+    assert verify(token) == {"id": "user-1", "email": "founder@example.com"}
+    assert token in auth.token_cache
+
+
+@pytest.mark.parametrize("overrides", [
+    {"exp": int(time.time()) - 10},
+    {"aud": "anon"},
+    {"iss": "https://attacker.example/auth/v1"},
+])
+def test_expired_or_foreign_tokens_are_rejected(overrides):
+    with pytest.raises(HTTPException) as error:
+        verify(make_token(**overrides))
+    assert error.value.status_code == 401
+
+
+def test_tampered_signature_is_rejected(monkeypatch):
+    calls = []
+
+    def remote(token):
+        calls.append(token)
+        return SimpleNamespace(user=None)
+
+    monkeypatch.setattr(auth.get_supabase().auth, "get_user", remote)
+    token = jwt.encode({"sub": "user-1", "exp": int(time.time()) + 300}, "other-secret", algorithm="HS256")
+
+    with pytest.raises(HTTPException) as error:
+        verify(token)
+    assert error.value.status_code == 401
+    assert calls == [token]
+    assert token not in auth.token_cache
+
+
+def test_token_signed_with_a_rotated_secret_is_checked_remotely(monkeypatch):
+    def remote(token):
+        return SimpleNamespace(user=SimpleNamespace(id="user-1", email="founder@example.com"))
+
+    monkeypatch.setattr(auth.get_supabase().auth, "get_user", remote)
+    token = jwt.encode(
+        {"sub": "user-1", "aud": auth.SUPABASE_JWT_AUDIENCE, "iss": auth.SUPABASE_JWT_ISSUER, "exp": int(time.time()) + 300},
+        "rotated-secret",
+        algorithm="HS256",
+    )
+
+    assert verify(token) == {"id": "user-1", "email": "founder@example.com"}
+
+
+def test_without_local_key_falls_back_to_remote(monkeypatch):
+    monkeypatch.setattr(auth, "SUPABASE_JWT_SECRET", "")
+    calls = []
+
+    def remote(token):
+        calls.append(token)
+        return SimpleNamespace(user=SimpleNamespace(id="user-2", email="remote@example.com"))
+
+    monkeypatch.setattr(auth.get_supabase().auth, "get_user", remote)
+    token = make_token()
+
+    assert verify(token)["id"] == "user-2"
+    assert verify(token)["id"] == "user-2"
+    assert len(calls) == 1
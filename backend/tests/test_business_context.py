@@ -0,0 +1,47 @@
+from services.business_context_service import (
+    BUSINESS_CONTEXT_VERSION,
+    backfill_business_context,
+    get_business_context,
+    record_answer,
+)
+
+HISTORY = [
+    {"role": "assistant", "content": "[[Q:KYC.05]] Do you already have a business idea in mind?"},
+    {"role": "user", "content": "Yes - office coffee subscriptions"},
+    {"role": "assistant", "content": "[[Q:KYC.08]] What kind of business are you trying to build?"},
+    {"role": "user", "content": "Small business"},
+    {"role": "assistant", "content": "[[Q:KYC.10]] Where will your business operate?"},
+    {"role": "user", "content": "Support"},
+    {"role": "assistant", "content": "Here is some help. [[Q:KYC.10]] Where will your business operate?"},
+    {"role": "user", "content": "Austin, Texas"},
+    {"role": "assistant", "content": "[[Q:KYC.11]] What industry does your business fall into?"},
+    {"role": "user", "content": "Specialty coffee"},
+    {"role": "assistant", "content": "[[Q:BUSINESS_PLAN.01]] What is your business name?"},
+    {"role": "user", "content": "Bean There"},
+    {"role": "assistant", "content": "[[Q:BUSINESS_PLAN.09]] Who is your target market?"},
+    {"role": "user", "content": "Offices with 20-200 staff"},
+]
+
+
+def test_record_answer_only_changes_tagged_fields():
+    context = {"industry": "", "context_version": BUSINESS_CONTEXT_VERSION}
+
+    assert record_answer(context, "KYC.11", "Specialty coffee")["industry"] == "Specialty coffee"
+    assert record_answer(context, "KYC.12", "Personal savings") is context
+    assert record_answer(context, "KYC.11", "Draft") is context
+
+
+def test_backfill_replays_tagged_answers():
+    context = backfill_business_context(HISTORY)
+
+    assert context["location"] == "Austin, Texas"
+    assert context["industry"] == "Specialty coffee"
+    assert context["business_type"] == "Small business"
+    assert context["business_name"] == "Bean There"
+    assert context["target_market"] == "Offices with 20-200 staff"
+
+
+def test_maintained_context_is_read_without_scanning_history():
+    stored = {"industry": "Bakery", "context_version": BUSINESS_CONTEXT_VERSION}
+
+    assert get_business_context({"business_context": stored}, HISTORY) is stored
@@ -0,0 +1,50 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import services.chat_service as chat_service
+
+
+class FakeHistoryTable:
+    """chat_history rows; select/eq/gte/order/execute like the PostgREST builder"""
+
+    def __init__(self):
+        self.rows = []
+        self.since = None
+
+    def select(self, *_):
+        self.since = None
+        return self
+
+    def eq(self, *_):
+        return self
+
+    def gte(self, column, value):
+        self.since = datetime.fromisoformat(value)
+        return self
+
+    def order(self, *_, **__):
+        return self
+
+    async def execute(self):
+        rows = [row for row in self.rows if self.since is None or datetime.fromisoformat(row["created_at"]) >= self.since]
+        return SimpleNamespace(data=sorted(rows, key=lambda row: row["created_at"]))
+
+    def insert(self, id, content, created_at):
+        self.rows.append({"id": id, "role": "user", "content": content, "created_at": created_at})
+
+
+def test_row_committed_behind_the_cursor_is_still_fetched(monkeypatch):
+    table = FakeHistoryTable()
+    monkeypatch.setattr(chat_service, "get_async_db", lambda: SimpleNamespace(from_=lambda _: table))
+    monkeypatch.setattr(chat_service, "history_cache", chat_service.OrderedDict())
+
+    table.insert(1, "first", "2026-10-16T12:00:00+00:00")
+    # Worker B's turn lands first although worker A stamped its user message earlier
+    table.insert(3, "later turn", "2026-10-16T12:00:40+00:00")
+    assert [m["content"] for m in asyncio.run(chat_service.fetch_chat_history("s1"))] == ["first", "later turn"]
+
+    table.insert(2, "stamped before the reply", "2026-10-16T12:00:10+00:00")
+    history = asyncio.run(chat_service.fetch_chat_history("s1"))
+
+    assert [m["content"] for m in history] == ["first", "stamped before the reply", "later turn"]
@@ -0,0 +1,156 @@
+import asyncio
+from types import SimpleNamespace
+
+import routers.angel_router as angel_router
+import services.angel_service as angel_service
+import services.chat_service as chat_service
+import services.question_catalog as question_catalog
+import services.speculative_drafts as speculative_drafts
+from services.business_context_service import BUSINESS_CONTEXT_VERSION
+from services.chat_service import ChatTurn
+
+HISTORY = [
+    {"role": "assistant", "content": "[[Q:KYC.09]] Do you have a business partner?"},
+    {"role": "user", "content": "No"},
+    {"role": "assistant", "content": "[[Q:KYC.10]] Where will your business operate?"},
+]
+
+
+async def finalize_turn(monkeypatch, answered_tag, answer, reply):
+    """Post-reply half of a chat turn; the reply has already moved asked_q on, as in finalize_angel_reply"""
+    flushed = []
+    turn = ChatTurn("s1", "u1")
+    turn.add_message("user", answer)
+
+    async def flush():
+        flushed.append(dict(turn.session_updates))
+
+    monkeypatch.setattr(turn, "flush", flush)
+    session = {
+        "id": "s1",
+        "user_id": "u1",
+        "asked_q": angel_router.parse_tag(reply),
+        "current_phase": answered_tag.split(".")[0],
+        "answered_count": 9,
+        "business_context": {"industry": "", "location": "", "context_version": BUSINESS_CONTEXT_VERSION},
+    }
+    result = await angel_router.finalize_chat_turn(turn, session, HISTORY, {"reply": reply}, answered_tag)
+    return session, flushed[0], result
+
+
+def run_turn(monkeypatch, answered_tag, answer, reply):
+    return asyncio.run(finalize_turn(monkeypatch, answered_tag, answer, reply))
+
+
+def test_answer_is_recorded_under_the_question_it_answers(monkeypatch):
+    session, updates, result = run_turn(monkeypatch, "KYC.10", "Austin, Texas", "[[Q:KYC.11]] What industry does your business fall into?")
+
+    assert session["business_context"]["location"] == "Austin, Texas"
+    assert session["business_context"]["industry"] == ""
+    assert updates["business_context"]["location"] == "Austin, Texas"
+    assert updates["asked_q"] == "KYC.11"
+    assert result["success"]
+
+
+def test_moving_to_a_new_plan_question_pre_generates_its_draft(monkeypatch):
+    drafts = []
+
+    async def draft(reply, history, session_data):
+        drafts.append(session_data["asked_q"])
+        return f"Here's a draft for you ({session_data['asked_q']})"
+
+    monkeypatch.setattr(speculative_drafts, "SPECULATIVE_DRAFTS", True)
+    monkeypatch.setattr(speculative_drafts, "SPECULATIVE_COMMANDS", ["draft"])
+    monkeypatch.setattr(speculative_drafts, "speculations", speculative_drafts.OrderedDict())
+    monkeypatch.setattr(angel_service, "handle_draft_command", draft)
+
+    async def run():
+        session, _, _ = await finalize_turn(monkeypatch, "BUSINESS_PLAN.05", "Weekly deliveries", "[[Q:BUSINESS_PLAN.06]] How will you price it?")
+        assert "s1" in speculative_drafts.speculations
+        history = HISTORY + [{"role": "user", "content": "Weekly deliveries"}, {"role": "assistant", "content": "[[Q:BUSINESS_PLAN.06]] How will you price it?"}]
+        return await speculative_drafts.run_command("draft", draft, history, session)
+
+    assert asyncio.run(run()) == "Here's a draft for you (BUSINESS_PLAN.06)"
+    assert drafts == ["BUSINESS_PLAN.06"]
+
+    # A follow-up on the same question does not start another one
+    run_turn(monkeypatch, "BUSINESS_PLAN.06", "Tell me more", "Sure. [[Q:BUSINESS_PLAN.06]] How will you price it?")
+    assert "s1" not in speculative_drafts.speculations
+
+
+def test_going_back_on_a_fresh_worker_shows_the_question_as_it_was_asked(monkeypatch):
+    session = {"id": "s1", "user_id": "u1", "asked_q": "KYC.10", "current_phase": "KYC", "answered_count": 9}
+    history = [
+        {"role": "assistant", "content": "Nice!\n\n[[Q:KYC.09]] Will you run Bean There with a partner?"},
+        {"role": "user", "content": "No"},
+        {"role": "assistant", "content": "[[Q:KYC.10]] Where will your business operate?"},
+    ]
+
+    async def get_session(session_id, user_id):
+        return session
+
+    async def fetch_recent_chat_history(session_id, limit):
+        return history[-limit:]
+
+    async def patch_session(session_id, updates):
+        session.update(updates)
+
+    async def chat_completion(*args, **kwargs):
+        raise AssertionError("a question with a known wording needs no model call")
+
+    # This worker has never seen the session
+    monkeypatch.setattr(question_catalog, "session_questions", question_catalog.OrderedDict())
+    monkeypatch.setattr(angel_router, "get_session", get_session)
+    monkeypatch.setattr(angel_router, "fetch_recent_chat_history", fetch_recent_chat_history)
+    monkeypatch.setattr(angel_router, "patch_session", patch_session)
+    monkeypatch.setattr(angel_router, "chat_completion", chat_completion)
+    request = SimpleNamespace(state=SimpleNamespace(user={"id": "u1"}))
+
+    result = asyncio.run(angel_router.go_back_to_previous_question("s1", request))
+
+    assert result["result"]["reply"] == "[[Q:KYC.09]] Will you run Bean There with a partner?"
+    assert session["asked_q"] == "KYC.09"
+
+
+def test_user_message_is_kept_when_the_client_disconnects_mid_stream(monkeypatch):
+    saved = []
+    generating = asyncio.Event()
+
+    async def get_session(session_id, user_id):
+        return {"id": session_id, "user_id": user_id, "asked_q": "KYC.10", "current_phase": "KYC", "answered_count": 9}
+
+    async def fetch_chat_history(session_id):
+        return list(HISTORY)
+
+    async def stream_angel_reply(message, history, session):
+        yield {"type": "token", "content": "Austin is "}
+        generating.set()
+        await asyncio.Event().wait()
+
+    async def save_chat_messages(messages):
+        saved.extend(messages)
+
+    monkeypatch.setattr(angel_router, "get_session", get_session)
+    monkeypatch.setattr(angel_router, "fetch_chat_history", fetch_chat_history)
+    monkeypatch.setattr(angel_router, "stream_angel_reply", stream_angel_reply)
+    monkeypatch.setattr(chat_service, "save_chat_messages", save_chat_messages)
+    request = SimpleNamespace(state=SimpleNamespace(user={"id": "u1"}))
+    payload = SimpleNamespace(content="Austin, Texas")
+
+    async def disconnect():
+        response = await angel_router.post_chat_stream("s1", request, payload)
+
+        async def consume():
+            async for _ in response.body_iterator:
+                pass
+
+        # Starlette cancels the streaming task when the client goes away
+        streaming = asyncio.create_task(consume())
+        await generating.wait()
+        streaming.cancel()
+        await asyncio.gather(streaming, return_exceptions=True)
+        await asyncio.sleep(0)
+
+    asyncio.run(disconnect())
+
+    assert [(m["role"], m["content"]) for m in saved] == [("user", "Austin, Texas")]
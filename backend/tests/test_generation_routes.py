@@ -0,0 +1,99 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import routers.angel_router as angel_router
+import services.artifact_service as artifact_service
+import services.generate_plan_service as generate_plan_service
+
+ROUTES = [
+    angel_router.generate_business_plan,
+    angel_router.get_business_plan_summary,
+    angel_router.generate_roadmap_plan,
+    angel_router.generate_enhanced_roadmap,
+]
+
+
+def as_user(user_id):
+    return SimpleNamespace(state=SimpleNamespace(user={"id": user_id}))
+
+
+@pytest.mark.parametrize("background", [False, True])
+@pytest.mark.parametrize("route", ROUTES)
+def test_another_users_session_is_refused_before_anything_is_read(monkeypatch, route, background):
+    reads = []
+
+    async def get_session(session_id, user_id):
+        # Mirrors session_service.get_session: the row is filtered by owner
+        if user_id != "owner":
+            raise Exception("Session not found")
+        return {"id": session_id, "user_id": user_id}
+
+    async def fetch_chat_history(session_id):
+        reads.append(("history", session_id))
+        return []
+
+    async def enqueue_job(*args, **kwargs):
+        reads.append(("job", args))
+        return "job-1"
+
+    monkeypatch.setattr(angel_router, "get_session", get_session)
+    monkeypatch.setattr(angel_router, "fetch_chat_history", fetch_chat_history)
+    monkeypatch.setattr(angel_router, "enqueue_job", enqueue_job)
+
+    with pytest.raises(Exception, match="Session not found"):
+        asyncio.run(route(session_id="s1", request=as_user("intruder"), background=background))
+    assert reads == []
+
+
+def test_second_roadmap_request_is_served_from_the_store(monkeypatch):
+    stored = {}
+    prompts = []
+
+    async def get_session(session_id, user_id):
+        return {"id": session_id, "user_id": user_id}
+
+    async def fetch_chat_history(session_id):
+        return [{"role": "assistant", "content": "[[Q:KYC.11]] What industry?"}, {"role": "user", "content": "Coffee"}]
+
+    async def fetch_artifact(session_id, user_id, artifact_type, input_hash=None):
+        return stored.get((session_id, artifact_type, input_hash))
+
+    async def save_artifact(session_id, user_id, artifact_type, input_hash, result):
+        row = {"version": 1, "input_hash": input_hash, "created_at": "now", "result": result}
+        stored[(session_id, artifact_type, input_hash)] = row
+        return row
+
+    async def extract_plan_profile(history, defaults):
+        return {"industry": "coffee", "location": "Austin"}, []
+
+    async def conduct_web_search(query):
+        # The funding search fails; the rest return findings
+        return None if "funding" in query else f"finding for {query[:20]}"
+
+    async def chat_completion(call_site, **kwargs):
+        prompts.append(kwargs["messages"][-1]["content"])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="# Coffee roadmap"))])
+
+    monkeypatch.setattr(angel_router, "get_session", get_session)
+    monkeypatch.setattr(angel_router, "fetch_chat_history", fetch_chat_history)
+    monkeypatch.setattr(artifact_service, "fetch_artifact", fetch_artifact)
+    monkeypatch.setattr(artifact_service, "save_artifact", save_artifact)
+    monkeypatch.setattr(generate_plan_service, "extract_plan_profile", extract_plan_profile)
+    monkeypatch.setattr(generate_plan_service, "conduct_web_search", conduct_web_search)
+    monkeypatch.setattr(generate_plan_service, "chat_completion", chat_completion)
+
+    first = asyncio.run(angel_router.generate_roadmap_plan(session_id="s1", request=as_user("owner")))
+    second = asyncio.run(angel_router.generate_roadmap_plan(session_id="s1", request=as_user("owner")))
+    enhanced = asyncio.run(angel_router.generate_enhanced_roadmap(session_id="s1", request=as_user("owner")))
+
+    assert first["result"]["content"] == "# Coffee roadmap"
+    assert first["artifact"]["cached"] is False
+    assert second["artifact"]["cached"] is True and enhanced["artifact"]["cached"] is True
+    assert enhanced["success"] and enhanced["result"]["roadmap"] == "# Coffee roadmap"
+    assert len(prompts) == 1
+    # The research reaches the roadmap prompt, with a stand-in for the source that failed
+    assert "finding for Search ONLY gover" in prompts[0]
+    assert generate_plan_service.ROADMAP_RESEARCH_UNAVAILABLE in prompts[0]
+    assert first["result"]["research_sources"]["funding_insights"] is False
@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported on first use only (clients, document parsers); importing them at startup is a regression
+DEFERRED_MODULES = {"openai", "supabase", "aiohttp", "PyPDF2", "docx"}
+# Cumulative `python -X importtime` budget per entry point; about twice today's cost, overridable on slow CI
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "1200"))
+
+
+def import_times(module: str) -> dict:
+    """module -> cumulative import time in ms, for a cold `import <module>`"""
+    command = [sys.executable, "-c", f"import {module}"]
+    # Warm-up run so bytecode compilation is not counted
+    subprocess.run(command, cwd=BACKEND_DIR, check=True, capture_output=True)
+    result = subprocess.run([sys.executable, "-X", "importtime", *command[1:]], cwd=BACKEND_DIR, check=True, capture_output=True, text=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative) / 1000
+    return times
+
+
+@pytest.mark.parametrize("entry_point", ["main", "api.index"])
+def test_startup_stays_within_import_budget(entry_point):
+    times = import_times(entry_point)
+
+    eager = DEFERRED_MODULES & set(times)
+    assert not eager, f"imported at startup: {sorted(eager)}"
+    assert times[entry_point] < IMPORT_TIME_BUDGET_MS, f"{entry_point} took {times[entry_point]:.0f}ms to import"
@@ -0,0 +1,78 @@
+import asyncio
+
+import utils.job_runner as job_runner
+
+
+def use_store(monkeypatch, tmp_path):
+    monkeypatch.setattr(job_runner, "_store", job_runner.JobStore(str(tmp_path / "jobs.sqlite3")))
+    monkeypatch.setattr(job_runner, "_workers", [])
+    monkeypatch.setattr(job_runner, "JOB_POLL_INTERVAL", 0.01)
+
+
+async def wait_for_job(job_id):
+    for _ in range(200):
+        job = await job_runner.get_job(job_id)
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+def test_job_reports_stages_and_stores_result(monkeypatch, tmp_path):
+    use_store(monkeypatch, tmp_path)
+    stages = []
+
+    async def handler(payload):
+        await job_runner.report_job_progress("researching", 0.5)
+        stages.append((await job_runner.get_job(job_runner._current_job.get()))["stage"])
+        return {"echo": payload["value"]}
+
+    job_runner.register_job_handler("test_echo", handler)
+
+    async def scenario():
+        job_id = await job_runner.enqueue_job("test_echo", {"value": 7}, user_id="u1")
+        job = await wait_for_job(job_id)
+        await job_runner.stop_job_workers()
+        return job
+
+    job = asyncio.run(scenario())
+    assert stages == ["researching"]
+    assert job["status"] == "succeeded"
+    assert job["result"] == {"echo": 7}
+    assert job_runner.public_job_view(job)["progress"] == 1.0
+
+
+def test_failed_job_is_retried_then_marked_failed(monkeypatch, tmp_path):
+    use_store(monkeypatch, tmp_path)
+    monkeypatch.setattr(job_runner, "JOB_MAX_ATTEMPTS", 2)
+    calls = []
+
+    async def handler(payload):
+        calls.append(payload)
+        raise RuntimeError("provider down")
+
+    job_runner.register_job_handler("test_fail", handler)
+
+    async def scenario():
+        job_id = await job_runner.enqueue_job("test_fail", {})
+        job = await wait_for_job(job_id)
+        await job_runner.stop_job_workers()
+        return job
+
+    job = asyncio.run(scenario())
+    assert len(calls) == 2
+    assert job["status"] == "failed"
+    assert job["error"] == "provider down"
+
+
+def test_job_with_expired_lease_is_claimed_again(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_runner, "JOB_LEASE_SECONDS", -1)
+    store = job_runner.JobStore(str(tmp_path / "jobs.sqlite3"))
+    job_id = store.create("test_echo", {})
+
+    first = store.claim()
+    # The worker holding it died: its lease is already in the past
+    second = store.claim()
+
+    assert first["id"] == second["id"] == job_id
+    assert second["attempts"] == 2
@@ -0,0 +1,56 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import openai
+
+import utils.llm_gateway as llm_gateway
+from utils.llm_gateway import chat_completion, get_llm_call_stats, get_llm_client
+
+
+class FlakyCompletions:
+    """Fails with a connection error `failures` times, then answers"""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        if len(self.calls) <= self.failures:
+            raise openai.APIConnectionError(request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+        usage = SimpleNamespace(prompt_tokens=12, completion_tokens=5)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))], usage=usage)
+
+
+def test_retries_then_records_telemetry(monkeypatch):
+    completions = FlakyCompletions(failures=2)
+    monkeypatch.setattr(get_llm_client().chat, "completions", completions)
+    monkeypatch.setattr(llm_gateway, "LLM_RETRY_BASE_DELAY", 0)
+    monkeypatch.setattr(llm_gateway, "llm_call_stats", {})
+
+    response = asyncio.run(chat_completion("tests.flaky", model="gpt-4o", messages=[]))
+
+    assert response.choices[0].message.content == "ok"
+    assert len(completions.calls) == 3
+    assert completions.calls[0]["timeout"] == llm_gateway.LLM_TASK_POLICIES["interactive"]["timeout"]
+    stats = get_llm_call_stats()["tests.flaky"]
+    assert stats["calls"] == 3 and stats["errors"] == 2 and stats["retries"] == 2
+    assert stats["prompt_tokens"] == 12 and stats["completion_tokens"] == 5
+
+
+def test_gives_up_after_policy_retries(monkeypatch):
+    completions = FlakyCompletions(failures=5)
+    monkeypatch.setattr(get_llm_client().chat, "completions", completions)
+    monkeypatch.setattr(llm_gateway, "LLM_RETRY_BASE_DELAY", 0)
+    monkeypatch.setattr(llm_gateway, "llm_call_stats", {})
+
+    try:
+        asyncio.run(chat_completion("tests.down", task="generation", model="gpt-4o", messages=[], timeout=5))
+        raised = False
+    except openai.APIConnectionError:
+        raised = True
+
+    assert raised
+    assert len(completions.calls) == llm_gateway.LLM_TASK_POLICIES["generation"]["retries"] + 1
+    assert completions.calls[0]["timeout"] == 5
@@ -0,0 +1,45 @@
+from fastapi.testclient import TestClient
+
+from loadtest import stand_ins
+
+
+def client(monkeypatch):
+    monkeypatch.setattr(stand_ins, "FAKE_DB_LATENCY", 0)
+    monkeypatch.setattr(stand_ins, "FAKE_OPENAI_LATENCY", 0)
+    monkeypatch.setattr(stand_ins, "tables", {})
+    return TestClient(stand_ins.app)
+
+
+def test_postgrest_filters_order_and_single(monkeypatch):
+    c = client(monkeypatch)
+    for index, phase in enumerate(["KYC", "KYC", "BUSINESS_PLAN"]):
+        c.post("/rest/v1/chat_history", json={"session_id": "s1", "phase": phase, "n": index},
+               headers={"Prefer": "return=representation"})
+
+    rows = c.get("/rest/v1/chat_history", params={"session_id": "eq.s1", "phase": "in.(KYC)", "order": "n.desc", "limit": "1"}).json()
+    assert [row["n"] for row in rows] == [1]
+
+    single = c.get("/rest/v1/chat_history", params={"n": "eq.2"}, headers={"Accept": "application/vnd.pgrst.object+json"})
+    assert single.json()["phase"] == "BUSINESS_PLAN"
+    missing = c.get("/rest/v1/chat_history", params={"n": "eq.9"}, headers={"Accept": "application/vnd.pgrst.object+json"})
+    assert missing.status_code == 406
+
+
+def test_postgrest_upsert_merges_on_conflict(monkeypatch):
+    c = client(monkeypatch)
+    headers = {"Prefer": "return=representation,resolution=merge-duplicates"}
+    c.post("/rest/v1/profiles", params={"on_conflict": "user_id"}, json={"user_id": "u1", "name": "A"}, headers=headers)
+    c.post("/rest/v1/profiles", params={"on_conflict": "user_id"}, json={"user_id": "u1", "name": "B"}, headers=headers)
+
+    rows = c.get("/rest/v1/profiles").json()
+    assert len(rows) == 1 and rows[0]["name"] == "B"
+
+
+def test_fake_openai_echoes_the_next_question_tag(monkeypatch):
+    c = client(monkeypatch)
+    body = {"model": "gpt-4o", "messages": [{"role": "system", "content": "Use the proper tag format: [[Q:KYC.07]]"}]}
+
+    reply = c.post("/v1/chat/completions", json=body).json()
+
+    assert "[[Q:KYC.07]]" in reply["choices"][0]["message"]["content"]
+    assert reply["usage"]["completion_tokens"] > 0
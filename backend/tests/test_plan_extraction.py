@@ -0,0 +1,60 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import services.upload_plan_service as upload_plan_service
+from services.upload_plan_service import merge_chunk_business_info, split_plan_into_chunks, PLAN_INFO_FIELDS
+from utils.llm_gateway import get_llm_client
+
+
+def test_split_respects_token_bound_and_keeps_all_text():
+    paragraphs = [f"Paragraph {i}" + " word" * 50 for i in range(40)]
+    content = "\n".join(paragraphs)
+
+    chunks = split_plan_into_chunks(content, max_tokens=200)
+
+    assert len(chunks) > 1
+    assert all(upload_plan_service.count_tokens(chunk) <= 200 for chunk in chunks)
+    assert "\n".join(chunks) == content
+
+
+def test_merge_is_order_independent_and_scores_agreement():
+    a = {"industry": {"value": "Coffee roasting", "confidence": 0.6}}
+    b = {"industry": {"value": "coffee  ROASTING", "confidence": 0.7}, "location": {"value": "Austin", "confidence": 0.9}}
+    c = {"industry": {"value": "Catering", "confidence": 0.9}}
+
+    info, confidence = merge_chunk_business_info([a, b, c, None])
+    reordered, _ = merge_chunk_business_info([None, c, b, a])
+
+    assert info["industry"] == "Coffee roasting"
+    assert reordered["industry"] == "coffee  ROASTING"  # same group; earliest chunk's spelling
+    assert confidence["industry"] == round(0.7 * 1.3 / 2.2, 2)
+    assert info["location"] == "Austin" and confidence["location"] == 0.9
+    assert info["mission"] is None and confidence["mission"] == 0.0
+    assert set(info) == set(PLAN_INFO_FIELDS)
+
+
+class FakeCompletions:
+    def __init__(self):
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        excerpt = kwargs["messages"][1]["content"]
+        payload = {"business_name": {"value": "Bean There", "confidence": 0.9}}
+        if "Austin" in excerpt:
+            payload["location"] = {"value": "Austin, TX", "confidence": 0.8}
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(payload)))])
+
+
+def test_long_plan_reads_every_chunk(monkeypatch):
+    completions = FakeCompletions()
+    monkeypatch.setattr(get_llm_client().chat, "completions", completions)
+    monkeypatch.setattr(upload_plan_service, "PLAN_EXTRACTION_CHUNK_TOKENS", 300)
+    content = "\n".join(["Bean There business plan " + "filler " * 80] * 20 + ["We operate in Austin."])
+
+    info, confidence = asyncio.run(upload_plan_service.extract_business_info_with_confidence(content))
+
+    assert len(completions.calls) == len(split_plan_into_chunks(content, 300)) > 1
+    assert info["location"] == "Austin, TX"
+    assert info["business_name"] == "Bean There" and confidence["business_name"] == 0.9
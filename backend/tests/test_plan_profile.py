@@ -0,0 +1,67 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import services.generate_plan_service as generate_plan_service
+from utils.progress import smart_trim_history
+from utils.llm_gateway import get_llm_client
+
+HISTORY = [
+    {"role": "assistant", "content": "Thanks! [[Q:KYC.08]] What kind of business are you trying to build?"},
+    {"role": "user", "content": "Small business"},
+    {"role": "assistant", "content": "[[Q:KYC.10]] Where will your business operate?"},
+    {"role": "user", "content": "Austin, Texas, USA"},
+    {"role": "assistant", "content": "Got it.\n[[Q:KYC.11]] What industry does your business fall into?"},
+    {"role": "user", "content": "Specialty coffee roasting"},
+    {"role": "assistant", "content": "[[Q:BUSINESS_PLAN.01]] What is your business name?"},
+    {"role": "user", "content": "We are calling it Bean There and we also do catering in the food industry"},
+]
+
+
+class FakeCompletions:
+    def __init__(self, payload):
+        self.payload = payload
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        message = SimpleNamespace(content=json.dumps(self.payload))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+def extract(monkeypatch, history, payload):
+    completions = FakeCompletions(payload)
+    monkeypatch.setattr(get_llm_client().chat, "completions", completions)
+    monkeypatch.setattr(generate_plan_service, "profile_cache", generate_plan_service.ResearchCache("test_plan_profile", 60))
+    defaults = {"business_name": "Your Business", "industry": "General Business", "location": "United States", "business_type": "Startup"}
+    profile, messages = asyncio.run(generate_plan_service.extract_plan_profile(history, defaults))
+    return completions.calls, profile, messages
+
+
+def test_kyc_answers_win_and_remaining_fields_take_one_call(monkeypatch):
+    calls, profile, messages = extract(monkeypatch, smart_trim_history(HISTORY), {"business_name": "Bean There", "industry": "Food service"})
+
+    assert len(calls) == 1
+    assert calls[0]["response_format"] == {"type": "json_object"}
+    assert profile == {
+        "business_name": "Bean There",
+        "industry": "Specialty coffee roasting",
+        "location": "Austin, Texas, USA",
+        "business_type": "Small business",
+    }
+    assert len(messages) == len(HISTORY)
+
+
+def test_profile_is_shared_between_generators(monkeypatch):
+    completions = FakeCompletions({"business_name": "Bean There"})
+    monkeypatch.setattr(get_llm_client().chat, "completions", completions)
+    monkeypatch.setattr(generate_plan_service, "profile_cache", generate_plan_service.ResearchCache("test_plan_profile", 60))
+
+    async def scenario():
+        transcript = smart_trim_history(HISTORY)
+        await generate_plan_service.extract_plan_profile(transcript, {"industry": "general business"})
+        return await generate_plan_service.extract_plan_profile(transcript, {"business_name": "Your Business"})
+
+    profile, _ = asyncio.run(scenario())
+    assert len(completions.calls) == 1
+    assert profile == {"business_name": "Bean There"}
@@ -0,0 +1,41 @@
+import time
+
+import services.question_catalog as question_catalog
+from services.question_catalog import QUESTION_CATALOG, capture_question, capture_questions_from_history, find_previous_answer, render_question
+
+
+def test_catalog_covers_every_kyc_and_business_plan_question():
+    expected = {f"KYC.{n:02d}" for n in range(1, 20)} | {f"BUSINESS_PLAN.{n:02d}" for n in range(1, 47)}
+
+    assert set(QUESTION_CATALOG) == expected
+    assert QUESTION_CATALOG["BUSINESS_PLAN.01"].startswith("What is your business name?")
+    assert "special UI" not in QUESTION_CATALOG["KYC.07"]
+
+
+def test_session_wording_wins_over_the_catalog(monkeypatch):
+    monkeypatch.setattr(question_catalog, "session_questions", question_catalog.OrderedDict())
+    capture_question("s1", "KYC.10", "Love it!\n\n[[Q:KYC.10]] Where will Bean There operate?")
+    capture_question("s1", "KYC.10", "[[Q:KYC.10]] A later re-ask")
+
+    start = time.perf_counter()
+    question = render_question("s1", "KYC.10")
+    assert time.perf_counter() - start < 0.01
+
+    assert question == "[[Q:KYC.10]] Where will Bean There operate?"
+    assert render_question("s2", "KYC.10") == f"[[Q:KYC.10]] {QUESTION_CATALOG['KYC.10']}"
+    assert render_question("s1", "ROADMAP.01") is None
+
+
+def test_history_backfill_and_previous_answer(monkeypatch):
+    monkeypatch.setattr(question_catalog, "session_questions", question_catalog.OrderedDict())
+    history = [
+        {"role": "assistant", "content": "[[Q:KYC.01]] What's your name?"},
+        {"role": "user", "content": "Sam"},
+        {"role": "assistant", "content": "Nice to meet you!\n\n[[Q:KYC.02]] How should I talk to you, Sam?"},
+    ]
+
+    capture_questions_from_history("s1", history)
+
+    assert render_question("s1", "KYC.02") == "[[Q:KYC.02]] How should I talk to you, Sam?"
+    assert find_previous_answer(history, "KYC.01") == "Sam"
+    assert find_previous_answer(history, "KYC.02") is None
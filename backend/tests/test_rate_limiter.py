@@ -0,0 +1,78 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import Depends, FastAPI, Request
+from fastapi.testclient import TestClient
+
+from utils.rate_limiter import (
+    MemoryBucketBackend, RateLimiter, RateLimitExceeded, SQLiteBucketBackend,
+    get_rate_limit_identity, set_rate_limit_identity,
+)
+
+
+def limiter(backend=None, user="2/1", session="", global_limit="100/1"):
+    return RateLimiter("test", {"global": global_limit, "user": user, "session": session}, backend or MemoryBucketBackend())
+
+
+def test_user_bucket_queues_then_rejects_past_the_deadline():
+    test_limiter = limiter()
+
+    async def run():
+        set_rate_limit_identity("u1", "s1")
+        waits = [await test_limiter.acquire(max_wait=1) for _ in range(3)]
+        with pytest.raises(RateLimitExceeded):
+            for _ in range(5):
+                await test_limiter.acquire(max_wait=0.1)
+        # Another user has their own bucket
+        set_rate_limit_identity("u2", "s2")
+        return waits, await test_limiter.acquire(max_wait=0)
+
+    waits, other_user_wait = asyncio.run(run())
+
+    assert waits[0] == 0 and waits[1] == 0 and 0.3 < waits[2] < 1
+    assert other_user_wait == 0
+    stats = test_limiter.stats
+    assert stats["waited"] == 1 and stats["rejected"] == 1
+
+
+def test_sqlite_backend_is_shared_between_limiters(tmp_path):
+    path = str(tmp_path / "limits.sqlite3")
+    first = limiter(SQLiteBucketBackend(path), user="", global_limit="1/60")
+    second = limiter(SQLiteBucketBackend(path), user="", global_limit="1/60")
+
+    async def run():
+        await first.acquire(max_wait=0)
+        with pytest.raises(RateLimitExceeded):
+            await second.acquire(max_wait=0.1)
+
+    asyncio.run(run())
+
+
+def test_identity_set_in_a_dependency_reaches_the_endpoint():
+    async def identify(request: Request):
+        set_rate_limit_identity("u1", request.path_params.get("session_id"))
+
+    app = FastAPI()
+
+    @app.get("/sessions/{session_id}", dependencies=[Depends(identify)])
+    async def read(session_id: str):
+        return list(get_rate_limit_identity())
+
+    assert TestClient(app).get("/sessions/s9").json() == ["u1", "s9"]
+
+
+def test_sqlite_backend_runs_off_the_event_loop(tmp_path, monkeypatch):
+    backend = SQLiteBucketBackend(str(tmp_path / "limits.sqlite3"))
+    test_limiter = limiter(backend, user="", global_limit="10/1")
+    threads = []
+    take = backend.take
+
+    def recording_take(buckets, cost=1.0):
+        threads.append(threading.current_thread())
+        return take(buckets, cost)
+
+    monkeypatch.setattr(backend, "take", recording_take)
+    asyncio.run(test_limiter.acquire(max_wait=0))
+
+    assert threads and threads[0] is not threading.main_thread()
@@ -0,0 +1,74 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import utils.request_timing as request_timing
+import utils.research_cache as research_cache
+from middlewares.request_timing import RequestTimingMiddleware
+from utils.request_timing import render_metrics, timed, timed_span
+
+
+@timed("session_fetch")
+async def fetch_session():
+    await asyncio.sleep(0.01)
+    return {"id": "s1"}
+
+
+def build_app():
+    app = FastAPI()
+
+    @app.get("/sessions/{session_id}")
+    async def read_session(session_id: str):
+        session = await fetch_session()
+        with timed_span("llm.angel_service get_angel_reply"):
+            await asyncio.sleep(0.01)
+        return session
+
+    app.add_middleware(RequestTimingMiddleware)
+    return app
+
+
+def test_spans_become_server_timing_and_metrics(monkeypatch):
+    monkeypatch.setattr(request_timing, "request_latency", {})
+    monkeypatch.setattr(request_timing, "span_latency", {})
+    client = TestClient(build_app())
+
+    response = client.get("/sessions/abc")
+    client.get("/sessions/def")
+
+    names = [entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")]
+    assert names == ["session_fetch", "llm.angel_service_get_angel_reply", "total"]
+
+    metrics = render_metrics()
+    assert 'angel_request_duration_seconds_count{method="GET",route="/sessions/{session_id}",status="200"} 2' in metrics
+    assert 'angel_span_duration_seconds{route="/sessions/{session_id}",span="session_fetch",quantile="0.99"}' in metrics
+
+
+def test_spans_outside_a_request_are_ignored():
+    with timed_span("db_write"):
+        pass
+    assert asyncio.run(fetch_session()) == {"id": "s1"}
+
+
+def test_research_cache_counters_are_exported(monkeypatch):
+    monkeypatch.setattr(research_cache, "research_caches", {})
+    cache = research_cache.ResearchCache("tests_metrics", ttl=60, shared_path="")
+
+    async def use_cache():
+        await cache.set("k", {"v": 1})
+        await cache.get("k")
+        await cache.get("missing")
+
+    asyncio.run(use_cache())
+
+    metrics = render_metrics()
+    assert 'angel_research_cache_hits_total{cache="tests_metrics"} 1' in metrics
+    assert 'angel_research_cache_misses_total{cache="tests_metrics"} 1' in metrics
+    assert 'angel_research_cache_entries{cache="tests_metrics"} 1' in metrics
+
+
+def test_speculation_counters_are_exported():
+    metrics = render_metrics()
+    assert "\nangel_speculation_hits_total " in metrics
+    assert "\nangel_speculation_running 0" in metrics
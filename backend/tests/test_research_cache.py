@@ -0,0 +1,21 @@
+import asyncio
+
+import utils.research_cache as research_cache
+from utils.research_cache import ResearchCache
+
+
+def test_shared_tier_is_read_by_another_worker(tmp_path, monkeypatch):
+    monkeypatch.setattr(research_cache, "research_caches", {})
+    path = str(tmp_path / "research.sqlite3")
+    first = ResearchCache("tests_shared", 60, shared_path=path)
+    second = ResearchCache("tests_shared", 60, shared_path=path)
+
+    async def run():
+        await first.set("k", {"providers": ["a"]})
+        return await second.get("k"), await second.get("k")
+
+    shared, local = asyncio.run(run())
+
+    assert shared == local == {"providers": ["a"]}
+    assert second.stats["shared_hits"] == 1 and second.stats["hits"] == 1
+    assert second.stats["errors"] == 0
@@ -0,0 +1,52 @@
+import asyncio
+from types import SimpleNamespace
+
+import services.angel_service as angel_service
+from utils.llm_gateway import get_llm_client
+
+ANSWER = "We roast single-origin coffee in small batches and sell subscriptions to offices across Austin."
+
+
+class FakeCompletions:
+    """Records every chat completion request and answers with a fixed reply"""
+
+    def __init__(self, content):
+        self.content = content
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        message = SimpleNamespace(content=self.content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+def run_turn(monkeypatch, asked_q, content):
+    completions = FakeCompletions(content)
+    monkeypatch.setattr(get_llm_client().chat, "completions", completions)
+    session = {"current_phase": "BUSINESS_PLAN", "asked_q": asked_q, "answered_count": 3, "user_name": "Sam"}
+    history = [
+        {"role": "assistant", "content": f"[[Q:{asked_q}]] Tell me about your business."},
+        {"role": "user", "content": "Earlier answer about the business."},
+    ]
+    reply = asyncio.run(angel_service.get_angel_reply({"role": "user", "content": ANSWER}, history, session))
+    return completions.calls, reply
+
+
+def test_section_boundary_makes_exactly_one_completion(monkeypatch):
+    summary = "🎯 **Business Foundation Section Complete**\n\n**Summary of Your Information:**\nCoffee subscriptions. [[Q:BUSINESS_PLAN.05]]\n\n[[ACCEPT_MODIFY_BUTTONS]]"
+    calls, reply = run_turn(monkeypatch, "BUSINESS_PLAN.04", summary)
+
+    assert len(calls) == 1
+    # The summary instruction is part of the single request
+    assert any("Section Complete" in m["content"] for m in calls[0]["messages"] if m["role"] == "system")
+    # Summary replies keep the user on the boundary question
+    assert reply["patch_session"] is None
+    assert "[[Q:" not in reply["reply"]
+
+
+def test_regular_question_makes_one_completion_without_summary(monkeypatch):
+    calls, reply = run_turn(monkeypatch, "BUSINESS_PLAN.05", "Great detail!\n\n[[Q:BUSINESS_PLAN.06]] Who is your target customer?")
+
+    assert len(calls) == 1
+    assert not any("Section Complete" in m["content"] for m in calls[0]["messages"])
+    assert reply["patch_session"] == {"asked_q": "BUSINESS_PLAN.06"}
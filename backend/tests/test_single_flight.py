@@ -0,0 +1,60 @@
+import asyncio
+from types import SimpleNamespace
+
+import services.angel_service as angel_service
+from utils.llm_gateway import get_llm_client
+from utils.research_cache import ResearchCache
+from utils.single_flight import SingleFlight
+
+
+class SlowCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="coffee market findings"))], usage=None)
+
+
+def test_concurrent_identical_searches_share_one_call(monkeypatch):
+    completions = SlowCompletions()
+    monkeypatch.setattr(get_llm_client().chat, "completions", completions)
+    monkeypatch.setattr(angel_service, "web_search_cache", ResearchCache("test_web_search", 60))
+    monkeypatch.setattr(angel_service, "web_search_flights", SingleFlight("test_web_search"))
+
+    async def run():
+        first = await asyncio.gather(
+            angel_service.conduct_web_search("coffee market trends Austin"),
+            angel_service.conduct_web_search("Coffee  market trends austin"),
+            angel_service.conduct_web_search("coffee market trends Austin"),
+        )
+        later = await angel_service.conduct_web_search("coffee market trends Austin")
+        return first, later
+
+    first, later = asyncio.run(run())
+
+    assert first == ["coffee market findings"] * 3 and later == "coffee market findings"
+    assert completions.calls == 1
+    stats = angel_service.web_search_flights.get_stats()
+    assert stats["executions"] == 1 and stats["suppressed"] == 2 and stats["in_flight"] == 0
+    assert angel_service.web_search_cache.get_stats()["hits"] == 1
+
+
+def test_cancelled_leader_does_not_cancel_waiters():
+    flights = SingleFlight("test_cancel")
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def run():
+        leader = asyncio.ensure_future(flights.do("key", work))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.do("key", work))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(run()) == "done"
+    assert flights.get_stats()["errors"] == 0
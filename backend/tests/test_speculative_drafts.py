@@ -0,0 +1,59 @@
+import asyncio
+
+import services.speculative_drafts as speculative_drafts
+from services.speculative_drafts import invalidate_speculations, run_command, schedule_speculations
+
+
+class DraftHandler:
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self, reply, history, session_data):
+        self.calls += 1
+        await asyncio.sleep(0.02)
+        return f"draft {self.calls} for {session_data['asked_q']}"
+
+
+def enable(monkeypatch):
+    monkeypatch.setattr(speculative_drafts, "SPECULATIVE_DRAFTS", True)
+    monkeypatch.setattr(speculative_drafts, "speculations", speculative_drafts.OrderedDict())
+
+
+def test_draft_command_uses_the_speculation_once(monkeypatch):
+    enable(monkeypatch)
+    handler = DraftHandler()
+    session = {"id": "s1", "asked_q": "BUSINESS_PLAN.05"}
+    history = [{"role": "user", "content": "Coffee"}, {"role": "assistant", "content": "[[Q:BUSINESS_PLAN.05]] Describe it"}]
+
+    async def run():
+        schedule_speculations("s1", session, history, {"draft": handler})
+        first = await run_command("draft", handler, list(history), session)
+        second = await run_command("draft", handler, list(history), session)
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first == "draft 1 for BUSINESS_PLAN.05"
+    assert second == "draft 2 for BUSINESS_PLAN.05"
+    assert handler.calls == 2
+
+
+def test_newer_answer_invalidates_the_speculation(monkeypatch):
+    enable(monkeypatch)
+    handler = DraftHandler()
+    session = {"id": "s1", "asked_q": "BUSINESS_PLAN.05"}
+    history = [{"role": "assistant", "content": "[[Q:BUSINESS_PLAN.05]] Describe it"}]
+
+    async def run():
+        schedule_speculations("s1", session, history, {"draft": handler})
+        task = speculative_drafts.speculations["s1"]["tasks"]["draft"]
+        invalidate_speculations("s1")
+        await asyncio.sleep(0)
+        newer = history + [{"role": "user", "content": "Actually, tea"}]
+        reply = await run_command("draft", handler, newer, session)
+        return task, reply
+
+    task, reply = asyncio.run(run())
+
+    assert task.cancelled()
+    assert reply == "draft 1 for BUSINESS_PLAN.05" and handler.calls == 1
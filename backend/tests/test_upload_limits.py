@@ -0,0 +1,73 @@
+import multiprocessing
+import time
+from types import SimpleNamespace
+
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+import services.upload_plan_service as upload_plan_service
+from middlewares.body_size_limit import BodySizeLimitMiddleware
+from exceptions import http_exception_handler
+from starlette.exceptions import HTTPException as StarletteHTTPException
+
+BOUNDARY = "plan-boundary"
+
+
+def build_client():
+    app = FastAPI()
+
+    @app.post("/upload-plan/")
+    async def upload(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    app.add_exception_handler(StarletteHTTPException, http_exception_handler)
+    app.add_middleware(BodySizeLimitMiddleware, max_body_size=1024, path_prefixes=("/upload-plan",))
+    return TestClient(app)
+
+
+def multipart(size):
+    return (
+        f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"plan.txt\"\r\n"
+        f"Content-Type: text/plain\r\n\r\n{'x' * size}\r\n--{BOUNDARY}--\r\n"
+    ).encode()
+
+
+def test_oversized_bodies_are_rejected_before_the_endpoint():
+    client = build_client()
+    headers = {"content-type": f"multipart/form-data; boundary={BOUNDARY}"}
+
+    assert client.post("/upload-plan/", content=multipart(100), headers=headers).json() == {"size": 100}
+
+    declared = client.post("/upload-plan/", content=multipart(4096), headers=headers)
+    assert declared.status_code == 413
+
+    body = multipart(4096)
+    chunked = client.post("/upload-plan/", content=(body[i:i + 256] for i in range(0, len(body), 256)), headers=headers)
+    assert chunked.status_code == 413
+    assert chunked.json()["success"] is False
+
+
+def test_timed_out_parse_pool_is_recycled(monkeypatch):
+    monkeypatch.setattr(upload_plan_service, "_parse_pool", None)
+    pool = upload_plan_service._get_parse_pool()
+    pool.submit(time.sleep, 30)
+    time.sleep(0.5)
+    processes = multiprocessing.active_children()
+
+    upload_plan_service._recycle_parse_pool()
+    for process in processes:
+        process.join(timeout=5)
+
+    assert processes and not any(process.is_alive() for process in processes)
+    assert upload_plan_service._parse_pool is None
+
+
+def test_pool_without_worker_handles_is_still_retired(monkeypatch):
+    shutdowns = []
+    pool = SimpleNamespace(shutdown=lambda **kwargs: shutdowns.append(kwargs))
+    monkeypatch.setattr(upload_plan_service, "_parse_pool", pool)
+
+    upload_plan_service._recycle_parse_pool()
+
+    assert shutdowns == [{"wait": False, "cancel_futures": True}]
+    assert upload_plan_service._parse_pool is None
@@ -803,4 +803,25 @@ Ready to begin your journey to business success?"
 • Maintain session state and context across interactions
 • Provide clear indicators of current position in process
 • Enable modification of business plan with automatic roadmap updates
-"""
\ No newline at end of file
+"""
+
+TAG_PROMPT = """CRITICAL: You MUST include a machine-readable tag in EVERY response that contains a question. Use this exact format:
+[[Q:<PHASE>.<NN>]] 
+
+Examples:
+- [[Q:KYC.01]] What's your name?
+- [[Q:KYC.02]] What is your preferred communication style?
+- [[Q:BUSINESS_PLAN.01]] What is your business idea?
+- [[Q:BUSINESS_PLAN.19]] What is your revenue model?
+- [[Q:BUSINESS_PLAN.20]] How will you market your business?
+
+IMPORTANT RULES:
+1. The tag must be at the beginning of your question, before any other text
+2. Question numbers must be sequential and correct for the current phase
+3. For BUSINESS_PLAN phase, questions should be numbered 01 through 46
+4. NEVER jump backwards in question numbers (e.g., from 19 to 10)
+5. If you're continuing a conversation, increment the question number appropriately
+
+FAILURE TO INCLUDE CORRECT TAGS WILL BREAK THE SYSTEM. ALWAYS include the correct sequential tag before asking any question.
+
+FORMATTING REQUIREMENT: Always use structured format for questions - NEVER paragraph format!"""
@@ -0,0 +1,156 @@
+import os
+from typing import Dict, List, Optional, Tuple
+
+# Total input-token budget for one chat completion (system prompts + state + research + history + user turn)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "18000"))
+# Most recent messages that are kept ahead of optional sections like research results
+MIN_RECENT_MESSAGES = 4
+# Per-message character cap when older turns are condensed instead of dropped
+CONDENSED_MESSAGE_CHARS = 160
+# Rough characters-per-token ratio used when tiktoken is unavailable
+CHARS_PER_TOKEN = 4
+# Fixed per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_encoding = None
+_encoding_loaded = False
+
+def _get_encoding():
+    """Load the gpt-4o tokenizer once; tiktoken is optional and falls back to a character heuristic"""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.encoding_for_model("gpt-4o")
+        except Exception as e:
+            print(f"⚠️ tiktoken unavailable ({e}) - using character heuristic for token counts")
+            _encoding = None
+    return _encoding
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def count_message_tokens(message: Dict) -> int:
+    return count_tokens(message.get("content", "")) + MESSAGE_OVERHEAD_TOKENS
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text down to roughly max_tokens, keeping the beginning"""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    encoding = _get_encoding()
+    if encoding is not None:
+        return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens]) + "\n[...truncated]"
+    return text[:max_tokens * CHARS_PER_TOKEN] + "\n[...truncated]"
+
+def condense_messages(messages: List[Dict]) -> str:
+    """One line per message, used for turns that no longer fit in full"""
+    lines = []
+    for msg in messages:
+        content = " ".join(msg.get("content", "").split())
+        if len(content) > CONDENSED_MESSAGE_CHARS:
+            content = content[:CONDENSED_MESSAGE_CHARS] + "..."
+        lines.append(f"- {msg.get('role', 'user').upper()}: {content}")
+    return "Earlier conversation (condensed):\n" + "\n".join(lines)
+
+def build_context_window(
+    system_sections: List[Tuple[str, str]],
+    history: List[Dict],
+    user_content: str,
+    optional_sections: Optional[List[Tuple[str, str]]] = None,
+    trailing_sections: Optional[List[Tuple[str, str]]] = None,
+    budget: int = CONTEXT_TOKEN_BUDGET,
+    max_history_messages: int = 10
+) -> Tuple[List[Dict], Dict]:
+    """
+    Pack chat messages into a fixed token budget.
+
+    Priority (highest first):
+    1. system_sections - always included, in order (prompts, formatting rules, session state)
+       and trailing_sections - always included, placed after the user's message
+    2. the user's message
+    3. the MIN_RECENT_MESSAGES newest history messages
+    4. optional_sections (e.g. research results) - truncated to what is left
+    5. the rest of the newest max_history_messages, newest first
+    6. a condensed one-line-per-message summary of history that did not fit
+
+    Returns (messages, report) where report holds the tokens used per section.
+    """
+    report = {"budget": budget}
+    used = 0
+
+    system_msgs = []
+    for name, content in system_sections:
+        tokens = count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+        report[name] = report.get(name, 0) + tokens
+        used += tokens
+        system_msgs.append({"role": "system", "content": content})
+
+    user_msg = {"role": "user", "content": user_content}
+    report["user_message"] = count_message_tokens(user_msg)
+    used += report["user_message"]
+
+    trailing_msgs = []
+    for name, content in trailing_sections or []:
+        tokens = count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+        report[name] = report.get(name, 0) + tokens
+        used += tokens
+        trailing_msgs.append({"role": "system", "content": content})
+
+    window = [{"role": msg["role"], "content": msg["content"]} for msg in history[-max_history_messages:]] if max_history_messages > 0 else []
+    kept = []
+    history_tokens = 0
+
+    def take_history(limit):
+        nonlocal used, history_tokens
+        while window and len(kept) < limit:
+            tokens = count_message_tokens(window[-1])
+            if used + tokens > budget:
+                return False
+            kept.insert(0, window.pop())
+            used += tokens
+            history_tokens += tokens
+        return True
+
+    take_history(MIN_RECENT_MESSAGES)
+
+    optional_msgs = []
+    for name, content in optional_sections or []:
+        if not content:
+            continue
+        remaining = budget - used - MESSAGE_OVERHEAD_TOKENS
+        content = truncate_to_tokens(content, remaining)
+        if not content:
+            report[name] = 0
+            continue
+        tokens = count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+        report[name] = tokens
+        used += tokens
+        optional_msgs.append({"role": "system", "content": content})
+
+    take_history(max_history_messages)
+
+    summary_msgs = []
+    if window:
+        # Whatever is left in the window did not fit - condense it if there is room
+        summary = truncate_to_tokens(condense_messages(window), budget - used - MESSAGE_OVERHEAD_TOKENS)
+        if summary:
+            tokens = count_tokens(summary) + MESSAGE_OVERHEAD_TOKENS
+            report["condensed_history"] = tokens
+            used += tokens
+            summary_msgs.append({"role": "system", "content": summary})
+
+    report["history"] = history_tokens
+    report["history_messages"] = len(kept)
+    report["dropped_messages"] = len(window)
+    report["total"] = used
+
+    messages = system_msgs + optional_msgs + summary_msgs + kept + [user_msg] + trailing_msgs
+    return messages, report
@@ -0,0 +1,255 @@
+import os
+import time
+import json
+import uuid
+import sqlite3
+import asyncio
+import tempfile
+import threading
+import contextvars
+from typing import Any, Awaitable, Callable, Dict, Optional
+from utils.rate_limiter import set_rate_limit_identity, reset_rate_limit_identity
+
+# Durable job queue: a SQLite file shared by every worker process on the host
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", os.path.join(tempfile.gettempdir(), "angel_jobs.sqlite3"))
+# Jobs run concurrently per worker process
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "2"))
+# Seconds between queue polls when no local enqueue woke the workers
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2"))
+# A running job whose lease is not renewed for this long (worker died/restarted) is picked up again
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+# Give up on a job after this many attempts
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "2"))
+# Hard limit on a single attempt
+JOB_TIMEOUT = float(os.getenv("JOB_TIMEOUT", "600"))
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+
+# kind -> async handler(payload) returning a JSON-serializable result
+job_handlers: Dict[str, Callable[[Dict[str, Any]], Awaitable[Any]]] = {}
+
+# Id of the job the current task is running, so report_job_progress works from deep inside generators
+_current_job = contextvars.ContextVar("current_job", default=None)
+
+def register_job_handler(kind: str, handler: Callable[[Dict[str, Any]], Awaitable[Any]]) -> None:
+    job_handlers[kind] = handler
+
+class JobStore:
+    """
+    Jobs table in SQLite. Claims are atomic across processes, so several workers can share one file.
+    Methods block (up to the 5s busy timeout); async code calls them through asyncio.to_thread.
+    """
+
+    def __init__(self, path: str = JOB_STORE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                user_id TEXT,
+                session_id TEXT,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                stage TEXT,
+                progress REAL NOT NULL DEFAULT 0,
+                result TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_expires_at REAL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+        self.conn.commit()
+
+    def create(self, kind: str, payload: Dict[str, Any], user_id: str = None, session_id: str = None) -> str:
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO jobs (id, kind, user_id, session_id, payload, stage, created_at, updated_at) VALUES (?, ?, ?, ?, ?, 'queued', ?, ?)",
+                (job_id, kind, user_id, session_id, json.dumps(payload, default=str), now, now)
+            )
+            self.conn.commit()
+        return job_id
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """Take the oldest queued job, or a running one whose lease expired, and mark it running"""
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT id, status, lease_expires_at FROM jobs WHERE status = 'queued' OR (status = 'running' AND lease_expires_at < ?) ORDER BY created_at LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            # Compare-and-set on the lease so two processes cannot claim the same job
+            cursor = self.conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_expires_at = ?, updated_at = ? "
+                "WHERE id = ? AND status = ? AND lease_expires_at IS ?",
+                (now + JOB_LEASE_SECONDS, now, row["id"], row["status"], row["lease_expires_at"])
+            )
+            self.conn.commit()
+            if cursor.rowcount != 1:
+                return None
+        return self.get(row["id"])
+
+    def renew(self, job_id: str) -> None:
+        with self.lock:
+            self.conn.execute(
+                "UPDATE jobs SET lease_expires_at = ? WHERE id = ? AND status = 'running'",
+                (time.time() + JOB_LEASE_SECONDS, job_id)
+            )
+            self.conn.commit()
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"], default=str)
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self.lock:
+            self.conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+            self.conn.commit()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+_store = None
+_store_lock = threading.Lock()
+_workers = []
+_wakeup = None
+
+def get_job_store() -> JobStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = JobStore()
+    return _store
+
+async def _call_store(method: str, *args: Any, **kwargs: Any) -> Any:
+    """Run a JobStore method in a worker thread so SQLite lock waits never block the event loop"""
+    return await asyncio.to_thread(lambda: getattr(get_job_store(), method)(*args, **kwargs))
+
+async def report_job_progress(stage: str, progress: Optional[float] = None) -> None:
+    """Record the current stage of the running job; a no-op outside a job"""
+    job_id = _current_job.get()
+    if job_id is None:
+        return
+    fields = {"stage": stage}
+    if progress is not None:
+        fields["progress"] = max(0.0, min(1.0, progress))
+    try:
+        await _call_store("update", job_id, **fields)
+    except Exception as e:
+        print(f"⚠️ Job {job_id}: progress update failed: {e}")
+
+async def enqueue_job(kind: str, payload: Dict[str, Any], user_id: str = None, session_id: str = None) -> str:
+    """Persist a job and wake this process's workers; returns the job id"""
+    if kind not in job_handlers:
+        raise ValueError(f"No handler registered for job kind: {kind}")
+    job_id = await _call_store("create", kind, payload, user_id=user_id, session_id=session_id)
+    start_job_workers()
+    _wakeup.set()
+    print(f"🧾 Job {job_id} queued: {kind}")
+    return job_id
+
+async def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    return await _call_store("get", job_id)
+
+def public_job_view(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields returned to API clients"""
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "stage": job["stage"],
+        "progress": job["progress"],
+        "attempts": job["attempts"],
+        "result": job["result"] if job["status"] == "succeeded" else None,
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
+
+async def _keep_lease(job_id: str) -> None:
+    while True:
+        await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+        await _call_store("renew", job_id)
+
+async def _run_job(job: Dict[str, Any]) -> None:
+    job_id = job["id"]
+    handler = job_handlers.get(job["kind"])
+    if handler is None:
+        await _call_store("update", job_id, status="failed", error=f"No handler for job kind: {job['kind']}", lease_expires_at=None)
+        return
+
+    if job["attempts"] > JOB_MAX_ATTEMPTS:
+        # Lease expired on the last allowed attempt - the worker running it was lost
+        await _call_store("update", job_id, status="failed", stage="failed", error="Worker stopped while running the job", lease_expires_at=None)
+        return
+
+    start_time = time.time()
+    token = _current_job.set(job_id)
+    # LLM calls made by the job count against its user's and session's rate limits
+    identity = set_rate_limit_identity(job.get("user_id"), job.get("session_id"))
+    lease = asyncio.ensure_future(_keep_lease(job_id))
+    try:
+        result = await asyncio.wait_for(handler(job["payload"]), JOB_TIMEOUT)
+        await _call_store("update", job_id, status="succeeded", stage="done", progress=1.0, result=result, error=None, lease_expires_at=None)
+        print(f"✅ Job {job_id} ({job['kind']}) finished in {time.time() - start_time:.2f}s")
+    except Exception as e:
+        error = "Timed out" if isinstance(e, asyncio.TimeoutError) else str(e)
+        if job["attempts"] < JOB_MAX_ATTEMPTS:
+            await _call_store("update", job_id, status="queued", stage="retrying", error=error, lease_expires_at=None)
+        else:
+            await _call_store("update", job_id, status="failed", stage="failed", error=error, lease_expires_at=None)
+        print(f"❌ Job {job_id} ({job['kind']}) attempt {job['attempts']} failed: {error}")
+    finally:
+        lease.cancel()
+        _current_job.reset(token)
+        reset_rate_limit_identity(identity)
+
+async def _worker_loop(worker_number: int) -> None:
+    while True:
+        # Cleared before claiming so an enqueue racing with an empty claim is not missed
+        _wakeup.clear()
+        try:
+            job = await _call_store("claim")
+        except Exception as e:
+            print(f"⚠️ Job worker {worker_number}: claim failed: {e}")
+            job = None
+        if job is None:
+            try:
+                await asyncio.wait_for(_wakeup.wait(), JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        await _run_job(job)
+
+def start_job_workers() -> None:
+    """Start this process's worker tasks once; jobs left by a restarted worker are picked up when their lease expires"""
+    global _wakeup
+    if _workers:
+        return
+    _wakeup = asyncio.Event()
+    for worker_number in range(JOB_WORKER_CONCURRENCY):
+        _workers.append(asyncio.ensure_future(_worker_loop(worker_number)))
+    print(f"🧾 Started {JOB_WORKER_CONCURRENCY} job workers ({JOB_STORE_PATH})")
+
+async def stop_job_workers() -> None:
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
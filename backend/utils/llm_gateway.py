@@ -0,0 +1,244 @@
+import os
+import time
+import random
+import asyncio
+from collections import deque
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict
+import httpx
+from utils.request_timing import timed_span
+from utils.rate_limiter import get_rate_limiter
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+# One pooled HTTP client for every OpenAI call in the worker
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "64"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "32"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+LLM_HTTP2 = os.getenv("LLM_HTTP2", "true").lower() == "true"
+# Process-wide cap on OpenAI calls in flight (streams hold a slot until they finish)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+# Full-jitter exponential backoff between retries
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "8"))
+# Recent latencies kept per call site for percentiles
+LLM_LATENCY_SAMPLES = 200
+
+# Timeout (seconds per attempt), retry count and longest wait for a rate-limit token for each kind of task
+LLM_TASK_POLICIES = {
+    # A user is waiting on the reply
+    "interactive": {"timeout": 45.0, "retries": 2, "max_wait": 10.0},
+    # Structured extraction that callers can fall back from
+    "extraction": {"timeout": 60.0, "retries": 2, "max_wait": 30.0},
+    # Long documents (plans, roadmaps); usually run as background jobs
+    "generation": {"timeout": 240.0, "retries": 1, "max_wait": 120.0},
+}
+
+def retryable_errors() -> tuple:
+    """Transient OpenAI errors; the SDK is imported with the client, not at app startup"""
+    import openai
+    return (
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.RateLimitError,
+        openai.InternalServerError,
+    )
+
+# call_site -> counters and recent latencies
+llm_call_stats: Dict[str, Dict[str, Any]] = {}
+
+_client = None
+_semaphore = None
+
+def _http2_available() -> bool:
+    if not LLM_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401 - httpx needs it for HTTP/2
+        return True
+    except ImportError:
+        print("⚠️ h2 not installed - LLM gateway using HTTP/1.1")
+        return False
+
+def get_llm_client() -> "AsyncOpenAI":
+    """The shared OpenAI client. Retries are handled by the gateway, so the SDK's own are off."""
+    global _client
+    if _client is None:
+        from openai import AsyncOpenAI
+        http_client = httpx.AsyncClient(
+            http2=_http2_available(),
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(LLM_TASK_POLICIES["interactive"]["timeout"], connect=LLM_CONNECT_TIMEOUT),
+        )
+        _client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=http_client, max_retries=0)
+    return _client
+
+async def close_llm_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    return _semaphore
+
+def _policy(task: str) -> Dict[str, float]:
+    policy = LLM_TASK_POLICIES.get(task)
+    if policy is None:
+        raise ValueError(f"Unknown LLM task policy: {task}")
+    return policy
+
+def _call_stats(call_site: str) -> Dict[str, Any]:
+    return llm_call_stats.setdefault(call_site, {
+        "calls": 0,
+        "errors": 0,
+        "retries": 0,
+        "timeouts": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "latency_total": 0.0,
+        "latency_max": 0.0,
+        "latencies": deque(maxlen=LLM_LATENCY_SAMPLES),
+    })
+
+def _record_call(call_site: str, elapsed: float, usage=None, error: Exception = None) -> None:
+    stats = _call_stats(call_site)
+    stats["calls"] += 1
+    stats["latency_total"] += elapsed
+    stats["latency_max"] = max(stats["latency_max"], elapsed)
+    stats["latencies"].append(elapsed)
+    if usage is not None:
+        stats["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+        stats["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+    if error is not None:
+        import openai
+        stats["errors"] += 1
+        if isinstance(error, (openai.APITimeoutError, asyncio.TimeoutError)):
+            stats["timeouts"] += 1
+        print(f"❌ LLM [{call_site}] failed after {elapsed:.2f}s: {error}")
+
+def _retry_delay(attempt: int, error: Exception) -> float:
+    retry_after = None
+    response = getattr(error, "response", None)
+    if response is not None:
+        try:
+            retry_after = float(response.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            retry_after = None
+    if retry_after is not None:
+        return min(retry_after, LLM_RETRY_MAX_DELAY)
+    return random.uniform(0, min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * (2 ** attempt)))
+
+async def chat_completion(call_site: str, task: str = "interactive", **kwargs: Any):
+    """
+    Run a chat completion through the shared client.
+
+    call_site names the caller in telemetry; task picks the timeout/retry/rate-limit wait
+    policy, and a `timeout` kwarg overrides the policy's per-attempt timeout. Timeouts, connection errors,
+    429s and 5xx responses are retried with jittered backoff; the last error is raised once
+    retries run out.
+    """
+    policy = _policy(task)
+    timeout = kwargs.pop("timeout", policy["timeout"])
+    client = get_llm_client()
+    attempt = 0
+    # Global/user/session OpenAI budget; raises RateLimitExceeded past the task's max_wait
+    await get_rate_limiter("openai").acquire(policy["max_wait"])
+    with timed_span(f"llm.{call_site}"):
+        async with _get_semaphore():
+            while True:
+                start_time = time.perf_counter()
+                try:
+                    response = await client.chat.completions.create(timeout=timeout, **kwargs)
+                except retryable_errors() as e:
+                    _record_call(call_site, time.perf_counter() - start_time, error=e)
+                    if attempt >= policy["retries"]:
+                        raise
+                    delay = _retry_delay(attempt, e)
+                    attempt += 1
+                    _call_stats(call_site)["retries"] += 1
+                    print(f"🔁 LLM [{call_site}] retry {attempt}/{int(policy['retries'])} in {delay:.2f}s")
+                    await asyncio.sleep(delay)
+                    continue
+                except Exception as e:
+                    _record_call(call_site, time.perf_counter() - start_time, error=e)
+                    raise
+                _record_call(call_site, time.perf_counter() - start_time, usage=getattr(response, "usage", None))
+                return response
+
+async def stream_chat_completion(call_site: str, task: str = "interactive", **kwargs: Any) -> AsyncIterator[Any]:
+    """
+    Stream a chat completion through the shared client, yielding chunks.
+
+    Only opening the stream is retried - once chunks have been yielded a failure is raised.
+    Token usage is recorded when the request sets stream_options={"include_usage": True}.
+    """
+    policy = _policy(task)
+    timeout = kwargs.pop("timeout", policy["timeout"])
+    client = get_llm_client()
+    attempt = 0
+    # Global/user/session OpenAI budget; raises RateLimitExceeded past the task's max_wait
+    await get_rate_limiter("openai").acquire(policy["max_wait"])
+    with timed_span(f"llm.{call_site}"):
+        async with _get_semaphore():
+            while True:
+                start_time = time.perf_counter()
+                try:
+                    stream = await client.chat.completions.create(timeout=timeout, stream=True, **kwargs)
+                    break
+                except retryable_errors() as e:
+                    _record_call(call_site, time.perf_counter() - start_time, error=e)
+                    if attempt >= policy["retries"]:
+                        raise
+                    delay = _retry_delay(attempt, e)
+                    attempt += 1
+                    _call_stats(call_site)["retries"] += 1
+                    print(f"🔁 LLM [{call_site}] retry {attempt}/{int(policy['retries'])} in {delay:.2f}s")
+                    await asyncio.sleep(delay)
+                except Exception as e:
+                    _record_call(call_site, time.perf_counter() - start_time, error=e)
+                    raise
+
+            usage = None
+            try:
+                async for chunk in stream:
+                    if getattr(chunk, "usage", None):
+                        usage = chunk.usage
+                    yield chunk
+            except Exception as e:
+                _record_call(call_site, time.perf_counter() - start_time, usage=usage, error=e)
+                raise
+            _record_call(call_site, time.perf_counter() - start_time, usage=usage)
+
+def _percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def get_llm_call_stats() -> Dict[str, Dict[str, Any]]:
+    """Calls, errors, retries, tokens and latency (avg/p50/p95/max, seconds) per call site"""
+    report = {}
+    for call_site, stats in llm_call_stats.items():
+        latencies = stats["latencies"]
+        report[call_site] = {
+            "calls": stats["calls"],
+            "errors": stats["errors"],
+            "retries": stats["retries"],
+            "timeouts": stats["timeouts"],
+            "prompt_tokens": stats["prompt_tokens"],
+            "completion_tokens": stats["completion_tokens"],
+            "latency_avg": round(stats["latency_total"] / stats["calls"], 3) if stats["calls"] else 0.0,
+            "latency_p50": round(_percentile(latencies, 0.5), 3),
+            "latency_p95": round(_percentile(latencies, 0.95), 3),
+            "latency_max": round(stats["latency_max"], 3),
+        }
+    return report
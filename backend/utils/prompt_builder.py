@@ -0,0 +1,58 @@
+from typing import Dict, List, Tuple
+from utils.constant import ANGEL_SYSTEM_PROMPT, TAG_PROMPT
+
+# Canonical static prefix shared by every Angel completion.
+# OpenAI caches prompt prefixes automatically, so these messages must stay byte-identical
+# and first in every request. Anything per-user or per-turn (user_name, session state,
+# research, history) goes AFTER the prefix.
+STATIC_PREFIX = (
+    {"role": "system", "content": ANGEL_SYSTEM_PROMPT},
+)
+
+# Chat turns (question flow) also share the tag rules, so they get a longer common prefix
+CHAT_PREFIX = STATIC_PREFIX + (
+    {"role": "system", "content": TAG_PROMPT},
+)
+
+# Per call-site prompt cache counters, fed from the usage block of each response
+prompt_cache_stats = {}
+
+def prefix_sections(chat: bool = False) -> List[Tuple[str, str]]:
+    """Static prefix as (name, content) pairs, for builders that take named sections"""
+    sections = [("system_prompt", ANGEL_SYSTEM_PROMPT)]
+    if chat:
+        sections.append(("tag_prompt", TAG_PROMPT))
+    return sections
+
+def build_angel_messages(*dynamic_messages: Dict, chat: bool = False) -> List[Dict]:
+    """Return the static prefix followed by the call's dynamic messages"""
+    prefix = CHAT_PREFIX if chat else STATIC_PREFIX
+    return [dict(message) for message in prefix] + list(dynamic_messages)
+
+def record_prompt_usage(call_site: str, usage) -> None:
+    """Track prompt tokens vs provider-cached prompt tokens for a call site"""
+    if usage is None:
+        return
+
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = (getattr(details, "cached_tokens", 0) or 0) if details else 0
+
+    stats = prompt_cache_stats.setdefault(call_site, {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0})
+    stats["calls"] += 1
+    stats["prompt_tokens"] += prompt_tokens
+    stats["cached_tokens"] += cached_tokens
+
+    hit_rate = (cached_tokens / prompt_tokens * 100) if prompt_tokens else 0
+    print(f"💾 Prompt cache [{call_site}]: {cached_tokens}/{prompt_tokens} prompt tokens cached ({hit_rate:.0f}%)")
+
+def get_prompt_cache_stats() -> Dict:
+    """Cumulative cached-token hit rate per call site"""
+    report = {}
+    for call_site, stats in prompt_cache_stats.items():
+        prompt_tokens = stats["prompt_tokens"]
+        report[call_site] = {
+            **stats,
+            "hit_rate": round(stats["cached_tokens"] / prompt_tokens, 4) if prompt_tokens else 0.0
+        }
+    return report
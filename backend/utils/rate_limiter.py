@@ -0,0 +1,219 @@
+import os
+import time
+import random
+import sqlite3
+import asyncio
+import threading
+import contextvars
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from utils.request_timing import LatencySeries, timed_span
+
+# Optional shared tier: path to a SQLite file visible to every worker on the host (unset = per-process buckets)
+RATE_LIMIT_SQLITE_PATH = os.getenv("RATE_LIMIT_SQLITE_PATH", "")
+# Longest single sleep while waiting for a token, so waiters re-check fairly often
+RATE_LIMIT_MAX_POLL = 0.5
+# Buckets kept per process; the least recently used (idle, so usually full) are dropped first
+RATE_LIMIT_MAX_BUCKETS = int(os.getenv("RATE_LIMIT_MAX_BUCKETS", "10000"))
+# Shared-store rows untouched this long are deleted (they would have refilled anyway)
+RATE_LIMIT_IDLE_SECONDS = 3600
+
+# Limits as "<requests>/<seconds>" (bursts up to <requests>); empty disables that bucket
+RATE_LIMITS = {
+    "openai": {
+        "global": os.getenv("RATE_LIMIT_OPENAI_GLOBAL", "3000/60"),
+        "user": os.getenv("RATE_LIMIT_OPENAI_USER", "240/60"),
+        "session": os.getenv("RATE_LIMIT_OPENAI_SESSION", "120/60"),
+    },
+    "web_search": {
+        "global": os.getenv("RATE_LIMIT_WEB_SEARCH_GLOBAL", "300/60"),
+        "user": os.getenv("RATE_LIMIT_WEB_SEARCH_USER", "60/60"),
+        "session": os.getenv("RATE_LIMIT_WEB_SEARCH_SESSION", "30/60"),
+    },
+}
+
+class RateLimitExceeded(Exception):
+    """No token became available before the caller's deadline"""
+
+    def __init__(self, limiter: str, retry_after: float):
+        super().__init__(f"Rate limit '{limiter}' exceeded - retry in {retry_after:.1f}s")
+        self.limiter = limiter
+        self.retry_after = retry_after
+
+def parse_limit(limit: str) -> Optional[Tuple[float, float]]:
+    """'120/60' -> (2.0 tokens per second, capacity 120); None when disabled"""
+    if not limit or not limit.strip():
+        return None
+    requests, _, seconds = limit.partition("/")
+    requests, seconds = float(requests), float(seconds or 1)
+    if requests <= 0:
+        return None
+    return requests / seconds, requests
+
+# (user_id, session_id) the current task is acting for; set by auth and the job runner
+_identity = contextvars.ContextVar("rate_limit_identity", default=(None, None))
+
+def set_rate_limit_identity(user_id: Optional[str], session_id: Optional[str] = None) -> contextvars.Token:
+    return _identity.set((user_id, session_id))
+
+def reset_rate_limit_identity(token: contextvars.Token) -> None:
+    _identity.reset(token)
+
+def get_rate_limit_identity() -> Tuple[Optional[str], Optional[str]]:
+    return _identity.get()
+
+def _refill(tokens: float, updated_at: float, rate: float, capacity: float, now: float) -> float:
+    return min(capacity, tokens + (now - updated_at) * rate)
+
+class MemoryBucketBackend:
+    """Token buckets for this process only"""
+
+    # Pure in-memory work: taken directly on the event loop
+    blocking = False
+
+    def __init__(self, max_buckets: int = RATE_LIMIT_MAX_BUCKETS):
+        self.max_buckets = max_buckets
+        self.buckets = OrderedDict()
+
+    def take(self, buckets: List[Tuple[str, float, float]], cost: float = 1.0) -> float:
+        """Take `cost` from every bucket, or from none; returns 0 or the seconds until all could pay"""
+        now = time.monotonic()
+        levels = {}
+        for key, rate, capacity in buckets:
+            tokens, updated_at = self.buckets.get(key, (capacity, now))
+            levels[key] = _refill(tokens, updated_at, rate, capacity, now)
+        wait = max(((cost - levels[key]) / rate for key, rate, _ in buckets if levels[key] < cost), default=0.0)
+        for key, _, _ in buckets:
+            self.buckets[key] = (levels[key] - cost if wait == 0 else levels[key], now)
+            self.buckets.move_to_end(key)
+        while len(self.buckets) > self.max_buckets:
+            self.buckets.popitem(last=False)
+        return wait
+
+class SQLiteBucketBackend:
+    """Token buckets in a SQLite file, so every gunicorn worker on the host draws from the same budget"""
+
+    # File locks can block for up to the connect timeout, so takes run in a worker thread
+    blocking = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.last_prune = 0.0
+        self._conn = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # Opened on first use (call with self.lock held), so a preloaded app never carries it across fork
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+                    key TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            self._conn = conn
+        return self._conn
+
+    def take(self, buckets: List[Tuple[str, float, float]], cost: float = 1.0) -> float:
+        # Wall clock, since monotonic clocks are not comparable across processes
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                levels = {}
+                for key, rate, capacity in buckets:
+                    row = self.conn.execute("SELECT tokens, updated_at FROM rate_limit_buckets WHERE key = ?", (key,)).fetchone()
+                    tokens, updated_at = row if row else (capacity, now)
+                    levels[key] = _refill(tokens, min(updated_at, now), rate, capacity, now)
+                wait = max(((cost - levels[key]) / rate for key, rate, _ in buckets if levels[key] < cost), default=0.0)
+                for key, _, _ in buckets:
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                        (key, levels[key] - cost if wait == 0 else levels[key], now)
+                    )
+                if now - self.last_prune > RATE_LIMIT_IDLE_SECONDS:
+                    self.conn.execute("DELETE FROM rate_limit_buckets WHERE updated_at < ?", (now - RATE_LIMIT_IDLE_SECONDS,))
+                    self.last_prune = now
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return wait
+
+class RateLimiter:
+    """Global, per-user and per-session token buckets for one kind of call"""
+
+    def __init__(self, name: str, limits: Dict[str, str], backend):
+        self.name = name
+        self.limits = {scope: parse_limit(limit) for scope, limit in limits.items()}
+        self.backend = backend
+        self.wait_latency = LatencySeries()
+        self.stats = {"acquired": 0, "waited": 0, "rejected": 0, "backend_errors": 0}
+
+    def _buckets(self, user_id: Optional[str], session_id: Optional[str]) -> List[Tuple[str, float, float]]:
+        owners = {"global": "all", "user": user_id, "session": session_id}
+        buckets = []
+        for scope, limit in self.limits.items():
+            if limit is None or not owners.get(scope):
+                continue
+            rate, capacity = limit
+            buckets.append((f"{self.name}:{scope}:{owners[scope]}", rate, capacity))
+        return buckets
+
+    async def _take(self, buckets, cost: float) -> float:
+        try:
+            if self.backend.blocking:
+                return await asyncio.to_thread(self.backend.take, buckets, cost)
+            return self.backend.take(buckets, cost)
+        except Exception as e:
+            # A broken shared store must not take the product down - let the call through
+            self.stats["backend_errors"] += 1
+            print(f"⚠️ Rate limiter '{self.name}' backend failed: {e}")
+            return 0.0
+
+    async def acquire(self, max_wait: float, cost: float = 1.0) -> float:
+        """
+        Wait until the current user's, session's and the global bucket all have a token.
+        Returns the seconds waited; raises RateLimitExceeded if that would exceed max_wait.
+        """
+        buckets = self._buckets(*get_rate_limit_identity())
+        if not buckets:
+            return 0.0
+        start = time.perf_counter()
+        wait = await self._take(buckets, cost)
+        if wait == 0:
+            self.stats["acquired"] += 1
+            self.wait_latency.observe(0.0)
+            return 0.0
+
+        with timed_span(f"rate_limit.{self.name}"):
+            while wait > 0:
+                waited = time.perf_counter() - start
+                if waited + wait > max_wait:
+                    self.stats["rejected"] += 1
+                    self.wait_latency.observe(waited)
+                    raise RateLimitExceeded(self.name, wait)
+                # Jitter spreads waiters that became eligible at the same moment
+                await asyncio.sleep(min(wait, RATE_LIMIT_MAX_POLL) * random.uniform(1.0, 1.2))
+                wait = await self._take(buckets, cost)
+        waited = time.perf_counter() - start
+        self.stats["acquired"] += 1
+        self.stats["waited"] += 1
+        self.wait_latency.observe(waited)
+        return waited
+
+def _make_backend():
+    # An unreachable shared store surfaces on first use, where the limiter lets calls through
+    if RATE_LIMIT_SQLITE_PATH:
+        return SQLiteBucketBackend(RATE_LIMIT_SQLITE_PATH)
+    return MemoryBucketBackend()
+
+_backend = _make_backend()
+rate_limiters = {name: RateLimiter(name, limits, _backend) for name, limits in RATE_LIMITS.items()}
+
+def get_rate_limiter(name: str) -> RateLimiter:
+    return rate_limiters[name]
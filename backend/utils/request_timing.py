@@ -0,0 +1,186 @@
+import os
+import re
+import time
+import functools
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# Recent samples kept per route/span series for the p50/p95/p99 quantiles on /metrics
+METRICS_WINDOW = int(os.getenv("METRICS_WINDOW", "1024"))
+METRICS_QUANTILES = (0.5, 0.95, 0.99)
+
+class RequestTiming:
+    """Named spans recorded while one request is handled"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.spans: List[Tuple[str, float]] = []
+
+    def add(self, name: str, seconds: float) -> None:
+        self.spans.append((name, seconds))
+
+    def server_timing_header(self) -> str:
+        entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.spans]
+        entries.append(f"total;dur={(time.perf_counter() - self.start) * 1000:.1f}")
+        return ", ".join(entries)
+
+# Timing of the request the current task is serving (None outside requests, e.g. job workers)
+_current_timing = contextvars.ContextVar("request_timing", default=None)
+
+def start_request_timing() -> Tuple[RequestTiming, contextvars.Token]:
+    timing = RequestTiming()
+    return timing, _current_timing.set(timing)
+
+def end_request_timing(token: contextvars.Token) -> None:
+    _current_timing.reset(token)
+
+def span_name(name: str) -> str:
+    """Server-Timing metric names are HTTP tokens"""
+    return re.sub(r"[^A-Za-z0-9_.\-]", "_", name)
+
+@contextmanager
+def timed_span(name: str):
+    """Record the time spent in the block as a span of the current request"""
+    timing = _current_timing.get()
+    if timing is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(span_name(name), time.perf_counter() - start)
+
+def timed(name: str):
+    """Decorator form of timed_span for async functions"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with timed_span(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+class LatencySeries:
+    """Cumulative count/sum plus a window of recent samples for quantiles"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=METRICS_WINDOW)
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.samples.append(seconds)
+
+    def quantiles(self) -> Dict[float, float]:
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {q: 0.0 for q in METRICS_QUANTILES}
+        return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in METRICS_QUANTILES}
+
+# (method, route, status) -> series, and (route, span) -> series
+request_latency: Dict[Tuple[str, str, str], LatencySeries] = {}
+span_latency: Dict[Tuple[str, str], LatencySeries] = {}
+
+def record_request(method: str, route: str, status: int, timing: RequestTiming) -> None:
+    elapsed = time.perf_counter() - timing.start
+    request_latency.setdefault((method, route, str(status)), LatencySeries()).observe(elapsed)
+    for name, seconds in timing.spans:
+        span_latency.setdefault((route, name), LatencySeries()).observe(seconds)
+
+def _label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(**labels) -> str:
+    return ",".join(f'{key}="{_label_value(str(value))}"' for key, value in labels.items())
+
+def _render_summary(lines: List[str], metric: str, help_text: str, series: Dict[tuple, LatencySeries], label_names: tuple) -> None:
+    lines.append(f"# HELP {metric} {help_text}")
+    lines.append(f"# TYPE {metric} summary")
+    for key, latency in sorted(series.items()):
+        labels = dict(zip(label_names, key))
+        for q, value in latency.quantiles().items():
+            lines.append(f"{metric}{{{_labels(**labels, quantile=q)}}} {value:.6f}")
+        lines.append(f"{metric}_sum{{{_labels(**labels)}}} {latency.total:.6f}")
+        lines.append(f"{metric}_count{{{_labels(**labels)}}} {latency.count}")
+
+def _render_counters(lines: List[str], counters: tuple, stats: Dict[str, Dict], label_name: Optional[str], metric_type: str = "counter") -> None:
+    """One metric per (name, stats field, help) in counters, with a sample per key of stats (unlabelled without label_name)"""
+    for metric, field, help_text in counters:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {metric_type}")
+        for key, values in sorted(stats.items()):
+            labels = f"{{{_labels(**{label_name: key})}}}" if label_name else ""
+            lines.append(f"{metric}{labels} {values[field]}")
+
+def render_metrics() -> str:
+    """This worker's metrics in the Prometheus text exposition format"""
+    from utils.llm_gateway import get_llm_call_stats
+    from utils.single_flight import get_single_flight_stats
+    from utils.rate_limiter import rate_limiters
+    from utils.research_cache import get_research_cache_stats
+    from services.speculative_drafts import get_speculation_stats
+
+    lines: List[str] = []
+    _render_summary(lines, "angel_request_duration_seconds", "Request latency per route",
+                    request_latency, ("method", "route", "status"))
+    _render_summary(lines, "angel_span_duration_seconds", "Time spent in each named span per route",
+                    span_latency, ("route", "span"))
+
+    _render_counters(lines, (
+        ("angel_llm_calls_total", "calls", "LLM call attempts per call site"),
+        ("angel_llm_errors_total", "errors", "Failed LLM call attempts per call site"),
+        ("angel_llm_retries_total", "retries", "LLM call retries per call site"),
+        ("angel_llm_timeouts_total", "timeouts", "LLM call attempts that timed out per call site"),
+        ("angel_llm_prompt_tokens_total", "prompt_tokens", "Prompt tokens per call site"),
+        ("angel_llm_completion_tokens_total", "completion_tokens", "Completion tokens per call site"),
+    ), get_llm_call_stats(), "call_site")
+
+    _render_counters(lines, (
+        ("angel_single_flight_calls_total", "calls", "Calls into each single-flight group"),
+        ("angel_single_flight_suppressed_total", "suppressed", "Duplicate calls that awaited an in-flight one"),
+        ("angel_single_flight_executions_total", "executions", "Calls that ran the underlying work"),
+        ("angel_single_flight_errors_total", "errors", "Executions that raised"),
+    ), get_single_flight_stats(), "group")
+
+    research_cache_stats = get_research_cache_stats()
+    _render_counters(lines, (
+        ("angel_research_cache_hits_total", "hits", "Research cache hits in the in-process tier"),
+        ("angel_research_cache_shared_hits_total", "shared_hits", "Research cache hits in the shared SQLite tier"),
+        ("angel_research_cache_misses_total", "misses", "Research cache misses"),
+        ("angel_research_cache_evictions_total", "evictions", "Entries evicted from the in-process tier"),
+        ("angel_research_cache_expirations_total", "expirations", "Entries dropped after their TTL"),
+        ("angel_research_cache_errors_total", "errors", "Failed shared-tier reads and writes"),
+    ), research_cache_stats, "cache")
+    _render_counters(lines, (
+        ("angel_research_cache_entries", "entries", "Entries in the in-process tier"),
+    ), research_cache_stats, "cache", "gauge")
+
+    # Speculative command replies: one unlabelled sample per counter
+    speculation_stats = {"": get_speculation_stats()}
+    _render_counters(lines, (
+        ("angel_speculation_scheduled_total", "scheduled", "Speculative command replies started"),
+        ("angel_speculation_skipped_busy_total", "skipped_busy", "Speculations skipped because the budget was full"),
+        ("angel_speculation_hits_total", "hits", "Commands served from a finished speculation"),
+        ("angel_speculation_joined_total", "joined", "Commands that awaited a running speculation"),
+        ("angel_speculation_misses_total", "misses", "Commands generated on demand"),
+        ("angel_speculation_invalidated_total", "invalidated", "Sessions whose speculations were discarded"),
+        ("angel_speculation_errors_total", "errors", "Speculations that failed"),
+    ), speculation_stats, None)
+    _render_counters(lines, (
+        ("angel_speculation_running", "running", "Speculations currently running"),
+    ), speculation_stats, None, "gauge")
+
+    _render_summary(lines, "angel_rate_limit_wait_seconds", "Time callers waited for a rate limiter token",
+                    {(name,): limiter.wait_latency for name, limiter in rate_limiters.items()}, ("limiter",))
+    _render_counters(lines, (
+        ("angel_rate_limit_acquired_total", "acquired", "Rate limiter tokens handed out"),
+        ("angel_rate_limit_waited_total", "waited", "Acquisitions that had to wait for a token"),
+        ("angel_rate_limit_rejected_total", "rejected", "Calls that gave up waiting for a rate limiter token"),
+        ("angel_rate_limit_backend_errors_total", "backend_errors", "Shared-store failures (the call was let through)"),
+    ), {name: limiter.stats for name, limiter in rate_limiters.items()}, "limiter")
+    return "\n".join(lines) + "\n"
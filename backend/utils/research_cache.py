@@ -0,0 +1,176 @@
+import os
+import time
+import asyncio
+import json
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# Default entry limit per in-process cache namespace
+RESEARCH_CACHE_MAX_ENTRIES = int(os.getenv("RESEARCH_CACHE_MAX_ENTRIES", "256"))
+# Optional shared tier: path to a SQLite file visible to every worker on the host (unset = in-process only)
+RESEARCH_CACHE_SQLITE_PATH = os.getenv("RESEARCH_CACHE_SQLITE_PATH", "")
+
+# Every cache created through ResearchCache, by namespace, for stats reporting
+research_caches = {}
+
+def make_cache_key(*parts: Any) -> str:
+    """Content hash of the key parts - stable across processes, unlike hash()"""
+    payload = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class MemoryCacheBackend:
+    """In-process LRU with a size limit and per-entry expiry"""
+
+    def __init__(self, max_entries: int = RESEARCH_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.time():
+            del self.entries[key]
+            self.expirations += 1
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self.entries[key] = (value, time.time() + ttl)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def size(self) -> int:
+        return len(self.entries)
+
+class SQLiteCacheBackend:
+    """Shared tier backed by a SQLite file, so gunicorn workers on one host reuse each other's research"""
+
+    def __init__(self, path: str, namespace: str):
+        self.path = path
+        self.namespace = namespace
+        self.expirations = 0
+        self.lock = threading.Lock()
+        self._conn = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # Opened on first use (call with self.lock held), so a preloaded app never carries it across fork
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS research_cache (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+            """)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[Any]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value, expires_at FROM research_cache WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= time.time():
+                self.conn.execute("DELETE FROM research_cache WHERE namespace = ? AND key = ?", (self.namespace, key))
+                self.conn.commit()
+                self.expirations += 1
+                return None
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO research_cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (self.namespace, key, json.dumps(value, default=str), time.time() + ttl)
+            )
+            self.conn.commit()
+
+    def size(self) -> int:
+        with self.lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM research_cache WHERE namespace = ? AND expires_at > ?",
+                (self.namespace, time.time())
+            ).fetchone()[0]
+
+class ResearchCache:
+    """
+    Two-tier research cache: in-process LRU first, then the optional shared SQLite tier.
+    Shared-tier hits are copied into the local LRU. SQLite I/O runs in a worker thread so
+    a locked file never stalls the event loop.
+    """
+
+    def __init__(self, namespace: str, ttl: float, max_entries: int = RESEARCH_CACHE_MAX_ENTRIES, shared_path: str = RESEARCH_CACHE_SQLITE_PATH):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.local = MemoryCacheBackend(max_entries)
+        # An unreachable shared tier surfaces on first use and is counted as an error, not fatal
+        self.shared = SQLiteCacheBackend(shared_path, namespace) if shared_path else None
+        self.stats = {"hits": 0, "shared_hits": 0, "misses": 0, "sets": 0, "errors": 0}
+        research_caches[namespace] = self
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self.local.get(key)
+        if value is not None:
+            self.stats["hits"] += 1
+            return value
+
+        if self.shared is not None:
+            try:
+                value = await asyncio.to_thread(self.shared.get, key)
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"⚠️ Shared research cache read failed: {e}")
+                value = None
+            if value is not None:
+                self.stats["shared_hits"] += 1
+                self.local.set(key, value, self.ttl)
+                return value
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, value: Any) -> None:
+        self.stats["sets"] += 1
+        self.local.set(key, value, self.ttl)
+        if self.shared is not None:
+            try:
+                await asyncio.to_thread(self.shared.set, key, value, self.ttl)
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"⚠️ Shared research cache write failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["shared_hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "evictions": self.local.evictions,
+            "expirations": self.local.expirations + (self.shared.expirations if self.shared else 0),
+            "entries": self.local.size(),
+            "max_entries": self.local.max_entries,
+            "ttl": self.ttl,
+            "shared_tier": "sqlite" if self.shared else None,
+            "hit_rate": round((self.stats["hits"] + self.stats["shared_hits"]) / lookups, 4) if lookups else 0.0
+        }
+
+def get_research_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Hit/miss/eviction counters for every research cache in this worker"""
+    return {namespace: cache.get_stats() for namespace, cache in research_caches.items()}
@@ -0,0 +1,79 @@
+import os
+import time
+import asyncio
+from typing import Any, Awaitable, Dict, Optional
+
+# Process-wide cap on concurrent research/LLM fan-out calls (shared by every caller in a worker)
+RESEARCH_MAX_CONCURRENCY = int(os.getenv("RESEARCH_MAX_CONCURRENCY", "8"))
+# Per-call timeout in seconds; a call that exceeds it yields None
+RESEARCH_CALL_TIMEOUT = float(os.getenv("RESEARCH_CALL_TIMEOUT", "30"))
+
+_global_semaphore = None
+
+def get_research_semaphore() -> asyncio.Semaphore:
+    global _global_semaphore
+    if _global_semaphore is None:
+        _global_semaphore = asyncio.Semaphore(RESEARCH_MAX_CONCURRENCY)
+    return _global_semaphore
+
+async def run_research(
+    calls: Dict[str, Awaitable],
+    limit: Optional[int] = None,
+    timeout: Optional[float] = RESEARCH_CALL_TIMEOUT,
+    deadline: Optional[float] = None,
+    label: str = "research"
+) -> Dict[str, Any]:
+    """
+    Run named research coroutines concurrently and return {name: result}.
+
+    - limit: max calls of this batch in flight (on top of the process-wide cap)
+    - timeout: per-call timeout; failed or timed-out calls map to None
+    - deadline: overall budget for the batch; calls still running when it passes
+      are cancelled and map to None, so callers get partial results instead of waiting
+    """
+    start_time = time.time()
+    local_semaphore = asyncio.Semaphore(limit) if limit else None
+    global_semaphore = get_research_semaphore()
+
+    async def run_one(name, coro):
+        started = False
+        try:
+            if local_semaphore:
+                await local_semaphore.acquire()
+            try:
+                async with global_semaphore:
+                    started = True
+                    return name, await asyncio.wait_for(coro, timeout)
+            finally:
+                if local_semaphore:
+                    local_semaphore.release()
+        except asyncio.TimeoutError:
+            print(f"⏱️ {label}: '{name}' timed out after {timeout}s")
+            return name, None
+        except Exception as e:
+            print(f"❌ {label}: '{name}' failed: {e}")
+            return name, None
+        finally:
+            if not started:
+                # Cancelled while queued - close the coroutine so it is not reported as never awaited
+                coro.close()
+
+    tasks = [asyncio.ensure_future(run_one(name, coro)) for name, coro in calls.items()]
+    results = {name: None for name in calls}
+    if not tasks:
+        return results
+
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    for task in done:
+        name, value = task.result()
+        results[name] = value
+
+    completed = sum(1 for value in results.values() if value is not None)
+    print(f"⚡ {label}: {completed}/{len(calls)} calls completed in {time.time() - start_time:.2f}s"
+          + (f" ({len(pending)} cut off at {deadline}s deadline)" if pending else ""))
+    return results
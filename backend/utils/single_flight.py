@@ -0,0 +1,50 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+# Every group created through SingleFlight, by name, for stats reporting
+single_flight_groups = {}
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key: the first caller starts the work, later
+    callers await the same future instead of repeating it.
+
+    The work runs in its own task, so a leader whose request is cancelled does not cancel
+    it for the callers still waiting. Results and errors are shared; nothing is kept once
+    the call finishes (pair with a ResearchCache for that).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.in_flight: Dict[str, asyncio.Future] = {}
+        self.stats = {"calls": 0, "executions": 0, "suppressed": 0, "errors": 0}
+        single_flight_groups[name] = self
+
+    async def do(self, key: str, work: Callable[[], Awaitable[Any]]) -> Any:
+        self.stats["calls"] += 1
+        task = self.in_flight.get(key)
+        if task is not None:
+            self.stats["suppressed"] += 1
+        else:
+            self.stats["executions"] += 1
+            task = asyncio.ensure_future(work())
+            self.in_flight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        return await asyncio.shield(task)
+
+    def _finished(self, key: str, task: asyncio.Future) -> None:
+        if self.in_flight.get(key) is task:
+            del self.in_flight[key]
+        if task.cancelled() or task.exception() is not None:
+            self.stats["errors"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "in_flight": len(self.in_flight),
+            "suppression_rate": round(self.stats["suppressed"] / self.stats["calls"], 4) if self.stats["calls"] else 0.0
+        }
+
+def get_single_flight_stats() -> Dict[str, Dict[str, Any]]:
+    """Duplicate-suppression counters for every single-flight group in this worker"""
+    return {name: group.get_stats() for name, group in single_flight_groups.items()}